@@ -8,11 +8,11 @@ Full ISGO v2.1 features available through research collaboration.
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import json
-import numpy as np
-from pathlib import Path
+import uuid
+
+from imgo import backend as graph_backend
+from imgo import coverage as coverage_analysis
+from imgo import config, core, export, figures, metrics, paging, paths, query_cache, risk, snapshot
 
 # Page configuration
 st.set_page_config(
@@ -23,8 +23,12 @@ st.set_page_config(
 )
 
 # Constants
-DATA_PATH = Path("data/sample")
+DATA_PATH = config.DATA_PATH
+SNAPSHOT_PATH = config.SNAPSHOT_PATH
 VERSION = "1.0.0-alpha"
+SEARCH_TOP_K = 20
+INVENTORY_PATH = DATA_PATH / risk.INVENTORY_FILE
+BACKEND_PAGES = ("NIST-MITRE Relationships", "Knowledge Paths")
 
 # Custom CSS
 st.markdown("""
@@ -74,32 +78,108 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def load_data():
-    """Load all sample datasets"""
+@st.cache_resource(max_entries=2)
+def load_data(snapshot_version=None):
+    """Load all datasets once per process and snapshot version (shared, read-only)
+    
+    Tables come memory-mapped from the snapshot when it is fresh (CSV otherwise);
+    a new snapshot version published via CURRENT is picked up on the next rerun.
+    """
     try:
-        nist_controls = pd.read_csv(DATA_PATH / "nist_controls_sample.csv")
-        mitre_techniques = pd.read_csv(DATA_PATH / "mitre_techniques_sample.csv")
-        ai_rmf_mapping = pd.read_csv(DATA_PATH / "ai_rmf_sample.csv")
-        nist_mitre_mapping = pd.read_csv(DATA_PATH / "mapping_sample.csv")
-        
-        with open(DATA_PATH / "graphrag_paths_sample.json", 'r') as f:
-            graphrag_paths = json.load(f)
-        
-        return {
-            'nist_controls': nist_controls,
-            'mitre_techniques': mitre_techniques,
-            'ai_rmf_mapping': ai_rmf_mapping,
-            'nist_mitre_mapping': nist_mitre_mapping,
-            'graphrag_paths': graphrag_paths
-        }
+        return snapshot.load_tables(DATA_PATH, SNAPSHOT_PATH)
     except Exception as e:
         st.error(f"Error loading data: {e}")
         return None
 
+@st.cache_resource(max_entries=2)
+def load_dataset(data_version, _data):
+    """Indexes, aggregates and backend for one data version (shared across sessions)"""
+    dataset = core.Dataset(_data, snapshot_path=SNAPSHOT_PATH, cache=get_query_cache())
+    dataset.register_metrics()
+    return dataset
+
+def search_rows(hits, kind):
+    """Row positions of search hits of one kind, or None when no search is active"""
+    if hits is None:
+        return None
+    return sorted(hit['row'] for hit in hits if hit['kind'] == kind)
+
+def clamp_page(key, pages):
+    """Keep a page widget's stored value within the current page count"""
+    st.session_state[key] = min(max(int(st.session_state.get(key, 1)), 1), pages)
+
+def show_table_page(view, positions, key, noun):
+    """Sorted page of the selected rows; long text is fetched per row on demand"""
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        sort_by = st.selectbox("Sort by", ['(none)'] + view.columns, key=f'{key}_sort')
+    with col2:
+        descending = st.checkbox("Descending", key=f'{key}_descending')
+    pages = paging.window(len(positions))[1]
+    clamp_page(f'{key}_page', pages)
+    with col3:
+        page = st.number_input("Page", min_value=1, max_value=pages, key=f'{key}_page')
+    
+    result = view.page(positions, None if sort_by == '(none)' else sort_by, not descending, page)
+    with metrics.span("render.dataframe"):
+        st.dataframe(result['rows'], use_container_width=True, hide_index=True)
+    st.markdown(f"**Showing {result['total']} of {len(view)} {noun}** (page {result['page']} of {result['pages']})")
+    show_export(key, key, lambda fmt: export.table_export(
+        {core.BROWSABLE[key][0]: view.df}, key, fmt,
+        view.order(positions, None if sort_by == '(none)' else sort_by, not descending),
+    ), state=(sort_by, descending, hash(positions.tobytes())))
+    
+    # Long text for one row only
+    if view.text_columns and len(result['positions']):
+        keys = view.df[view.key].iloc[result['positions']].tolist()
+        selected = st.selectbox("Show full text for", ['—'] + keys, key=f'{key}_detail')
+        if selected != '—':
+            for column, text in view.detail(view.position(selected)).items():
+                st.markdown(f"**{column}**: {text}")
+
+def show_export(key, source, build, state=()):
+    """Format picker and download button; the file is only serialized when requested"""
+    with st.expander("⬇️ Export"):
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            fmt = st.selectbox("Format", export.formats(source), key=f'{key}_export_format')
+        prepared = st.session_state.get(f'{key}_export')
+        with col2:
+            if st.button("Prepare file", key=f'{key}_export_prepare'):
+                with metrics.span("export.prepare"):
+                    prepared = (fmt, state, export.to_bytes(build(fmt)))
+                st.session_state[f'{key}_export'] = prepared
+            if prepared is not None and prepared[:2] == (fmt, state):
+                st.download_button(f"Download {export.file_name(source, fmt)} ({len(prepared[2]) / 1e6:.1f} MB)",
+                                   data=prepared[2], file_name=export.file_name(source, fmt),
+                                   mime=export.FORMATS[fmt][0], key=f'{key}_export_download')
+            else:
+                st.caption("Exports every matching row, not just this page")
+
+@st.cache_resource
+def get_query_cache():
+    """Process-wide path/neighborhood query cache (shared across sessions)"""
+    return query_cache.QueryCache(
+        max_entries=config.QUERY_CACHE_MAX_ENTRIES,
+        max_bytes=config.QUERY_CACHE_MAX_MB * 1024 * 1024,
+        disk_path=config.QUERY_CACHE_PATH,
+    )
+
+@st.cache_resource
+def start_metrics_exporter():
+    """Serve /metrics from this process when METRICS_PORT is set (once per process)"""
+    if config.METRICS_ENABLED and config.METRICS_PORT:
+        return metrics.start_exporter(config.METRICS_PORT)
+    return None
+
 def main():
     """Main application"""
     
+    # Instrumentation (no-op unless METRICS_ENABLED)
+    start_metrics_exporter()
+    session_id = st.session_state.setdefault('_session_id', uuid.uuid4().hex[:12])
+    metrics.registry.rerun(session_id)
+    
     # Header
     st.markdown('<div class="main-header">🔒 IMGO Demo</div>', unsafe_allow_html=True)
     st.markdown(
@@ -116,18 +196,42 @@ def main():
     """, unsafe_allow_html=True)
     
     # Load data
-    data = load_data()
+    with metrics.span("dashboard.load_data"):
+        data = load_data(snapshot.current_version(SNAPSHOT_PATH))
     if data is None:
         st.error("Failed to load data. Please check data files.")
         return
+    with metrics.span("dashboard.load_dataset"):
+        dataset = load_dataset(data['data_version'], data)
     
     # Sidebar
     st.sidebar.title("Navigation")
-    page = st.sidebar.radio(
-        "Select View",
-        ["Overview", "NIST Controls", "MITRE Techniques", "AI RMF Mapping", 
-         "NIST-MITRE Relationships", "Knowledge Paths", "About"]
-    )
+    pages = ["Overview", "NIST Controls", "MITRE Techniques", "AI RMF Mapping", 
+             "NIST-MITRE Relationships", "Coverage & Gaps", "Residual Risk", "Knowledge Paths", "About"]
+    # Only for deployments that turned instrumentation on
+    if config.METRICS_ENABLED:
+        pages.append("Performance")
+    page = st.sidebar.radio("Select View", pages)
+    
+    # Graph backend only for the pages that query it (indexes are built on first use)
+    backend = dataset.backend if page in BACKEND_PAGES else None
+    if backend is not None and dataset.backend_error is not None:
+        st.warning(f"Graph backend '{config.GRAPH_BACKEND}' unavailable ({dataset.backend_error}); "
+                   "using local snapshot")
+    
+    # Search
+    st.sidebar.markdown("---")
+    query = st.sidebar.text_input("🔎 Search", key='search_query',
+                                  placeholder="controls, techniques, requirements")
+    search_hits = None
+    if query.strip():
+        search_hits = dataset.search(query, k=SEARCH_TOP_K)
+        if search_hits:
+            st.sidebar.caption(f"{len(search_hits)} matches (tables below are filtered)")
+            for hit in search_hits[:10]:
+                st.sidebar.markdown(f"- `{hit['id']}` {hit['title']}")
+        else:
+            st.sidebar.caption("No matches")
     
     st.sidebar.markdown("---")
     st.sidebar.markdown(
@@ -140,6 +244,22 @@ def main():
         unsafe_allow_html=True
     )
     
+    # Backend latency
+    backend_name = dataset.backend.name if dataset.built('backend') else config.GRAPH_BACKEND
+    with st.sidebar.expander(f"⏱️ Backend: {backend_name}"):
+        latency = dataset.backend.latency.snapshot() if dataset.built('backend') else None
+        if latency:
+            st.dataframe(
+                pd.DataFrame([
+                    {'call': name, 'count': stats['count'],
+                     'last_ms': stats['last'] * 1000, 'mean_ms': stats['mean'] * 1000}
+                    for name, stats in latency.items()
+                ]),
+                hide_index=True
+            )
+        else:
+            st.caption("No backend calls yet")
+    
     # BFO Compliance Badge
     st.sidebar.markdown("---")
     st.sidebar.markdown("### 🏛️ BFO Compliance")
@@ -161,34 +281,45 @@ def main():
     )
     
     # Page routing
-    if page == "Overview":
-        show_overview(data)
-    elif page == "NIST Controls":
-        show_nist_controls(data['nist_controls'])
-    elif page == "MITRE Techniques":
-        show_mitre_techniques(data['mitre_techniques'])
-    elif page == "AI RMF Mapping":
-        show_ai_rmf_mapping(data['ai_rmf_mapping'])
-    elif page == "NIST-MITRE Relationships":
-        show_nist_mitre_relationships(data['nist_mitre_mapping'])
-    elif page == "Knowledge Paths":
-        show_knowledge_paths(data['graphrag_paths'])
-    elif page == "About":
-        show_about()
+    with metrics.span(f"view.{page}"):
+        if page == "Overview":
+            show_overview(data, dataset.aggregates)
+        elif page == "NIST Controls":
+            show_nist_controls(dataset.views['controls'], dataset.aggregates,
+                               search_rows(search_hits, "NISTControl"))
+        elif page == "MITRE Techniques":
+            show_mitre_techniques(dataset.views['techniques'], dataset.aggregates,
+                                  search_rows(search_hits, "MITRETechnique"))
+        elif page == "AI RMF Mapping":
+            show_ai_rmf_mapping(dataset.views['requirements'], dataset.aggregates,
+                                search_rows(search_hits, "AIRMFRequirement"))
+        elif page == "NIST-MITRE Relationships":
+            show_nist_mitre_relationships(backend, dataset.index, data)
+        elif page == "Coverage & Gaps":
+            show_coverage(dataset.coverage, data['data_version'])
+        elif page == "Residual Risk":
+            show_residual_risk(dataset, data['data_version'])
+        elif page == "Knowledge Paths":
+            show_knowledge_paths(data['graphrag_paths'], backend, dataset.engine)
+        elif page == "About":
+            show_about()
+        elif page == "Performance":
+            show_performance(dataset, session_id)
 
-def show_overview(data):
+def show_overview(data, cube):
     """Overview dashboard"""
     st.header("📊 Overview Dashboard")
+    version = data['data_version']
     
     # Metrics
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("NIST Controls", len(data['nist_controls']))
+        st.metric("NIST Controls", cube.row_count('nist_controls'))
     with col2:
-        st.metric("MITRE Techniques", len(data['mitre_techniques']))
+        st.metric("MITRE Techniques", cube.row_count('mitre_techniques'))
     with col3:
-        st.metric("AI RMF Mappings", len(data['ai_rmf_mapping']))
+        st.metric("AI RMF Mappings", cube.row_count('ai_rmf_mapping'))
     with col4:
         st.metric("Knowledge Paths", len(data['graphrag_paths']))
     
@@ -199,71 +330,44 @@ def show_overview(data):
     
     with col1:
         st.subheader("NIST Control Families")
-        family_counts = data['nist_controls']['family'].value_counts()
-        fig = px.pie(
-            values=family_counts.values,
-            names=family_counts.index,
-            title="Distribution by Family",
-            color_discrete_sequence=px.colors.sequential.Blues_r
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        with metrics.span("overview.figure"):
+            fig = figures.get("family_pie", version, lambda: figures.category_pie(
+                cube.value_counts('family'), "Distribution by Family"))
+        with metrics.span("render.plotly_chart"):
+            st.plotly_chart(fig, use_container_width=True)
     
     with col2:
         st.subheader("MITRE Attack Tactics")
-        tactic_counts = data['mitre_techniques']['tactic'].value_counts()
-        fig = px.bar(
-            x=tactic_counts.index,
-            y=tactic_counts.values,
-            labels={'x': 'Tactic', 'y': 'Count'},
-            title="Techniques by Tactic",
-            color=tactic_counts.values,
-            color_continuous_scale='Reds'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        with metrics.span("overview.figure"):
+            fig = figures.get("tactic_bar", version, lambda: figures.category_bar(
+                cube.value_counts('tactic'), "Techniques by Tactic", "Tactic"))
+        with metrics.span("render.plotly_chart"):
+            st.plotly_chart(fig, use_container_width=True)
     
     st.markdown("---")
     
     # FKGL Score Distribution
     st.subheader("NIST Control Readability (FKGL Scores)")
     
-    # Manual histogram calculation for better control
-    fkgl_scores = data['nist_controls']['fkgl_score'].values
-    counts, bins = np.histogram(fkgl_scores, bins=5)
-    bin_centers = (bins[:-1] + bins[1:]) / 2
-    bin_labels = [f"{bins[i]:.1f}-{bins[i+1]:.1f}" for i in range(len(bins)-1)]
-    
-    fig = go.Figure(data=[
-        go.Bar(
-            x=bin_labels,
-            y=counts,
-            text=counts,
-            textposition='outside',
-            marker=dict(
-                color='#1f77b4',
-                line=dict(color='white', width=2)
-            )
-        )
-    ])
-    
-    fig.update_layout(
-        title="Flesch-Kincaid Grade Level Distribution",
-        xaxis_title="FKGL Score Range (Readability Level)",
-        yaxis_title="Count",
-        showlegend=False,
-        bargap=0.2,
-        height=400,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)'
-    )
+    # Histogram derived from the precomputed fine bins
+    with metrics.span("overview.figure"):
+        fig = figures.get("fkgl_histogram", version, lambda: figures.histogram_bar(
+            *cube.histogram('fkgl_score', bins=5),
+            title="Flesch-Kincaid Grade Level Distribution",
+            x_title="FKGL Score Range (Readability Level)",
+            color='#1f77b4',
+        ))
     
-    st.plotly_chart(fig, use_container_width=True)
+    with metrics.span("render.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
     
     # Show actual data points
     with st.expander("📊 View Individual FKGL Scores"):
         score_df = data['nist_controls'][['node_id', 'title', 'fkgl_score']].sort_values('fkgl_score')
-        st.dataframe(score_df, use_container_width=True)
+        with metrics.span("render.dataframe"):
+            st.dataframe(score_df, use_container_width=True)
 
-def show_nist_controls(df):
+def show_nist_controls(view, cube, search_rows=None):
     """NIST Controls view"""
     st.header("🛡️ NIST SP 800-53 Controls")
     
@@ -272,26 +376,22 @@ def show_nist_controls(df):
     # Filters
     col1, col2 = st.columns(2)
     with col1:
-        families = ['All'] + sorted(df['family'].unique().tolist())
+        families = ['All'] + cube.categories('family')
         selected_family = st.selectbox("Filter by Family", families)
     with col2:
         # FKGL range filter
-        fkgl_range = st.slider("FKGL Score Range", 
-                               float(df['fkgl_score'].min()), 
-                               float(df['fkgl_score'].max()),
-                               (float(df['fkgl_score'].min()), float(df['fkgl_score'].max())))
-    
-    # Apply filters
-    filtered_df = df.copy()
-    if selected_family != 'All':
-        filtered_df = filtered_df[filtered_df['family'] == selected_family]
-    filtered_df = filtered_df[(filtered_df['fkgl_score'] >= fkgl_range[0]) & 
-                              (filtered_df['fkgl_score'] <= fkgl_range[1])]
+        fkgl_min, fkgl_max = cube.value_range('fkgl_score') or (0.0, 0.0)
+        fkgl_range = st.slider("FKGL Score Range", fkgl_min, fkgl_max, (fkgl_min, fkgl_max))
+    
+    # Apply filters (pushed down to the column indexes)
+    positions = view.select(
+        equals=None if selected_family == 'All' else {'family': selected_family},
+        ranges={'fkgl_score': fkgl_range},
+        rows=search_rows,
+    )
     
     # Display
-    st.dataframe(filtered_df, use_container_width=True, height=400)
-    
-    st.markdown(f"**Showing {len(filtered_df)} of {len(df)} controls**")
+    show_table_page(view, positions, 'controls', "controls")
     
     # FKGL explanation
     with st.expander("ℹ️ What is FKGL Score?"):
@@ -304,108 +404,298 @@ def show_nist_controls(df):
         Lower scores indicate more accessible documentation.
         """)
 
-def show_mitre_techniques(df):
+def show_mitre_techniques(view, cube, search_rows=None):
     """MITRE Techniques view"""
     st.header("⚔️ MITRE ATT&CK Techniques")
     
     st.info("Displaying sample of MITRE ATT&CK techniques (N=10)")
     
     # Filters
-    tactics = ['All'] + sorted(df['tactic'].unique().tolist())
+    tactics = ['All'] + cube.categories('tactic')
     selected_tactic = st.selectbox("Filter by Tactic", tactics)
     
     # Apply filter
-    filtered_df = df.copy()
-    if selected_tactic != 'All':
-        filtered_df = filtered_df[filtered_df['tactic'] == selected_tactic]
+    positions = view.select(
+        equals=None if selected_tactic == 'All' else {'tactic': selected_tactic},
+        rows=search_rows,
+    )
     
     # Display
-    st.dataframe(filtered_df, use_container_width=True, height=400)
-    
-    st.markdown(f"**Showing {len(filtered_df)} of {len(df)} techniques**")
+    show_table_page(view, positions, 'techniques', "techniques")
 
-def show_ai_rmf_mapping(df):
+def show_ai_rmf_mapping(view, cube, search_rows=None):
     """AI RMF Mapping view"""
     st.header("🤖 NIST AI RMF Requirements")
     
     st.info("Displaying AI Risk Management Framework requirements (N=10)")
     
     # Filters
-    categories = ['All'] + sorted(df['category'].unique().tolist())
+    categories = ['All'] + cube.categories('category')
     selected_category = st.selectbox("Filter by Category", categories)
     
     # Apply filter
-    filtered_df = df.copy()
-    if selected_category != 'All':
-        filtered_df = filtered_df[filtered_df['category'] == selected_category]
+    positions = view.select(
+        equals=None if selected_category == 'All' else {'category': selected_category},
+        rows=search_rows,
+    )
     
     # Display
-    st.dataframe(filtered_df, use_container_width=True, height=400)
-    
-    st.markdown(f"**Showing {len(filtered_df)} of {len(df)} requirements**")
+    show_table_page(view, positions, 'requirements', "requirements")
 
-def show_nist_mitre_relationships(df):
+def show_nist_mitre_relationships(backend, index, tables):
     """NIST-MITRE Relationships view"""
     st.header("🔗 NIST-MITRE Relationship Mappings")
     
     st.info("Displaying relationships between NIST controls and MITRE techniques (N=10)")
     
+    # One backend round-trip per render, using the widget state from the last run
+    selected_nist = st.session_state.get('relationships_control', 'All')
+    conf_range = st.session_state.get('relationships_confidence', (0.0, 1.0))
+    sort_by = st.session_state.get('relationships_sort', '(none)')
+    version = tables['data_version']
+    view = backend.relationships_view(
+        control_id=None if selected_nist == 'All' else selected_nist,
+        conf_range=conf_range,
+        sort_by=None if sort_by == '(none)' else sort_by,
+        ascending=not st.session_state.get('relationships_descending', False),
+        page=st.session_state.get('relationships_page', 1),
+    )
+    
     # Filters
     col1, col2 = st.columns(2)
     with col1:
-        nist_controls = ['All'] + sorted(df['nist_control_id'].unique().tolist())
-        selected_nist = st.selectbox("Filter by NIST Control", nist_controls)
+        nist_controls = ['All'] + view['controls']
+        st.selectbox("Filter by NIST Control", nist_controls, key='relationships_control')
     with col2:
         # Confidence slider
-        conf_range = st.slider("Confidence Range", 0.0, 1.0, (0.0, 1.0))
+        st.slider("Confidence Range", 0.0, 1.0, (0.0, 1.0), key='relationships_confidence')
+    
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        st.selectbox("Sort by", ['(none)'] + graph_backend.MAPPING_COLUMNS, key='relationships_sort')
+    with col2:
+        st.checkbox("Descending", key='relationships_descending')
+    clamp_page('relationships_page', view['pages'])
+    with col3:
+        st.number_input("Page", min_value=1, max_value=view['pages'], key='relationships_page')
     
-    # Apply filters
-    filtered_df = df.copy()
-    if selected_nist != 'All':
-        filtered_df = filtered_df[filtered_df['nist_control_id'] == selected_nist]
-    filtered_df = filtered_df[(filtered_df['mapping_confidence'] >= conf_range[0]) & 
-                              (filtered_df['mapping_confidence'] <= conf_range[1])]
+    filtered_df = view['mappings']
     
     # Display
-    st.dataframe(filtered_df, use_container_width=True, height=400)
-    
-    st.markdown(f"**Showing {len(filtered_df)} of {len(df)} relationships**")
+    with metrics.span("render.dataframe"):
+        st.dataframe(filtered_df, use_container_width=True, hide_index=True)
+    
+    st.markdown(f"**Showing {view['matched']} of {view['total']} relationships** "
+                f"(page {view['page']} of {view['pages']})")
+    show_export('relationships', 'mappings', lambda fmt: export.table_export(
+        tables, 'mappings', fmt,
+        export.mapping_rows(index, None if selected_nist == 'All' else selected_nist, conf_range),
+    ), state=(selected_nist, tuple(conf_range)))
+    
+    # Inference path for one mapping only
+    if len(filtered_df):
+        pairs = [f"{c} → {t}" for c, t in zip(filtered_df['nist_control_id'], filtered_df['mitre_technique_id'])]
+        selected = st.selectbox("Show inference path for", ['—'] + pairs, key='relationships_detail')
+        if selected != '—':
+            control_id, technique_id = selected.split(" → ")
+            st.markdown(f"**inference_path**: {backend.mapping_detail(control_id, technique_id)}")
     
     # Confidence distribution
     st.subheader("Mapping Confidence Distribution")
     
-    # Manual histogram calculation
-    conf_scores = df['mapping_confidence'].values
-    counts, bins = np.histogram(conf_scores, bins=5)
-    bin_labels = [f"{bins[i]:.2f}-{bins[i+1]:.2f}" for i in range(len(bins)-1)]
-    
-    fig = go.Figure(data=[
-        go.Bar(
-            x=bin_labels,
-            y=counts,
-            text=counts,
-            textposition='outside',
-            marker=dict(
+    # Histogram computed by the backend from fine bins; rebuilt only when the filters change
+    with metrics.span("relationships.figure"):
+        fig = figures.get(
+            "confidence_histogram", version,
+            lambda: figures.histogram_bar(
+                *view['confidence_histogram'],
+                title="Distribution of Mapping Confidence Scores",
+                x_title="Confidence Score Range",
                 color='#2ca02c',
-                line=dict(color='white', width=2)
-            )
+                precision=2,
+            ),
+            state=(selected_nist, tuple(conf_range)),
         )
-    ])
-    
-    fig.update_layout(
-        title="Distribution of Mapping Confidence Scores",
-        xaxis_title="Confidence Score Range",
-        yaxis_title="Count",
-        showlegend=False,
-        bargap=0.2,
-        height=400,
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)'
-    )
     
-    st.plotly_chart(fig, use_container_width=True)
+    with metrics.span("render.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # Network view
+    st.subheader("Mitigation Network")
+    st.caption(f"WebGL bipartite view; the {figures.MAX_NETWORK_EDGES:,} most confident edges are drawn "
+               "when more match")
+    col1, col2 = st.columns(2)
+    with col1:
+        network_family = st.selectbox("Control Family", ['All'] + sorted(tables['nist_controls']['family'].unique()),
+                                      key='network_family')
+    with col2:
+        network_confidence = st.slider("Minimum Confidence", 0.0, 1.0, 0.0, step=0.05,
+                                       key='network_confidence')
+    with metrics.span("relationships.network"):
+        fig = figures.get(
+            "network", version,
+            lambda: figures.network(
+                index, tables, min_confidence=network_confidence,
+                family=None if network_family == 'All' else network_family,
+            ),
+            state=(network_family, network_confidence),
+        )
+    with metrics.span("render.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+def show_coverage(coverage, version):
+    """Coverage heatmap and gap analysis"""
+    st.header("🧭 Coverage & Gap Analysis")
+    
+    st.info("Which ATT&CK techniques lack a mitigating control above a confidence, "
+            "and which AI RMF requirements have no backing control")
+    
+    # Filters
+    col1, col2 = st.columns(2)
+    with col1:
+        min_confidence = st.slider("Minimum Mapping Confidence", 0.0, 1.0,
+                                   coverage_analysis.DEFAULT_MIN_CONFIDENCE, step=0.05,
+                                   key='coverage_confidence')
+    with col2:
+        distinct = st.checkbox("Count distinct techniques per cell (instead of mappings)",
+                               key='coverage_distinct')
+    
+    # Metrics
+    summary = coverage.summary(min_confidence=min_confidence)
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Covered Techniques", f"{summary['covered_techniques']} / {summary['techniques']}")
+    with col2:
+        st.metric("Uncovered Techniques", summary['uncovered_techniques'])
+    with col3:
+        st.metric("Mitigating Controls", f"{summary['mitigating_controls']} / {summary['controls']}")
+    with col4:
+        st.metric("Unbacked Requirements", summary['unbacked_requirements'])
+    
+    # Heatmap
+    st.subheader("Control Family × Tactic")
+    with metrics.span("coverage.figure"):
+        fig = figures.get(
+            "coverage_heatmap", version,
+            lambda: figures.heatmap(
+                coverage.family_tactic(min_confidence=min_confidence, distinct_techniques=distinct),
+                title=f"{'Techniques' if distinct else 'Mitigations'} with confidence ≥ {min_confidence:.2f}",
+                x_title="Tactic", y_title="Control Family",
+            ),
+            state=(min_confidence, distinct),
+        )
+    with metrics.span("render.plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
+    
+    with st.expander("📊 Coverage by Tactic"):
+        st.dataframe(coverage.tactic_coverage(min_confidence=min_confidence),
+                     use_container_width=True, hide_index=True)
+    
+    # Gaps
+    st.subheader("Uncovered Techniques")
+    tactics = ['All'] + sorted(coverage.tactic_coverage(min_confidence=min_confidence)['tactic'])
+    tactic = st.selectbox("Tactic", tactics, key='coverage_tactic')
+    uncovered = coverage.uncovered_techniques(min_confidence=min_confidence,
+                                              tactic=None if tactic == 'All' else tactic)
+    with metrics.span("render.dataframe"):
+        st.dataframe(uncovered, use_container_width=True, hide_index=True)
+    st.caption("best_confidence / best_control: the strongest existing mapping, below the threshold")
+    show_export('coverage_gaps', 'gaps', lambda fmt: export.frame_export(uncovered, fmt),
+                state=(min_confidence, tactic))
+    
+    st.subheader("AI RMF Requirements Without a Backing Control")
+    unbacked = coverage.uncovered_requirements()
+    if len(unbacked):
+        st.dataframe(unbacked, use_container_width=True, hide_index=True)
+    else:
+        st.success("Every requirement is linked to at least one control that mitigates a technique")
+    
+    st.subheader("Redundant Controls")
+    redundant = coverage.redundant_controls(min_confidence=min_confidence)
+    st.caption("Controls whose every technique is also mitigated by another control; "
+               "subset_of names a single control that covers all of them")
+    with metrics.span("render.dataframe"):
+        st.dataframe(redundant, use_container_width=True, hide_index=True)
+    show_export('coverage_redundant', 'redundant-controls', lambda fmt: export.frame_export(redundant, fmt),
+                state=(min_confidence,))
+
+def show_residual_risk(dataset, version):
+    """Residual ATT&CK exposure of a system control inventory"""
+    st.header("🛡️ Residual Risk")
+    
+    st.info("Per system, the chance that no implemented control mitigates each technique, "
+            "averaged per tactic (mapping confidences as independent mitigation probabilities)")
+    
+    # Inventory
+    uploaded = st.file_uploader("System inventory CSV (system_id, control_id[, system_name, asset_type])",
+                                type=["csv"], key='risk_inventory')
+    if uploaded is None and not INVENTORY_PATH.exists():
+        st.warning(f"No inventory uploaded and no sample inventory at {INVENTORY_PATH}")
+        return
+    try:
+        inventory = risk.load_inventory(uploaded if uploaded is not None else INVENTORY_PATH)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    st.caption(f"Inventory: {uploaded.name if uploaded is not None else INVENTORY_PATH.name}")
+    
+    # Filters
+    col1, col2 = st.columns(2)
+    with col1:
+        min_confidence = st.slider("Minimum Mapping Confidence", 0.0, 1.0, 0.0, step=0.05,
+                                   key='risk_confidence')
+    with col2:
+        top_n = st.selectbox("Worst-Exposed Systems", [10, 20], key='risk_top')
+    
+    with metrics.span("risk.score"):
+        results = dataset.residual_risk(inventory, min_confidence=min_confidence)
+    if results.empty:
+        st.warning("The inventory lists no systems")
+        return
+    worst = results.head(top_n).set_index('system_id')
+    tactics = [c for c in results.columns if c not in risk.SUMMARY_COLUMNS]
+    
+    # Metrics
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Systems", f"{len(results):,}")
+    with col2:
+        st.metric("Mean Exposure", f"{results['exposure'].mean():.1%}")
+    with col3:
+        st.metric("Worst System", worst.index[0], f"{worst['exposure'].iloc[0]:.1%}", delta_color="off")
+    with col4:
+        st.metric("Unknown Control IDs", int(results['unknown_controls'].sum()))
+    
+    # Charts
+    state = (risk.inventory_digest(inventory), min_confidence, top_n)
+    col1, col2 = st.columns(2)
+    with col1, metrics.span("risk.figure"):
+        fig = figures.get(
+            "risk_worst", version,
+            lambda: figures.category_bar(worst['exposure'].round(3), title="Residual Exposure (Worst Systems)",
+                                         x_title="System", y_title="Exposure"),
+            state=state,
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    with col2, metrics.span("risk.figure"):
+        fig = figures.get(
+            "risk_tactics", version,
+            lambda: figures.heatmap(worst[tactics].round(2), title="Exposure by Tactic",
+                                    x_title="Tactic", y_title="System", colorscale='Reds',
+                                    value_title="Exposure"),
+            state=state,
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # Table
+    st.subheader("Worst-Exposed Systems")
+    with metrics.span("render.dataframe"):
+        st.dataframe(worst.reset_index(), use_container_width=True, hide_index=True)
+    show_export('risk', 'residual-risk', lambda fmt: export.frame_export(results, fmt), state=state)
+    st.caption(f"exposed_techniques: techniques with residual exposure ≥ {risk.EXPOSED_THRESHOLD}; "
+               "unknown_controls: inventory control ids not in the catalog (ignored)")
 
-def show_knowledge_paths(paths_data):
+def show_knowledge_paths(paths_data, backend, engine):
     """Knowledge Paths view"""
     st.header("🗺️ GraphRAG Knowledge Paths")
     
@@ -434,6 +724,15 @@ def show_knowledge_paths(paths_data):
         
         st.markdown("#### Reasoning")
         st.info(selected_path['reasoning'])
+        
+        # Direct MITIGATES edges between the path's controls and techniques
+        supporting = backend.supporting_mappings(
+            selected_path['nist_controls'], selected_path['mitre_techniques']
+        )
+        if len(supporting):
+            st.markdown("#### Supporting Mappings")
+            with metrics.span("render.dataframe"):
+                st.dataframe(supporting, use_container_width=True, hide_index=True)
     
     with col2:
         st.subheader("Path Metrics")
@@ -456,6 +755,127 @@ def show_knowledge_paths(paths_data):
         st.metric("Average Path Length", f"{avg_length:.1f}")
     with col3:
         st.metric("Total Paths", len(paths_data))
+    show_export('paths', 'paths', lambda fmt: export.paths_export(paths_data, fmt))
+    
+    st.markdown("---")
+    show_path_search(engine)
+
+def show_path_search(engine):
+    """On-demand multi-hop path queries"""
+    st.subheader("Compute Paths On Demand")
+    
+    index = engine.index
+    col1, col2 = st.columns(2)
+    with col1:
+        starts = sorted(index.sources())
+        source = st.selectbox("Start Node", starts, index=starts.index("SR-3") if "SR-3" in starts else 0)
+        targets = ['Any MITRE Technique'] + sorted(index.nodes("MITRETechnique"))
+        target = st.selectbox("Target", targets)
+    with col2:
+        max_hops = st.slider("Max Hops", 1, paths.MAX_HOPS, 3)
+        top_k = st.slider("Top-K Paths", 1, 20, 5)
+        min_confidence = st.slider("Minimum Edge Confidence", 0.0, 1.0, 0.0)
+    both_ways = st.checkbox("Also traverse edges in reverse (e.g. control → technique ← control)")
+    
+    result = engine.best_paths(
+        source,
+        target=None if target == 'Any MITRE Technique' else target,
+        k=top_k,
+        max_hops=max_hops,
+        min_confidence=min_confidence,
+        direction="both" if both_ways else "out",
+    )
+    if result['truncated']:
+        st.warning("Time budget reached; showing the best paths found so far.")
+    if not result['paths']:
+        st.info("No paths found for this query.")
+        return
+    
+    stats = engine.cache.stats()
+    st.caption(
+        f"Query cache: {stats['hits'] + stats['disk_hits']} hits · {stats['misses']} misses · "
+        f"{stats['evictions']} evictions · {stats['entries']} entries"
+    )
+    
+    st.dataframe(
+        pd.DataFrame([
+            {
+                'path': p['reasoning'],
+                'confidence': p['confidence'],
+                'path_length': p['path_length'],
+                'nist_controls': ", ".join(p['nist_controls']),
+                'mitre_techniques': ", ".join(p['mitre_techniques']),
+            }
+            for p in result['paths']
+        ]),
+        use_container_width=True,
+        hide_index=True
+    )
+    show_export('path_search', 'paths', lambda fmt: export.paths_export(result['paths'], fmt),
+                state=(source, target, max_hops, top_k, min_confidence, both_ways))
+
+def show_performance(dataset, session_id):
+    """Instrumentation panel: spans, cache hit ratios, table memory, reruns"""
+    st.header("⏱️ Performance")
+    
+    registry = metrics.registry
+    # The toggle and reset act on the whole process (every session), so they need METRICS_ADMIN
+    if config.METRICS_ADMIN:
+        enabled = st.toggle("Instrumentation enabled (this process)", value=registry.enabled)
+        if enabled != registry.enabled:
+            registry.enabled = enabled
+            st.rerun()
+    if not registry.enabled:
+        st.info("Timing spans are paused for this process.")
+        return
+    
+    sessions = registry.sessions()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Reruns (process)", registry.counters().get('reruns', 0))
+    with col2:
+        st.metric("Reruns (this session)", sessions.get(session_id, 0))
+    with col3:
+        st.metric("Active sessions", len(sessions))
+    
+    # Spans, slowest total first
+    spans = registry.spans()
+    if spans:
+        st.subheader("Timing Spans")
+        span_df = pd.DataFrame([
+            {'span': name, 'count': s['count'], 'mean_ms': s['mean'] * 1000,
+             'p95_ms (≤)': s['p95'] * 1000, 'max_ms': s['max'] * 1000, 'total_s': s['total']}
+            for name, s in spans.items()
+        ]).sort_values('total_s', ascending=False)
+        st.dataframe(span_df, use_container_width=True, hide_index=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Query Cache")
+        if dataset.cache is not None:
+            stats = dataset.cache.stats()
+            st.metric("Hit ratio", f"{stats['hit_ratio']:.1%}")
+            st.caption(f"{stats['entries']} entries, {stats['bytes'] / 1024:.0f} KiB, "
+                       f"{stats['hits']} hits / {stats['disk_hits']} disk hits / {stats['misses']} misses")
+        st.subheader("Figure Cache")
+        stats = figures.cache.stats()
+        st.metric("Hit ratio", f"{stats['hit_ratio']:.1%}")
+        st.caption(f"{stats['entries']} figures, ~{stats['bytes'] / 1024:.0f} KiB, "
+                   f"{stats['hits']} hits / {stats['misses']} misses")
+    with col2:
+        st.subheader("Table Memory")
+        memory = pd.Series(dataset.memory_usage, name='bytes')
+        st.dataframe(memory.to_frame().assign(MiB=memory / 2**20), use_container_width=True)
+        st.caption(f"Total {memory.sum() / 2**20:.2f} MiB")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if config.METRICS_ADMIN and st.button("Reset counters"):
+            registry.reset()
+            st.rerun()
+    with col2:
+        st.download_button("Download /metrics", registry.render(), file_name="imgo_metrics.prom",
+                           mime="text/plain")
 
 def show_about():
     """About page"""
@@ -0,0 +1,9 @@
+"""
+IMGO core package
+
+Data access, indexing and query engines used by the Streamlit dashboard.
+Modules are imported directly (e.g. ``from imgo import snapshot``) so the
+dashboard only pays for what a page actually uses.
+"""
+
+__version__ = "1.0.0-alpha"
@@ -0,0 +1,197 @@
+"""
+Precomputed aggregate cube for overview charts and distributions
+
+Materializes the group-by counts (control family, technique tactic,
+requirement category) and fixed fine-grained histograms (FKGL score,
+mapping confidence) once per data version. Display histograms with a
+handful of bins are derived from the fine bins, so serving a chart costs
+O(bins) instead of O(rows). Rows can be appended or removed
+incrementally without rebuilding.
+"""
+
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# name -> (table, column)
+GROUP_COUNTS = {
+    'family': ('nist_controls', "family"),
+    'tactic': ('mitre_techniques', "tactic"),
+    'category': ('ai_rmf_mapping', "category"),
+}
+
+# name -> (table, column, low, high, fine bins). Bin width matches the
+# precision of the source values so derived counts are exact; values
+# outside [low, high] are still counted exactly, as outliers.
+HISTOGRAMS = {
+    'fkgl_score': ('nist_controls', "fkgl_score", 0.0, 40.0, 400),
+    'mapping_confidence': ('nist_mitre_mapping', "mapping_confidence", 0.0, 1.0, 100),
+}
+
+TABLES = ('nist_controls', 'mitre_techniques', 'ai_rmf_mapping', 'nist_mitre_mapping')
+
+
+class FixedHistogram:
+    """Counts over fixed equal-width bins, plus the exact extremes
+
+    Each fine bin also keeps the smallest and largest value it has seen,
+    so ``value_range`` and derived edges are the true min/max. Values
+    outside ``[low, high]`` are counted exactly in ``outliers`` instead of
+    being clamped into the end bins.
+    """
+
+    def __init__(self, low, high, bins):
+        self.low = low
+        self.high = high
+        self.width = (high - low) / bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.bin_min = np.full(bins, np.inf)
+        self.bin_max = np.full(bins, -np.inf)
+        self.outliers = Counter()
+
+    def _update(self, values, weights):
+        values = np.asarray(values, dtype=np.float64)
+        weights = np.broadcast_to(np.asarray(weights, dtype=np.int64), values.shape)
+        known = ~np.isnan(values)
+        values, weights = values[known], weights[known]
+
+        inside = (values >= self.low) & (values <= self.high)
+        for value, weight in zip(values[~inside].tolist(), weights[~inside].tolist()):
+            self.outliers[value] += weight
+            if self.outliers[value] <= 0:
+                del self.outliers[value]
+        values, weights = values[inside], weights[inside]
+
+        # Small epsilon keeps values sitting on a bin edge in that bin; ``high`` goes in the last one
+        idx = np.floor((values - self.low) / self.width + 1e-9).astype(np.int64)
+        idx = np.minimum(idx, len(self.counts) - 1)
+        np.add.at(self.counts, idx, weights)
+        added = weights > 0
+        np.minimum.at(self.bin_min, idx[added], values[added])
+        np.maximum.at(self.bin_max, idx[added], values[added])
+        # A removed extreme leaves its bin's bound stale (still inside the bin) until the bin empties
+        empty = self.counts <= 0
+        self.bin_min[empty] = np.inf
+        self.bin_max[empty] = -np.inf
+
+    def add(self, values):
+        self._update(values, 1)
+
+    def remove(self, values):
+        self._update(values, -1)
+
+    def add_counts(self, bins, counts):
+        """Add counts already grouped by fine bin (e.g. aggregated in Cypher)"""
+        self._update(self._values(np.asarray(bins, dtype=np.int64)), counts)
+
+    @property
+    def total(self):
+        return int(self.counts.sum()) + sum(self.outliers.values())
+
+    def _occupied(self):
+        return np.flatnonzero(self.counts)
+
+    def _values(self, bins):
+        # Rounded so a bin's left edge equals the source value it holds
+        return np.round(self.low + bins * self.width, 9)
+
+    def _points(self):
+        """(value, count) per occupied fine bin (its smallest value) and per outlier"""
+        occupied = self._occupied()
+        values = np.concatenate([self.bin_min[occupied], np.fromiter(self.outliers, dtype=np.float64)])
+        counts = np.concatenate([self.counts[occupied], np.fromiter(self.outliers.values(), dtype=np.int64)])
+        return values, counts
+
+    def value_range(self):
+        """(min, max) of the added values, or None when empty"""
+        occupied = self._occupied()
+        if not len(occupied) and not self.outliers:
+            return None
+        lows = [*self.outliers, *self.bin_min[occupied[:1]]]
+        highs = [*self.outliers, *self.bin_max[occupied[-1:]]]
+        return float(min(lows)), float(max(highs))
+
+    def coarse(self, bins=5):
+        """``np.histogram(values, bins)`` equivalent computed from the fine bins
+
+        Edges always match; counts match while every fine bin holds a
+        single distinct value (the bin width is the source precision).
+        """
+        bounds = self.value_range()
+        if bounds is None:
+            return np.zeros(bins, dtype=np.int64), np.linspace(0.0, 1.0, bins + 1)
+        lo, hi = bounds
+        if lo == hi:
+            lo, hi = lo - 0.5, hi + 0.5
+        values, weights = self._points()
+        counts, edges = np.histogram(values, bins=bins, range=(lo, hi), weights=weights)
+        return counts.astype(np.int64), edges
+
+
+class AggregateCube:
+    """Group-by counts, histograms and row counts for one data version"""
+
+    def __init__(self):
+        self.counts = {name: Counter() for name in GROUP_COUNTS}
+        self.histograms = {
+            name: FixedHistogram(low, high, bins)
+            for name, (_, _, low, high, bins) in HISTOGRAMS.items()
+        }
+        self.rows = dict.fromkeys(TABLES, 0)
+
+    @classmethod
+    def build(cls, data):
+        cube = cls()
+        for table in TABLES:
+            cube.append(table, data[table])
+        return cube
+
+    def _apply(self, table, rows, sign):
+        self.rows[table] += sign * len(rows)
+        for name, (source, column) in GROUP_COUNTS.items():
+            if source == table and column in rows:
+                counts = rows[column].value_counts()
+                for key, count in counts.items():
+                    self.counts[name][key] += sign * int(count)
+                    if self.counts[name][key] <= 0:
+                        del self.counts[name][key]
+        for name, (source, column, *_) in HISTOGRAMS.items():
+            if source == table and column in rows:
+                histogram = self.histograms[name]
+                (histogram.add if sign > 0 else histogram.remove)(rows[column].to_numpy())
+
+    def append(self, table, rows):
+        """Fold newly appended rows of ``table`` into the aggregates"""
+        self._apply(table, rows, +1)
+
+    def remove(self, table, rows):
+        """Subtract deleted rows of ``table`` from the aggregates"""
+        self._apply(table, rows, -1)
+
+    # ------------------------------------------------------------------
+    # Serving
+    # ------------------------------------------------------------------
+
+    def row_count(self, table):
+        return self.rows[table]
+
+    def value_counts(self, name):
+        """Counts sorted like ``Series.value_counts()``"""
+        counts = self.counts[name]
+        series = pd.Series(dict(counts), dtype=np.int64)
+        return series.sort_values(ascending=False, kind="stable")
+
+    def categories(self, name):
+        return sorted(self.counts[name])
+
+    @staticmethod
+    def empty_histogram(name):
+        _, _, low, high, bins = HISTOGRAMS[name]
+        return FixedHistogram(low, high, bins)
+
+    def histogram(self, name, bins=5):
+        return self.histograms[name].coarse(bins)
+
+    def value_range(self, name):
+        return self.histograms[name].value_range()
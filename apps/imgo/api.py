@@ -0,0 +1,386 @@
+"""
+Headless HTTP query API
+
+Serves controls, techniques, requirements, mappings, paths, search and
+coverage gaps from the same ``imgo.core.Dataset`` the dashboard uses, so SOC tooling
+does not have to scrape the UI.
+
+- Responses above 1 KiB are gzip-compressed.
+- Every GET carries a weak ``ETag`` derived from the data snapshot hash;
+  ``If-None-Match`` short-circuits to ``304 Not Modified`` before any
+  query work is done.
+- ``POST /batch/*`` endpoints take many control ids per request.
+
+``GET /metrics`` serves request and query timings, cache hit ratios and
+table memory in the Prometheus text format (with ``METRICS_ENABLED=1``).
+
+Handlers are async; CPU-bound query work runs on the thread pool. The
+dataset is loaded and primed (``imgo.warmup.prime``) in the startup hook,
+so uvicorn only accepts connections, ``/health`` included, once it is warm.
+Worker processes share the tables and graph index through the
+memory-mapped snapshot and switch to a newly published version within
+RELOAD_CHECK_SECONDS.
+
+Usage::
+
+    PYTHONPATH=apps uvicorn imgo.api:app --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.middleware.gzip import GZipMiddleware
+from pydantic import BaseModel, Field
+
+from imgo import __version__, config, core, coverage, graph_index, metrics, paging, paths, snapshot, warmup
+
+MAX_PAGE_SIZE = 500
+MAX_BATCH = 500
+RELOAD_CHECK_SECONDS = 2.0
+
+_dataset = None
+_dataset_version = None
+_checked_at = 0.0
+_dataset_lock = threading.Lock()
+
+
+def get_dataset():
+    """Process-wide Dataset, reloaded when a new snapshot version is published
+
+    The swap replaces a single reference, so in-flight requests finish on
+    the version they started with.
+    """
+    global _dataset, _dataset_version, _checked_at
+    now = time.monotonic()
+    if _dataset is not None and now - _checked_at < RELOAD_CHECK_SECONDS:
+        return _dataset
+    with _dataset_lock:
+        _checked_at = now
+        version = snapshot.current_version(config.SNAPSHOT_PATH)
+        if _dataset is None or version != _dataset_version:
+            _dataset = core.Dataset.load()
+            _dataset_version = version
+            _dataset.register_metrics()
+    return _dataset
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Warm this worker's dataset before it serves any request"""
+    await run_in_threadpool(lambda: warmup.prime(get_dataset()))
+    yield
+
+
+app = FastAPI(title="IMGO Query API", version=__version__, lifespan=lifespan)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+
+@app.middleware("http")
+async def etag_middleware(request: Request, call_next):
+    """Tag GET responses with the data version; answer 304 when unchanged"""
+    if request.method != "GET" or request.url.path in ("/health", "/metrics", "/docs", "/openapi.json"):
+        return await call_next(request)
+    dataset = await run_in_threadpool(get_dataset)
+    tag = f'W/"{dataset.version[:16]}"'
+    if tag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={'ETag': tag})
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers['ETag'] = tag
+        response.headers['Cache-Control'] = "no-cache"
+    return response
+
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    """Request latency per route template (``/controls/{control_id}``, not the id)"""
+    if not metrics.registry.enabled:
+        return await call_next(request)
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    name = f"api {request.method} {route.path if route is not None else 'unmatched'}"
+    metrics.registry.observe(name, time.perf_counter() - start)
+    metrics.registry.inc(f"api_responses_{response.status_code // 100}xx")
+    return response
+
+
+# ----------------------------------------------------------------------
+# Request bodies
+# ----------------------------------------------------------------------
+
+class BatchIds(BaseModel):
+    ids: List[str] = Field(..., max_length=MAX_BATCH)
+
+
+class BatchMappings(BaseModel):
+    control_ids: List[str] = Field(..., max_length=MAX_BATCH)
+    min_confidence: float = Field(0.0, ge=0.0, le=1.0)
+    max_confidence: float = Field(1.0, ge=0.0, le=1.0)
+
+
+class BatchPaths(BaseModel):
+    control_ids: List[str] = Field(..., max_length=MAX_BATCH)
+    target: Optional[str] = None
+    k: int = Field(5, ge=1, le=50)
+    max_hops: int = Field(3, ge=1, le=paths.MAX_HOPS)
+    min_confidence: float = Field(0.0, ge=0.0, le=1.0)
+    direction: str = Field("out", pattern="^(out|both)$")
+
+
+# ----------------------------------------------------------------------
+# Helpers
+# ----------------------------------------------------------------------
+
+async def _get_dataset():
+    """``get_dataset`` off the event loop (a reload parses or maps a snapshot)"""
+    return await run_in_threadpool(get_dataset)
+
+
+def _check_graph_query(dataset, source, target=None, kinds=None):
+    """404 for unknown nodes and 400 for unknown relationship types"""
+    for node in (source, target):
+        if node is not None and node not in dataset.index:
+            raise HTTPException(status_code=404, detail=f"Unknown node: {node}")
+    unknown = [k for k in kinds or () if k not in graph_index.EDGE_KINDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown relationship type: {', '.join(unknown)} (known: {', '.join(graph_index.EDGE_KINDS)})",
+        )
+
+def _page_payload(dataset, result):
+    return {
+        'data_version': dataset.version,
+        'total': result['total'],
+        'page': result['page'],
+        'pages': result['pages'],
+        'items': core.to_records(result['rows']),
+    }
+
+
+async def _browse(name, equals, ranges, ids, sort, descending, page, page_size):
+    dataset = await _get_dataset()
+    try:
+        result = await run_in_threadpool(
+            dataset.browse, name,
+            equals={k: v for k, v in equals.items() if v is not None},
+            ranges=ranges, ids=ids, sort_by=sort, ascending=not descending,
+            page=page, page_size=page_size,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _page_payload(dataset, result)
+
+
+async def _record(name, key):
+    dataset = await _get_dataset()
+    record = await run_in_threadpool(dataset.record, name, key)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Unknown id: {key}")
+    return record
+
+
+# ----------------------------------------------------------------------
+# Endpoints
+# ----------------------------------------------------------------------
+
+@app.get("/health")
+async def health():
+    dataset = await _get_dataset()
+    return {'status': "ok", 'version': __version__, 'data_version': dataset.version}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    await _get_dataset()  # registers the dataset gauges on first use
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/controls")
+async def list_controls(family: Optional[str] = None,
+                        fkgl_min: Optional[float] = None, fkgl_max: Optional[float] = None,
+                        ids: Optional[List[str]] = Query(None),
+                        sort: Optional[str] = None, descending: bool = False,
+                        page: int = Query(1, ge=1),
+                        page_size: int = Query(paging.PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    ranges = None
+    if fkgl_min is not None or fkgl_max is not None:
+        ranges = {'fkgl_score': (float("-inf") if fkgl_min is None else fkgl_min,
+                                 float("inf") if fkgl_max is None else fkgl_max)}
+    return await _browse("controls", {'family': family}, ranges, ids, sort, descending, page, page_size)
+
+
+@app.get("/controls/{control_id}")
+async def get_control(control_id: str):
+    return await _record("controls", control_id)
+
+
+@app.get("/techniques")
+async def list_techniques(tactic: Optional[str] = None,
+                          ids: Optional[List[str]] = Query(None),
+                          sort: Optional[str] = None, descending: bool = False,
+                          page: int = Query(1, ge=1),
+                          page_size: int = Query(paging.PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    return await _browse("techniques", {'tactic': tactic}, None, ids, sort, descending, page, page_size)
+
+
+@app.get("/techniques/{technique_id}")
+async def get_technique(technique_id: str):
+    return await _record("techniques", technique_id)
+
+
+@app.get("/requirements")
+async def list_requirements(category: Optional[str] = None,
+                            ids: Optional[List[str]] = Query(None),
+                            sort: Optional[str] = None, descending: bool = False,
+                            page: int = Query(1, ge=1),
+                            page_size: int = Query(paging.PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    return await _browse("requirements", {'category': category}, None, ids, sort, descending, page, page_size)
+
+
+@app.get("/requirements/{requirement_id}")
+async def get_requirement(requirement_id: str):
+    return await _record("requirements", requirement_id)
+
+
+@app.get("/mappings")
+async def list_mappings(control_id: Optional[str] = None,
+                        min_confidence: float = Query(0.0, ge=0.0, le=1.0),
+                        max_confidence: float = Query(1.0, ge=0.0, le=1.0),
+                        sort: Optional[str] = None, descending: bool = False,
+                        page: int = Query(1, ge=1),
+                        page_size: int = Query(paging.PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    dataset = await _get_dataset()
+    if sort is not None and sort not in dataset.backend.SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort column: {sort}")
+    view = await run_in_threadpool(
+        dataset.backend.relationships_view,
+        control_id=control_id, conf_range=(min_confidence, max_confidence),
+        sort_by=sort, ascending=not descending, page=page, page_size=page_size,
+    )
+    return {
+        'data_version': dataset.version,
+        'total': view['matched'],
+        'page': view['page'],
+        'pages': view['pages'],
+        'items': core.to_records(view['mappings']),
+    }
+
+
+@app.get("/mappings/{control_id}/{technique_id}")
+async def get_mapping(control_id: str, technique_id: str):
+    dataset = await _get_dataset()
+    inference_path = await run_in_threadpool(dataset.backend.mapping_detail, control_id, technique_id)
+    if inference_path is None:
+        raise HTTPException(status_code=404, detail=f"No mapping {control_id} -> {technique_id}")
+    return {'nist_control_id': control_id, 'mitre_technique_id': technique_id,
+            'inference_path': inference_path}
+
+
+@app.get("/paths")
+async def best_paths(source: str, target: Optional[str] = None,
+                     k: int = Query(5, ge=1, le=50),
+                     max_hops: int = Query(3, ge=1, le=paths.MAX_HOPS),
+                     min_confidence: float = Query(0.0, ge=0.0, le=1.0),
+                     direction: str = Query("out", pattern="^(out|both)$"),
+                     kinds: Optional[List[str]] = Query(None)):
+    dataset = await _get_dataset()
+    _check_graph_query(dataset, source, target, kinds)
+    return await run_in_threadpool(
+        dataset.paths, source, target=target, k=k, max_hops=max_hops,
+        min_confidence=min_confidence, direction=direction,
+        kinds=tuple(kinds) if kinds else None,
+    )
+
+
+@app.get("/neighborhood")
+async def neighborhood(source: str,
+                       max_hops: int = Query(2, ge=1, le=paths.MAX_HOPS),
+                       min_confidence: float = Query(0.0, ge=0.0, le=1.0),
+                       direction: str = Query("out", pattern="^(out|both)$"),
+                       kinds: Optional[List[str]] = Query(None)):
+    dataset = await _get_dataset()
+    _check_graph_query(dataset, source, kinds=kinds)
+    return await run_in_threadpool(
+        dataset.neighborhood, source, max_hops=max_hops,
+        min_confidence=min_confidence, direction=direction,
+        kinds=tuple(kinds) if kinds else None,
+    )
+
+
+@app.get("/gaps")
+async def gaps(min_confidence: float = Query(coverage.DEFAULT_MIN_CONFIDENCE, ge=0.0, le=1.0),
+               tactic: Optional[str] = None):
+    dataset = await _get_dataset()
+    result = await run_in_threadpool(dataset.gaps, min_confidence=min_confidence, tactic=tactic)
+    return {'data_version': dataset.version, **result}
+
+
+@app.get("/coverage/matrix")
+async def coverage_matrix(min_confidence: float = Query(coverage.DEFAULT_MIN_CONFIDENCE, ge=0.0, le=1.0),
+                          distinct_techniques: bool = False):
+    dataset = await _get_dataset()
+    matrix = await run_in_threadpool(
+        dataset.coverage.family_tactic, min_confidence=min_confidence,
+        distinct_techniques=distinct_techniques,
+    )
+    return {
+        'data_version': dataset.version,
+        'families': matrix.index.tolist(),
+        'tactics': matrix.columns.tolist(),
+        'counts': matrix.to_numpy().tolist(),
+    }
+
+
+@app.get("/search")
+async def search(q: str = Query(..., min_length=1),
+                 k: int = Query(10, ge=1, le=100),
+                 kind: Optional[List[str]] = Query(None)):
+    dataset = await _get_dataset()
+    hits = await run_in_threadpool(dataset.search, q, k, kind)
+    return {'data_version': dataset.version, 'query': q, 'hits': hits}
+
+
+@app.post("/batch/controls")
+async def batch_controls(body: BatchIds):
+    dataset = await _get_dataset()
+    found = await run_in_threadpool(lambda: {i: dataset.record("controls", i) for i in dict.fromkeys(body.ids)})
+    return {
+        'data_version': dataset.version,
+        'items': {i: r for i, r in found.items() if r is not None},
+        'missing': [i for i, r in found.items() if r is None],
+    }
+
+
+@app.post("/batch/mappings")
+async def batch_mappings(body: BatchMappings):
+    dataset = await _get_dataset()
+    items = await run_in_threadpool(
+        dataset.mappings_for, list(dict.fromkeys(body.control_ids)),
+        (body.min_confidence, body.max_confidence),
+    )
+    return {'data_version': dataset.version, 'items': items}
+
+
+@app.post("/batch/paths")
+async def batch_paths(body: BatchPaths):
+    dataset = await _get_dataset()
+    if body.target is not None and body.target not in dataset.index:
+        raise HTTPException(status_code=404, detail=f"Unknown node: {body.target}")
+
+    def run():
+        return {
+            source: dataset.paths(
+                source, target=body.target, k=body.k, max_hops=body.max_hops,
+                min_confidence=body.min_confidence, direction=body.direction,
+            )
+            for source in dict.fromkeys(body.control_ids)
+        }
+
+    return {'data_version': dataset.version, 'items': await run_in_threadpool(run)}
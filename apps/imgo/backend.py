@@ -0,0 +1,286 @@
+"""
+Pluggable graph backends for the dashboard views
+
+Each view asks its backend for everything it renders in one call, so a
+render costs a single round-trip regardless of how many widgets it has.
+
+- ``SnapshotBackend`` answers from the local snapshot tables and the
+  in-memory ``GraphIndex``.
+- ``Neo4jBackend`` runs ``integration_test.cypher``-style parameterized
+  statements through a pooled driver, opening a short-lived session per
+  call (the driver pools the connections underneath).
+
+The backend is chosen with ``GRAPH_BACKEND`` (``snapshot`` or ``neo4j``).
+Every call is timed; ``backend.latency.snapshot()`` exports the figures.
+"""
+
+import functools
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from imgo import config, metrics, paging
+from imgo.aggregates import HISTOGRAMS, AggregateCube
+
+logger = logging.getLogger(__name__)
+
+MAPPING_COLUMNS = ['nist_control_id', 'mitre_technique_id', 'mapping_confidence']
+SUPPORT_COLUMNS = ['source', 'target', 'relationship', 'bfo_type', 'confidence']
+
+
+class LatencyRecorder:
+    """Per-call latency statistics (count, total, max, last) in seconds"""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            stats = self._stats.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+            stats['count'] += 1
+            stats['total'] += seconds
+            stats['max'] = max(stats['max'], seconds)
+            stats['last'] = seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: dict(stats, mean=stats['total'] / stats['count'])
+                for name, stats in self._stats.items()
+            }
+
+
+def timed(method):
+    """Record the wall-clock latency of a backend call"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            self.latency.record(f"{self.name}.{method.__name__}", seconds)
+            if metrics.registry.enabled:
+                metrics.registry.observe(f"backend.{self.name}.{method.__name__}", seconds)
+    return wrapper
+
+
+class GraphBackend:
+    """Interface shared by all backends"""
+
+    name = "base"
+    SORT_COLUMNS = tuple(MAPPING_COLUMNS)
+
+    def __init__(self):
+        self.latency = LatencyRecorder()
+
+    def relationships_view(self, control_id=None, conf_range=(0.0, 1.0),
+                           sort_by=None, ascending=True, page=1, page_size=paging.PAGE_SIZE):
+        """Everything the NIST-MITRE view renders
+
+        Returns ``{'controls': [...], 'mappings': DataFrame, 'matched': int,
+        'page': int, 'pages': int, 'total': int, 'confidence_histogram':
+        (counts, edges)}``. ``mappings`` holds one sorted page of the
+        matching rows without ``inference_path``; ``controls`` are the
+        filter options and the histogram feeds the distribution chart.
+        """
+        raise NotImplementedError
+
+    def mapping_detail(self, control_id, technique_id):
+        """``inference_path`` of one mapping, fetched when a row is expanded"""
+        raise NotImplementedError
+
+    def supporting_mappings(self, control_ids, technique_ids):
+        """MITIGATES edges between the given controls and techniques"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SnapshotBackend(GraphBackend):
+    """Answers view queries from the loaded tables and the graph index"""
+
+    name = "snapshot"
+
+    def __init__(self, data, index, aggregates=None):
+        super().__init__()
+        self.mapping = paging.TableView(data['nist_mitre_mapping'])
+        self.index = index
+        self.aggregates = aggregates or AggregateCube.build(data)
+
+    @timed
+    def relationships_view(self, control_id=None, conf_range=(0.0, 1.0),
+                           sort_by=None, ascending=True, page=1, page_size=paging.PAGE_SIZE):
+        index = self.index
+        if control_id is not None:
+            edges = index.out_edges(control_id, kind="MITIGATES", conf_range=conf_range)
+        else:
+            edges = index.edges_in_range(conf_range[0], conf_range[1], kind="MITIGATES")
+        result = self.mapping.page(index.edge_rows(edges), sort_by, ascending, page, page_size)
+        return {
+            'controls': sorted(index.sources("MITIGATES")),
+            'mappings': result['rows'],
+            'matched': result['total'],
+            'page': result['page'],
+            'pages': result['pages'],
+            'total': self.aggregates.row_count('nist_mitre_mapping'),
+            'confidence_histogram': self.aggregates.histogram('mapping_confidence'),
+        }
+
+    @timed
+    def mapping_detail(self, control_id, technique_id):
+        rows = self.mapping.select(equals={'nist_control_id': control_id,
+                                           'mitre_technique_id': technique_id})
+        return self.mapping.detail(rows[0])['inference_path'] if len(rows) else None
+
+    @timed
+    def supporting_mappings(self, control_ids, technique_ids):
+        technique_ids = set(technique_ids)
+        records = [
+            record
+            for control in control_ids
+            for record in self.index.edge_records(self.index.out_edges(control, kind="MITIGATES"))
+            if record['target'] in technique_ids
+        ]
+        return pd.DataFrame(records, columns=SUPPORT_COLUMNS)
+
+
+class Neo4jBackend(GraphBackend):
+    """Runs parameterized Cypher through a pooled driver"""
+
+    name = "neo4j"
+
+    RELATIONSHIPS_VIEW = """
+    CALL {
+      MATCH (c:NISTControl)-[:MITIGATES]->(:MITRETechnique)
+      RETURN collect(DISTINCT c.control_id) AS controls
+    }
+    CALL {
+      MATCH (:NISTControl)-[r:MITIGATES]->(:MITRETechnique)
+      WITH toInteger(floor(r.confidence * $confidence_bins + 1e-9)) AS bin, count(*) AS n
+      RETURN collect([bin, n]) AS confidence_bins
+    }
+    CALL {
+      MATCH (c:NISTControl:InformationContentEntity)
+            -[r:MITIGATES {bfo_type: "realized_in"}]->
+            (t:MITRETechnique:Process)
+      WHERE ($control_id IS NULL OR c.control_id = $control_id)
+        AND r.confidence >= $min_confidence AND r.confidence <= $max_confidence
+      WITH c, r, t ORDER BY {order}
+      WITH collect({
+        nist_control_id: c.control_id,
+        mitre_technique_id: t.technique_id,
+        mapping_confidence: r.confidence
+      }) AS rows
+      RETURN size(rows) AS matched, rows[$offset..$offset + $limit] AS mappings
+    }
+    RETURN controls, confidence_bins, matched, mappings
+    """
+
+    # Sortable columns -> Cypher expressions (never interpolate user input)
+    SORT_KEYS = {
+        'nist_control_id': "c.control_id",
+        'mitre_technique_id': "t.technique_id",
+        'mapping_confidence': "r.confidence",
+    }
+
+    MAPPING_DETAIL = """
+    MATCH (c:NISTControl {control_id: $control_id})-[r:MITIGATES]->
+          (t:MITRETechnique {technique_id: $technique_id})
+    RETURN r.inference_path AS inference_path
+    LIMIT 1
+    """
+
+    SUPPORTING_MAPPINGS = """
+    MATCH (c:NISTControl:InformationContentEntity)
+          -[r:MITIGATES {bfo_type: "realized_in"}]->
+          (t:MITRETechnique:Process)
+    WHERE c.control_id IN $control_ids AND t.technique_id IN $technique_ids
+    RETURN c.control_id AS source, t.technique_id AS target,
+           type(r) AS relationship, r.bfo_type AS bfo_type, r.confidence AS confidence
+    """
+
+    def __init__(self, driver, database=None):
+        super().__init__()
+        self.driver = driver
+        self.database = database
+
+    def _read(self, statement, **params):
+        """Run a read statement in a session that is closed when it returns"""
+        def work(tx):
+            return tx.run(statement, **params).data()
+        with self.driver.session(database=self.database) as session:
+            return session.execute_read(work)
+
+    @timed
+    def relationships_view(self, control_id=None, conf_range=(0.0, 1.0),
+                           sort_by=None, ascending=True, page=1, page_size=paging.PAGE_SIZE):
+        if sort_by is None:
+            order = "c.control_id, t.technique_id"
+        else:
+            order = f"{self.SORT_KEYS[sort_by]} {'ASC' if ascending else 'DESC'}"
+        params = dict(
+            control_id=control_id,
+            min_confidence=float(conf_range[0]),
+            max_confidence=float(conf_range[1]),
+            confidence_bins=HISTOGRAMS['mapping_confidence'][4],
+            limit=page_size,
+        )
+        statement = self.RELATIONSHIPS_VIEW.replace("{order}", order)
+        page = max(int(page), 1)
+        records = self._read(statement, offset=(page - 1) * page_size, **params)
+        record = records[0] if records else {}
+        matched = int(record.get('matched') or 0)
+        clamped, pages, start, _ = paging.window(matched, page, page_size)
+        # A page past the end (filters narrowed) costs one more round-trip
+        if clamped != page:
+            records = self._read(statement, offset=start, **params)
+            record = records[0] if records else {}
+        # Fine bins are counted server-side; only O(bins) values come back
+        histogram = AggregateCube.empty_histogram('mapping_confidence')
+        bins = np.asarray(record.get('confidence_bins') or [], dtype=np.int64).reshape(-1, 2)
+        histogram.add_counts(bins[:, 0], bins[:, 1])
+        return {
+            'controls': sorted(record.get('controls') or []),
+            'mappings': pd.DataFrame(record.get('mappings') or [], columns=MAPPING_COLUMNS),
+            'matched': matched,
+            'page': clamped,
+            'pages': pages,
+            'total': histogram.total,
+            'confidence_histogram': histogram.coarse(),
+        }
+
+    @timed
+    def mapping_detail(self, control_id, technique_id):
+        records = self._read(self.MAPPING_DETAIL, control_id=control_id, technique_id=technique_id)
+        return records[0]['inference_path'] if records else None
+
+    @timed
+    def supporting_mappings(self, control_ids, technique_ids):
+        records = self._read(
+            self.SUPPORTING_MAPPINGS,
+            control_ids=list(control_ids),
+            technique_ids=list(technique_ids),
+        )
+        return pd.DataFrame(records, columns=SUPPORT_COLUMNS)
+
+    def close(self):
+        self.driver.close()
+
+
+def create_backend(data, index, kind=None, aggregates=None):
+    """Backend selected by ``kind`` (default: the GRAPH_BACKEND setting)"""
+    kind = (kind or config.GRAPH_BACKEND).lower()
+    if kind == "snapshot":
+        return SnapshotBackend(data, index, aggregates)
+    if kind == "neo4j":
+        from imgo.neo4j_loader import connect
+        driver = connect()
+        driver.verify_connectivity()
+        return Neo4jBackend(driver, database=config.NEO4J_DATABASE)
+    raise ValueError(f"Unknown graph backend: {kind}")
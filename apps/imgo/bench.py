@@ -0,0 +1,348 @@
+"""
+Benchmark suite for the data-access hot paths
+
+Generates synthetic datasets (``imgo.synthetic``) at one or more scales
+and times the work behind a dashboard rerun:
+
+- ``load_csv`` / ``build_snapshot`` / ``load_snapshot``: ``load_data``
+  from the CSV sources, compiling the snapshot, loading the snapshot
+- ``filter_controls`` / ``filter_mappings``: server-side filter, sort and
+  page of the controls table and the NIST-MITRE view
+- ``aggregates_build`` / ``histograms``: the aggregate cube and the
+  overview counts and histograms read from it
+- ``best_paths`` / ``k_hop``: path queries from a fixed set of controls
+- ``search``: hybrid search queries
+- ``coverage``: coverage matrices built from the tables plus the gap
+  queries (uncovered techniques, unbacked requirements, redundant controls)
+- ``bfo_verify``: a full BFO integrity verification
+- ``residual_risk``: scoring the synthetic system inventory
+- ``export_csv`` / ``export_jsonl`` / ``export_parquet`` / ``export_stix``:
+  streaming the full graph (every edge; with STIX every node too), reported
+  with rows/s
+- ``render_prep``: overview figures serialized to JSON plus a table page
+  converted to Arrow (what ``st.plotly_chart``/``st.dataframe`` send)
+- ``network_figure``: the WebGL mitigation network, built and serialized
+- ``cold_start``: time-to-healthy of a fresh API server on the prebuilt
+  snapshot, from process launch until ``/health`` answers (imports, table
+  load and the in-process warm-up of every derived structure)
+
+``render_prep`` and ``export_parquet`` need ``pyarrow`` and are skipped
+when it is not installed.
+
+Each run appends one JSON line per scale (commit, timestamp, per-case
+timings in ms) to the history file and compares medians against the
+previous run at the same scale; cases slower by more than
+``--threshold`` are reported as regressions, as is a ``cold_start``
+median over ``--startup-budget-ms``.
+
+Usage::
+
+    python -m imgo.bench --scale 1 --scale 10 --rounds 5
+    python -m imgo.bench --scale 1 --fail-on-regression    # CI gate
+    python -m imgo.bench --case cold_start --startup-budget-ms 2000
+"""
+
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from imgo import aggregates, backend, bfo_verify, core, coverage, export, figures, paging, paths, risk, snapshot
+from imgo import synthetic
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILE = Path("benchmarks/history.jsonl")
+DEFAULT_ROUNDS = 5
+DEFAULT_THRESHOLD = 0.2  # 20% slower than the previous run
+STARTUP_BUDGET_MS = 3000  # cold_start, process launch to a healthy, fully warm server
+APPS_DIR = Path(__file__).resolve().parents[1]
+PATH_SOURCES = 20
+ARROW_CASES = ('render_prep', 'export_parquet')  # need pyarrow
+SEARCH_QUERIES = ["supply chain compromise", "account management", "audit log integrity"]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_case(fn, rounds=DEFAULT_ROUNDS, warmup=1):
+    """Run ``fn`` ``warmup + rounds`` times; timings (ms) of the measured rounds"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'stdev_ms': round(statistics.stdev(timings), 3) if len(timings) > 1 else 0.0,
+        'rounds': rounds,
+    }
+
+
+# ------------------------------------------------------------------
+# Cases
+# ------------------------------------------------------------------
+
+def _render_prep(dataset, cube):
+    import pyarrow as pa
+
+    overview = [
+        figures.category_pie(cube.value_counts('family'), "family"),
+        figures.category_bar(cube.value_counts('tactic'), "tactic", "Tactic"),
+        figures.histogram_bar(*cube.histogram('fkgl_score', bins=5), "fkgl", "FKGL", '#1f77b4'),
+    ]
+    for fig in overview:
+        fig.to_json(validate=False)
+    view = dataset.views['controls']
+    page = view.page(view.select(), sort_by='fkgl_score')
+    pa.Table.from_pandas(page['rows'])
+
+
+def _coverage(tables):
+    analysis = coverage.Coverage(tables)
+    analysis.family_tactic()
+    analysis.uncovered_techniques()
+    analysis.uncovered_requirements()
+    analysis.redundant_controls()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _cold_start(data_path, snapshot_path, timeout=60.0):
+    env = dict(os.environ, QUERY_CACHE_PATH="", GRAPH_BACKEND="snapshot",
+               SAMPLE_DATA_PATH=str(data_path), SNAPSHOT_PATH=str(snapshot_path))
+    env['PYTHONPATH'] = os.pathsep.join(p for p in (str(APPS_DIR), env.get('PYTHONPATH')) if p)
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "imgo.api:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"API server exited with {server.returncode} before becoming healthy")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"API server not healthy after {timeout:.0f}s")
+            time.sleep(0.01)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def cases(data_path, snapshot_path):
+    """Benchmark name -> zero-argument callable, sharing one loaded dataset"""
+    snapshot.build_snapshot(data_path, snapshot_path, force=True)
+    dataset = core.Dataset.load(data_path, snapshot_path, backend_kind="snapshot")
+    tables = dataset.tables
+    cube = dataset.aggregates
+    view = dataset.views['controls']
+    graph = backend.SnapshotBackend(tables, dataset.index, cube)
+    engine = paths.PathEngine(dataset.index)
+    sources = sorted(tables['nist_mitre_mapping']['nist_control_id'].unique())
+    sources = [sources[i] for i in np.linspace(0, len(sources) - 1, PATH_SOURCES).astype(int)]
+    family = cube.value_counts('family').index[0]
+    dataset.search_index  # built outside the timed region
+    risk_model = risk.RiskModel(coverage.Coverage(tables))
+    inventory = risk.load_inventory(Path(data_path) / risk.INVENTORY_FILE)
+
+    return {
+        'load_csv': lambda: snapshot.read_sources(data_path),
+        'build_snapshot': lambda: snapshot.build_snapshot(data_path, snapshot_path, force=True),
+        'load_snapshot': lambda: snapshot.load_tables(data_path, snapshot_path),
+        'filter_controls': lambda: view.page(
+            view.select(equals={'family': family}, ranges={'fkgl_score': (15.0, 25.0)}),
+            sort_by='fkgl_score', ascending=False, page=2,
+        ),
+        'filter_mappings': lambda: graph.relationships_view(
+            conf_range=(0.8, 1.0), sort_by='mapping_confidence', ascending=False, page=3,
+            page_size=paging.PAGE_SIZE,
+        ),
+        'aggregates_build': lambda: aggregates.AggregateCube.build(tables),
+        'histograms': lambda: (
+            cube.histogram('fkgl_score'), cube.histogram('mapping_confidence'),
+            cube.value_counts('family'), cube.value_counts('tactic'),
+        ),
+        'best_paths': lambda: [engine.best_paths(s, k=5, max_hops=3) for s in sources],
+        'k_hop': lambda: [engine.k_hop(s, max_hops=2) for s in sources],
+        'search': lambda: [dataset.search(q, k=10) for q in SEARCH_QUERIES],
+        'coverage': lambda: _coverage(tables),
+        'bfo_verify': lambda: bfo_verify.verify(dataset),
+        'residual_risk': lambda: risk.score(risk_model, inventory),
+        'render_prep': lambda: _render_prep(dataset, cube),
+        'network_figure': lambda: figures.network(dataset.index, tables).to_json(validate=False),
+        'cold_start': lambda: _cold_start(data_path, snapshot_path),
+        **{f"export_{fmt}": _export(tables, fmt) for fmt in export.FORMATS},
+    }
+
+
+def _export(tables, fmt):
+    # Chunks are consumed and dropped, as when streaming to a file
+    return lambda: sum(len(chunk) for chunk in export.graph_export(tables, fmt))
+
+
+def run_scale(scale, rounds=DEFAULT_ROUNDS, seed=0, workdir=None, only=None):
+    """Generate a dataset at ``scale`` and time every case on it"""
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        data_path = Path(tmp) / "data"
+        start = time.perf_counter()
+        counts = synthetic.generate(data_path, scale=scale, seed=seed)
+        logger.info("Generated scale %s dataset in %.1fs", scale, time.perf_counter() - start)
+
+        results = {}
+        arrow = importlib.util.find_spec("pyarrow") is not None
+        for name, fn in cases(data_path, Path(tmp) / "snapshot").items():
+            if only and name not in only:
+                continue
+            if name in ARROW_CASES and not arrow:
+                logger.info("  %-16s skipped (pyarrow not installed)", name)
+                continue
+            results[name] = time_case(fn, rounds=rounds)
+            if name.startswith("export_"):
+                edges = counts['nist_mitre_mapping'] + counts['relationships']
+                results[name]['rows_per_s'] = round(edges / results[name]['median_ms'] * 1000)
+            logger.info("  %-16s %10.2f ms", name, results[name]['median_ms'])
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'scale': scale,
+        'seed': seed,
+        'rows': counts,
+        'cases': results,
+    }
+
+
+# ------------------------------------------------------------------
+# History
+# ------------------------------------------------------------------
+
+def load_history(path=HISTORY_FILE):
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(record, path=HISTORY_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def compare(record, history, threshold=DEFAULT_THRESHOLD):
+    """Per-case change against the latest earlier run of that case at the same scale and seed"""
+    previous = [r for r in history if r['scale'] == record['scale'] and r.get('seed') == record['seed']]
+    if not previous:
+        return None, []
+    baseline = previous[-1]
+    changes = []
+    for name, stats in record['cases'].items():
+        before = next((r['cases'][name] for r in reversed(previous) if name in r['cases']), None)
+        if before is None or before['median_ms'] <= 0:
+            continue
+        ratio = stats['median_ms'] / before['median_ms']
+        changes.append({
+            'case': name,
+            'before_ms': before['median_ms'],
+            'after_ms': stats['median_ms'],
+            'change': round(ratio - 1, 4),
+            'regression': ratio > 1 + threshold,
+        })
+    return baseline, changes
+
+
+def over_budget(record, budget_ms=STARTUP_BUDGET_MS):
+    """Whether the run's cold start exceeded the startup budget"""
+    stats = record['cases'].get('cold_start')
+    return stats is not None and stats['median_ms'] > budget_ms
+
+
+def format_record(record, baseline, changes, budget_ms=STARTUP_BUDGET_MS):
+    lines = [f"Scale {record['scale']} ({', '.join(f'{k} {v:,}' for k, v in record['rows'].items())})"]
+    by_case = {c['case']: c for c in changes}
+    for name, stats in record['cases'].items():
+        line = f"  {name:<16} {stats['median_ms']:>10.2f} ms (min {stats['min_ms']:.2f})"
+        change = by_case.get(name)
+        if change is not None:
+            line += f"  {change['change']:+.1%}" + ("  REGRESSION" if change['regression'] else "")
+        if 'rows_per_s' in stats:
+            line += f"  {stats['rows_per_s']:,} rows/s"
+        if name == 'cold_start':
+            line += f"  budget {budget_ms:.0f} ms" + ("  OVER BUDGET" if over_budget(record, budget_ms) else "")
+        lines.append(line)
+    if baseline is not None:
+        lines.append(f"  compared with {baseline.get('commit') or 'unknown'} ({baseline['timestamp']})")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark IMGO data access on synthetic datasets")
+    parser.add_argument("--scale", type=float, action="append", help="dataset scale (repeatable; default 1)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="measured rounds per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--case", action="append", help="only run these cases (repeatable)")
+    parser.add_argument("--history", default=str(HISTORY_FILE), help="JSON lines results history")
+    parser.add_argument("--no-save", action="store_true", help="do not append this run to the history")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown reported as a regression")
+    parser.add_argument("--startup-budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                        help="cold_start median above this counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 on any regression")
+    parser.add_argument("--workdir", help="directory for the generated datasets (default: system temp)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    history = load_history(args.history)
+    regressions = 0
+    for scale in args.scale or [1.0]:
+        record = run_scale(scale, rounds=args.rounds, seed=args.seed, workdir=args.workdir, only=args.case)
+        baseline, changes = compare(record, history, args.threshold)
+        print(format_record(record, baseline, changes, args.startup_budget_ms))
+        regressions += sum(c['regression'] for c in changes) + over_budget(record, args.startup_budget_ms)
+        if not args.no_save:
+            append_history(record, args.history)
+            history.append(record)
+    if regressions and args.fail_on_regression:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
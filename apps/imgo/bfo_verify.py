@@ -0,0 +1,438 @@
+"""
+In-process BFO integrity verifier
+
+Runs the checks of ``neo4j_bfo/03_verify_bfo_integration.cypher`` and
+``neo4j_bfo/integration_test.cypher`` over the local tables and graph
+index instead of full-graph Cypher scans, so they run in CI without a
+database:
+
+- ``node_label``: every node row carries its table's domain label, which
+  maps to BFO upper classes (``neo4j_loader.BFO_LABELS``)
+- ``edge_type``: every relationship type has a ``bfo_type``
+  (``graph_index.BFO_TYPES``), and an exported ``bfo_type`` column agrees
+  with it
+- ``confidence``: mapping confidences are within [0, 1]
+- ``unique_ids``: ``control_id`` / ``technique_id`` / ``requirement_id``
+  are unique within their table and across tables (``entity_id``)
+- ``edge_endpoints``: both endpoints exist and their upper classes fit
+  the ``bfo_type`` (``realized_in``: Continuant -> Occurrent, ``is_about``
+  from a Continuant, ``participates_in`` into an Occurrent)
+- ``index``: the graph index has the tables' nodes, labels and edges
+- ``consensus``: with an ``imgo.consensus`` output, every consensus pair
+  is an existing, unique MITIGATES mapping with ``consensus_confidence``
+  in [0, 100]
+
+Every check is a vectorized pass over whole columns. Row-level checks
+keep a violation mask per table; after a delta (``Verifier.update``)
+only inserted and updated rows are re-checked and the masks of the
+other rows are carried over through the delta's row map. The masks are
+saved next to the snapshot version (``STATE_FILE``), so ``imgo.delta``
+can re-verify a release without a full pass.
+
+Usage::
+
+    python -m imgo.bfo_verify
+    python -m imgo.bfo_verify --consensus consensus.csv --expected-consensus 1567 --json
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from imgo import config, core, delta, graph_index, neo4j_loader
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "bfo_verify.json"
+EXAMPLE_LIMIT = 10
+
+# Domain label -> BFO upper class
+UPPER_CLASSES = {
+    label: "Occurrent" if "Occurrent" in labels else "Continuant"
+    for label, labels in neo4j_loader.BFO_LABELS.items()
+}
+# bfo_type -> (allowed source classes, allowed target classes); None: any
+ENDPOINT_CLASSES = {
+    "realized_in": ({"Continuant"}, {"Occurrent"}),
+    "is_about": ({"Continuant"}, None),
+    "participates_in": (None, {"Occurrent"}),
+}
+
+# Node tables: table, id column, domain label, key property (schema.cypher)
+NODE_TABLES = [
+    (table, id_column, label, key)
+    for table, label, key, id_column, _ in neo4j_loader.NODE_SOURCES
+]
+# Edge tables: table, source column, target column, confidence column, fixed relationship type
+EDGE_TABLES = [
+    ('nist_mitre_mapping', "nist_control_id", "mitre_technique_id", "mapping_confidence", "MITIGATES"),
+    ('relationships', "source_id", "target_id", "confidence", None),
+]
+
+
+def row_keys(df, table):
+    """Stable row key strings (``delta.KEY_COLUMNS``), e.g. ``SR-3 | T1195``"""
+    columns = delta.KEY_COLUMNS[table]
+    keys = df[columns[0]].astype(str)
+    for column in columns[1:]:
+        keys = keys + " | " + df[column].astype(str)
+    return keys.to_numpy(dtype=object)
+
+
+def _result(check, table, violations, examples, rows_checked):
+    return {
+        'check': check,
+        'table': table,
+        'passed': bool(violations == 0),
+        'violations': int(violations),
+        'examples': [str(e) for e in examples[:EXAMPLE_LIMIT]],
+        'rows_checked': int(rows_checked),
+    }
+
+
+# ------------------------------------------------------------------
+# Row-level checks (mask of violating rows)
+# ------------------------------------------------------------------
+
+def _node_label(df, table):
+    label = next(label for t, _, label, _ in NODE_TABLES if t == table)
+    if 'label' not in df:
+        return np.zeros(len(df), dtype=bool)  # the label is implied by the table
+    return (df['label'] != label).to_numpy() | ~df['label'].isin(list(UPPER_CLASSES)).to_numpy()
+
+
+def _edge_type(df, table):
+    fixed = next(kind for t, _, _, _, kind in EDGE_TABLES if t == table)
+    kinds = pd.Series(fixed, index=df.index) if fixed else df['relationship']
+    bad = ~kinds.isin(list(graph_index.BFO_TYPES)).to_numpy()
+    if 'bfo_type' in df:
+        bad |= (df['bfo_type'] != kinds.map(graph_index.BFO_TYPES)).to_numpy()
+    return bad
+
+
+def _confidence(df, table):
+    column = next(c for t, _, _, c, _ in EDGE_TABLES if t == table)
+    values = df[column].to_numpy(dtype=np.float64)
+    # Relationships without a confidence default to 1.0 in the graph index
+    missing = np.isnan(values) if table == 'nist_mitre_mapping' else np.zeros(len(values), dtype=bool)
+    return missing | (values < 0.0) | (values > 1.0)
+
+
+ROW_CHECKS = {
+    'node_label': ([t for t, _, _, _ in NODE_TABLES], _node_label),
+    'edge_type': ([t for t, _, _, _, _ in EDGE_TABLES], _edge_type),
+    'confidence': ([t for t, _, _, _, _ in EDGE_TABLES], _confidence),
+}
+
+
+# ------------------------------------------------------------------
+# Global checks (hash joins over all ids)
+# ------------------------------------------------------------------
+
+def _node_classes(tables):
+    """Series entity_id -> upper class over all node tables (first occurrence wins)"""
+    frames = [
+        pd.Series(UPPER_CLASSES[label], index=pd.Index(tables[table][id_column]))
+        for table, id_column, label, _ in NODE_TABLES if table in tables
+    ]
+    classes = pd.concat(frames)
+    return classes[~classes.index.duplicated()]
+
+
+def check_unique_ids(tables):
+    results = []
+    all_ids = []
+    for table, id_column, _, key in NODE_TABLES:
+        ids = tables[table][id_column]
+        duplicated = ids[ids.duplicated()].unique()
+        results.append(_result('unique_ids', f"{table}.{key}", len(duplicated), duplicated, len(ids)))
+        all_ids.append(ids.drop_duplicates())
+    ids = pd.concat(all_ids, ignore_index=True)
+    shared = ids[ids.duplicated()].unique()
+    results.append(_result('unique_ids', "entity_id", len(shared), shared, len(ids)))
+    return results
+
+
+def check_edge_endpoints(tables):
+    classes = _node_classes(tables)
+    results = []
+    for table, src_column, dst_column, _, fixed in EDGE_TABLES:
+        df = tables.get(table)
+        if df is None:
+            continue
+        kinds = pd.Series(fixed, index=df.index) if fixed else df['relationship']
+        bfo_types = kinds.map(graph_index.BFO_TYPES).to_numpy(dtype=object)
+        src = classes.reindex(df[src_column]).to_numpy(dtype=object)
+        dst = classes.reindex(df[dst_column]).to_numpy(dtype=object)
+        bad = pd.isna(src) | pd.isna(dst)
+        for bfo_type, (sources, targets) in ENDPOINT_CLASSES.items():
+            rows = bfo_types == bfo_type
+            if sources is not None:
+                bad |= rows & ~np.isin(src, list(sources))
+            if targets is not None:
+                bad |= rows & ~np.isin(dst, list(targets))
+        examples = [f"{s} -> {d}" for s, d in zip(df[src_column][bad][:EXAMPLE_LIMIT], df[dst_column][bad][:EXAMPLE_LIMIT])]
+        results.append(_result('edge_endpoints', table, bad.sum(), examples, len(df)))
+    return results
+
+
+def check_index(tables, index):
+    """The graph index holds exactly the tables' nodes (with their labels) and edges
+
+    Besides the table nodes, the index may only hold ``Unknown`` placeholders
+    for edge endpoints that no node table defines.
+    """
+    classes = _node_classes(tables)
+    problems = []
+    positions = pd.Index(index.node_ids).get_indexer(classes.index)
+    missing = classes.index[positions < 0]
+    problems += [f"missing node {n}" for n in missing[:EXAMPLE_LIMIT]]
+    found = positions >= 0
+    labels = pd.Series(index.node_labels[positions[found]]).map(UPPER_CLASSES).to_numpy(dtype=object)
+    mislabeled = classes.index[found][labels != classes.to_numpy(dtype=object)[found]]
+    problems += [f"wrong label {n}" for n in mislabeled[:EXAMPLE_LIMIT]]
+    extra = np.ones(index.num_nodes, dtype=bool)
+    extra[positions[found]] = False
+    endpoint = np.zeros(index.num_nodes, dtype=bool)
+    endpoint[index.src] = endpoint[index.dst] = True
+    extra &= ~(endpoint & (index.node_labels == graph_index.UNKNOWN_LABEL))
+    problems += [f"extra node {n}" for n in index.node_ids[extra][:EXAMPLE_LIMIT]]
+    edges = sum(len(tables[t]) for t, _, _, _, _ in EDGE_TABLES if tables.get(t) is not None)
+    if index.num_edges != edges:
+        problems.append(f"{index.num_edges} edges in the index, {edges} in the tables")
+    violations = len(missing) + len(mislabeled) + int(extra.sum()) + (index.num_edges != edges)
+    return [_result('index', "graph", violations, problems, index.num_nodes + index.num_edges)]
+
+
+def check_consensus(tables, consensus, expected=None):
+    mapping = tables['nist_mitre_mapping']
+    keys = pd.MultiIndex.from_frame(mapping[consensus_columns()])
+    pairs = pd.MultiIndex.from_frame(consensus[consensus_columns()])
+    flagged = consensus['is_consensus'].astype(bool).to_numpy()
+
+    orphan = keys.get_indexer(pairs) < 0
+    duplicated = pairs.duplicated()
+    confidence = consensus['consensus_confidence'].to_numpy(dtype=np.float64)
+    out_of_range = np.isnan(confidence) | (confidence < 0) | (confidence > 100)
+    label = lambda mask: [f"{c} -> {t}" for c, t in pairs[mask][:EXAMPLE_LIMIT]]
+    results = [
+        _result('consensus', "pairs_exist", orphan.sum(), label(orphan), len(pairs)),
+        _result('consensus', "pairs_unique", duplicated.sum(), label(duplicated), len(pairs)),
+        _result('consensus', "confidence_range", out_of_range.sum(), label(out_of_range), len(pairs)),
+    ]
+    count = int(flagged.sum())
+    if expected is not None:
+        examples = [f"{count} consensus mappings, expected {expected}"] if count != expected else []
+        results.append(_result('consensus', "count", int(count != expected), examples, len(pairs)))
+    return results
+
+
+def consensus_columns():
+    return list(delta.KEY_COLUMNS['nist_mitre_mapping'])
+
+
+# ------------------------------------------------------------------
+# Counts (03_verify_bfo_integration.cypher tests 1, 2 and 4)
+# ------------------------------------------------------------------
+
+def counts(tables, consensus=None):
+    labels = pd.concat([
+        tables[table]['label'] if 'label' in tables[table] else pd.Series(label, index=tables[table].index)
+        for table, _, label, _ in NODE_TABLES if table in tables
+    ], ignore_index=True)
+    classes = labels.map(UPPER_CLASSES)
+    bfo_types = pd.concat([
+        (pd.Series(fixed, index=tables[table].index) if fixed else tables[table]['relationship'])
+        .map(graph_index.BFO_TYPES)
+        for table, _, _, _, fixed in EDGE_TABLES if tables.get(table) is not None
+    ], ignore_index=True)
+    result = {
+        'nodes': int(len(classes)),
+        'bfo_nodes': int(classes.notna().sum()),
+        'upper_classes': {k: int(v) for k, v in classes.value_counts().items()},
+        'relationships': int(len(bfo_types)),
+        'bfo_relationships': int(bfo_types.notna().sum()),
+        'bfo_types': {k: int(v) for k, v in bfo_types.value_counts().items()},
+    }
+    if consensus is not None:
+        flagged = consensus['is_consensus'].astype(bool)
+        result['consensus'] = int(flagged.sum())
+        result['consensus_avg_confidence'] = round(float(consensus.loc[flagged, 'consensus_confidence'].mean()), 2) \
+            if flagged.any() else None
+    return result
+
+
+# ------------------------------------------------------------------
+# Verifier
+# ------------------------------------------------------------------
+
+class Verifier:
+    """BFO checks for one data version, re-verifiable incrementally after deltas"""
+
+    def __init__(self, tables, index=None, masks=None):
+        start = time.perf_counter()
+        self.tables = tables
+        self.index = index
+        self.rows_checked = {}
+        if masks is None:
+            masks = {}
+            for check, (names, fn) in ROW_CHECKS.items():
+                for table in names:
+                    if tables.get(table) is not None:
+                        masks[(check, table)] = fn(tables[table], table)
+                        self.rows_checked[(check, table)] = len(tables[table])
+        self.masks = masks
+        self.seconds = time.perf_counter() - start
+
+    def update(self, changes, tables, index=None):
+        """Verifier for the tables after ``changes`` (a ``delta.ChangeSet``)
+
+        Row checks run only on inserted and updated rows; the other rows
+        keep their previous result.
+        """
+        start = time.perf_counter()
+        masks = {}
+        rows_checked = {}
+        for (check, table), mask in self.masks.items():
+            fn = ROW_CHECKS[check][1]
+            change = changes.deltas.get(table)
+            if change is None or not change.changed:
+                masks[(check, table)] = mask
+                rows_checked[(check, table)] = 0
+                continue
+            kept = change.row_map >= 0
+            published = np.empty(len(change.order), dtype=bool)
+            published[change.row_map[kept]] = mask[kept]
+            recheck = np.concatenate([change.row_map[change.updated],
+                                      np.arange(int(kept.sum()), len(change.order))]).astype(np.int64)
+            if len(recheck):
+                published[recheck] = fn(tables[table].iloc[recheck], table)
+            masks[(check, table)] = published
+            rows_checked[(check, table)] = len(recheck)
+        verifier = Verifier(tables, index, masks=masks)
+        verifier.rows_checked = rows_checked
+        verifier.seconds = time.perf_counter() - start
+        return verifier
+
+    def report(self, consensus=None, expected_consensus=None):
+        start = time.perf_counter()
+        checks = []
+        for (check, table), mask in self.masks.items():
+            keys = row_keys(self.tables[table].iloc[np.flatnonzero(mask)[:EXAMPLE_LIMIT]], table)
+            checks.append(_result(check, table, mask.sum(), keys,
+                                  self.rows_checked.get((check, table), len(mask))))
+        checks += check_unique_ids(self.tables)
+        checks += check_edge_endpoints(self.tables)
+        if self.index is not None:
+            checks += check_index(self.tables, self.index)
+        if consensus is not None:
+            checks += check_consensus(self.tables, consensus, expected_consensus)
+        return {
+            'data_version': self.tables.get('data_version'),
+            'passed': all(c['passed'] for c in checks),
+            'counts': counts(self.tables, consensus),
+            'checks': checks,
+            'rows_rechecked': sum(self.rows_checked.values()),
+            'seconds': round(self.seconds + time.perf_counter() - start, 4),
+        }
+
+    # ------------------------------------------------------------------
+    # Persist
+    # ------------------------------------------------------------------
+
+    def save(self, version_dir):
+        """Write the violating row keys of each row check next to the snapshot version"""
+        state = {
+            'data_version': self.tables.get('data_version'),
+            'violations': {
+                f"{check}:{table}": row_keys(self.tables[table].iloc[np.flatnonzero(mask)], table).tolist()
+                for (check, table), mask in self.masks.items()
+            },
+        }
+        path = Path(version_dir) / STATE_FILE
+        tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+        tmp.write_text(json.dumps(state))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, tables, index, version_dir):
+        """Verifier restored from ``save`` for these tables, or None if absent or stale"""
+        if version_dir is None:
+            return None
+        try:
+            state = json.loads((Path(version_dir) / STATE_FILE).read_text())
+        except (OSError, ValueError):
+            return None
+        if state.get('data_version') != tables.get('data_version'):
+            return None
+        masks = {}
+        for name, keys in state['violations'].items():
+            check, table = name.split(":", 1)
+            if check not in ROW_CHECKS or tables.get(table) is None:
+                return None
+            masks[(check, table)] = np.isin(row_keys(tables[table], table), keys) if keys \
+                else np.zeros(len(tables[table]), dtype=bool)
+        verifier = cls(tables, index, masks=masks)
+        verifier.rows_checked = {key: 0 for key in masks}
+        return verifier
+
+
+def verify(dataset, consensus=None, expected_consensus=None):
+    """Full verification of a ``core.Dataset``; returns (verifier, report)"""
+    verifier = Verifier(dataset.tables, dataset.index)
+    return verifier, verifier.report(consensus, expected_consensus)
+
+
+def format_report(report):
+    counts_ = report['counts']
+    lines = [
+        f"BFO verification of {str(report['data_version'])[:16]}: {'PASSED' if report['passed'] else 'FAILED'}",
+        f"  nodes: {counts_['bfo_nodes']:,} / {counts_['nodes']:,} BFO-categorized "
+        f"({', '.join(f'{k} {v:,}' for k, v in counts_['upper_classes'].items())})",
+        f"  relationships: {counts_['bfo_relationships']:,} / {counts_['relationships']:,} with bfo_type "
+        f"({', '.join(f'{k} {v:,}' for k, v in counts_['bfo_types'].items())})",
+    ]
+    if 'consensus' in counts_:
+        lines.append(f"  consensus: {counts_['consensus']:,} (avg confidence {counts_['consensus_avg_confidence']})")
+    for check in report['checks']:
+        status = "ok" if check['passed'] else f"{check['violations']} violations"
+        line = f"  {check['check']:<15} {check['table']:<28} {status}"
+        if check['examples']:
+            line += f"  e.g. {', '.join(check['examples'][:3])}"
+        lines.append(line)
+    lines.append(f"  rows re-checked: {report['rows_rechecked']:,}; verified in {report['seconds']:.3f}s")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify BFO integrity of the local snapshot and graph index")
+    parser.add_argument("--data-path", default=str(config.DATA_PATH))
+    parser.add_argument("--snapshot-path", default=str(config.SNAPSHOT_PATH))
+    parser.add_argument("--consensus", help="imgo.consensus output CSV to check")
+    parser.add_argument("--expected-consensus", type=int, help="expected number of consensus mappings")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--report", help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    dataset = core.Dataset.load(args.data_path, args.snapshot_path)
+    consensus = pd.read_csv(args.consensus) if args.consensus else None
+    verifier, report = verify(dataset, consensus, args.expected_consensus)
+    if dataset.version_dir is not None:
+        verifier.save(dataset.version_dir)
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2))
+    if not report['passed']:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Runtime configuration
+
+Settings come from the process environment, optionally seeded from a
+``.env`` file (see ``.env.example``) when python-dotenv is installed.
+"""
+
+import os
+from pathlib import Path
+
+try:
+    from dotenv import load_dotenv
+except ImportError:  # pragma: no cover - python-dotenv is optional
+    load_dotenv = None
+
+if load_dotenv is not None:
+    load_dotenv()
+
+
+def env_str(name, default=None):
+    value = os.environ.get(name)
+    return value if value not in (None, "") else default
+
+
+def env_int(name, default):
+    return int(env_str(name, default))
+
+
+def env_bool(name, default=False):
+    value = env_str(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Data
+DATA_PATH = Path(env_str("SAMPLE_DATA_PATH", "data/sample"))
+SNAPSHOT_PATH = Path(env_str("SNAPSHOT_PATH", "data/snapshot"))
+
+# Graph backend: "snapshot" (local files) or "neo4j"
+GRAPH_BACKEND = env_str("GRAPH_BACKEND", "snapshot")
+
+# Query cache
+QUERY_CACHE_MAX_ENTRIES = env_int("QUERY_CACHE_MAX_ENTRIES", 1024)
+QUERY_CACHE_MAX_MB = env_int("QUERY_CACHE_MAX_MB", 64)
+QUERY_CACHE_PATH = env_str("QUERY_CACHE_PATH")
+
+# Neo4j
+NEO4J_URI = env_str("NEO4J_URI", "bolt://localhost:7687")
+NEO4J_USER = env_str("NEO4J_USER", "neo4j")
+NEO4J_PASSWORD = env_str("NEO4J_PASSWORD", "")
+NEO4J_DATABASE = env_str("NEO4J_DATABASE")
+NEO4J_POOL_SIZE = env_int("NEO4J_POOL_SIZE", 16)
+NEO4J_RETRY_SECONDS = env_int("NEO4J_RETRY_SECONDS", 30)  # first back-off after a failed connect; doubles up to 10x
+
+# Instrumentation (spans are no-ops unless enabled)
+METRICS_ENABLED = env_bool("METRICS_ENABLED", False)
+METRICS_ADMIN = env_bool("METRICS_ADMIN", False)  # Performance page may pause/reset the process-wide counters
+METRICS_PORT = env_int("METRICS_PORT", 0)  # dashboard /metrics exporter; 0 = off
@@ -0,0 +1,377 @@
+"""
+Consensus validation of candidate MITIGATES mappings
+
+Every candidate ``(nist_control_id, mitre_technique_id)`` pair is scored
+by a set of pluggable validators. A pair is a consensus mapping when all
+validators agree. Validators score on their own scales (a judge's
+probability, a cosine), so the pair's ``consensus_confidence`` is the
+share of validators that agree, 0-100: every consensus pair gets 100, as
+in ``neo4j_bfo/00_update_consensus_validation.cypher``.
+
+- Validator calls run concurrently on asyncio, bounded by a semaphore.
+- Verdicts are cached per validator and pair together with a hash of the
+  texts the validator saw (control, technique, inference path), so a
+  re-run after a text edit only re-validates the affected pairs.
+- ``is_consensus`` / ``consensus_confidence`` updates are written as a
+  CSV and, optionally, to Neo4j as parameterized ``UNWIND`` batches. The
+  edge's own ``confidence`` (the 0-1 mapping confidence the loader and
+  the graph backends filter on) is left untouched.
+
+Built-in validators are stand-ins for the two LLM judges the cypher
+script names: ``judge-a`` and ``judge-b`` (the defaults) are
+deterministic stubs with simulated latency. ``similarity`` is an optional
+local model (cosine of the hashed TF-IDF vectors from ``imgo.search``).
+Other validators are given as ``package.module:factory``; the factory is
+called with the ``imgo.core.Dataset`` and returns an object with
+``name``, ``version`` and an async ``validate(pair)`` returning
+``{'agree': bool, 'score': float}``. Each validator's raw score is kept
+in its own ``<name>_score`` output column.
+
+Usage::
+
+    python -m imgo.consensus --validators judge-a judge-b similarity --concurrency 32
+    python -m imgo.consensus --candidates pairs.csv --output consensus.csv --neo4j
+"""
+
+import argparse
+import asyncio
+import hashlib
+import importlib
+import logging
+import os
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from imgo import config, core, neo4j_loader
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VALIDATORS = ("judge-a", "judge-b")
+DEFAULT_CONCURRENCY = 16
+DEFAULT_BATCH_SIZE = 5000
+VERDICT_FILE = "consensus_verdicts.csv"  # kept next to the snapshot
+PAIR_KEY = ['nist_control_id', 'mitre_technique_id']
+
+CONSENSUS_TEMPLATE = """
+UNWIND $rows AS row
+MATCH (c:NISTControl {control_id: row.source})-[r:MITIGATES]->(t:MITRETechnique {technique_id: row.target})
+SET r.is_consensus = row.is_consensus,
+    r.consensus_confidence = row.consensus_confidence,
+    r.mapping_source = row.mapping_source,
+    r.validation_date = datetime()
+"""
+
+
+# ------------------------------------------------------------------
+# Candidate pairs
+# ------------------------------------------------------------------
+
+def candidate_pairs(tables, candidates=None):
+    """Pairs to validate with the texts a validator reads
+
+    Defaults to every row of the mapping table; ``candidates`` (a frame
+    with the two id columns) may name other pairs. Pairs whose control or
+    technique is unknown are dropped.
+    """
+    mapping = tables['nist_mitre_mapping']
+    pairs = mapping if candidates is None else candidates[PAIR_KEY].merge(mapping, on=PAIR_KEY, how="left")
+    pairs = pairs.drop_duplicates(PAIR_KEY)
+
+    controls = tables['nist_controls'].set_index('node_id')
+    techniques = tables['mitre_techniques'].set_index('node_id')
+    pairs = pairs[pairs['nist_control_id'].isin(controls.index)
+                  & pairs['mitre_technique_id'].isin(techniques.index)]
+    control_text = (controls['title'].fillna("") + ". " + controls['description'].fillna("")).rename('control_text')
+    technique_text = (techniques['name'].fillna("") + ". " + techniques['description'].fillna("")).rename('technique_text')
+
+    pairs = pairs.join(control_text, on='nist_control_id').join(technique_text, on='mitre_technique_id')
+    if 'inference_path' not in pairs:
+        pairs['inference_path'] = None
+    if 'mapping_confidence' not in pairs:
+        pairs['mapping_confidence'] = np.nan
+    pairs['text_hash'] = [
+        hashlib.sha1("\x1f".join(map(str, texts)).encode("utf-8")).hexdigest()
+        for texts in zip(pairs['control_text'], pairs['technique_text'], pairs['inference_path'].fillna(""))
+    ]
+    return pairs.reset_index(drop=True)
+
+
+# ------------------------------------------------------------------
+# Validators
+# ------------------------------------------------------------------
+
+class StubJudge:
+    """Deterministic stand-in for an LLM judge
+
+    Scores a pair as its mapping confidence plus a per-judge jitter
+    derived from the pair's text hash, after ``latency`` seconds.
+    """
+
+    version = "1"
+
+    def __init__(self, name, threshold=0.85, jitter=0.06, latency=0.002):
+        self.name = name
+        self.threshold = threshold
+        self.jitter = jitter
+        self.latency = latency
+
+    async def validate(self, pair):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        base = pair['mapping_confidence']
+        base = 0.5 if base is None or base != base else float(base)
+        noise = zlib.crc32(f"{self.name}:{pair['text_hash']}".encode("utf-8")) / 0xFFFFFFFF
+        score = min(max(base + (2 * noise - 1) * self.jitter, 0.0), 1.0)
+        return {'agree': score >= self.threshold, 'score': round(score, 4)}
+
+
+class SimilarityValidator:
+    """Local model: cosine of the control and technique search vectors"""
+
+    name = "similarity"
+    version = "1"
+
+    def __init__(self, search_index, threshold=0.05):
+        self.threshold = threshold
+        self.vectors = search_index.vectors
+        self.rows = {(kind, doc): i for i, (kind, doc) in
+                     enumerate(zip(search_index.doc_kinds, search_index.doc_ids))}
+
+    async def validate(self, pair):
+        a = self.rows.get(("NISTControl", pair['nist_control_id']))
+        b = self.rows.get(("MITRETechnique", pair['mitre_technique_id']))
+        score = 0.0 if a is None or b is None else float(self.vectors[a] @ self.vectors[b])
+        score = min(max(score, 0.0), 1.0)
+        return {'agree': score >= self.threshold, 'score': round(score, 4)}
+
+
+VALIDATORS = {
+    'judge-a': lambda dataset: StubJudge("judge-a"),
+    'judge-b': lambda dataset: StubJudge("judge-b"),
+    'similarity': lambda dataset: SimilarityValidator(dataset.search_index),
+}
+
+
+def load_validator(spec, dataset):
+    """Built-in validator name or ``package.module:factory``"""
+    if spec in VALIDATORS:
+        return VALIDATORS[spec](dataset)
+    module, sep, attr = spec.partition(":")
+    if not sep:
+        raise ValueError(f"Unknown validator: {spec} (built-ins: {', '.join(VALIDATORS)})")
+    return getattr(importlib.import_module(module), attr)(dataset)
+
+
+def _key(validator):
+    return f"{validator.name}@{getattr(validator, 'version', '1')}"
+
+
+# ------------------------------------------------------------------
+# Verdict cache
+# ------------------------------------------------------------------
+
+class VerdictCache:
+    """Verdicts per (validator, control, technique), valid for one text hash"""
+
+    COLUMNS = ['validator', *PAIR_KEY, 'text_hash', 'agree', 'score']
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.entries = {}
+        self.dirty = False
+        if self.path is not None and self.path.exists():
+            df = pd.read_csv(self.path, dtype={'text_hash': str})
+            for v, c, t, h, agree, score in df[self.COLUMNS].itertuples(index=False):
+                self.entries[(v, c, t)] = (h, bool(agree), float(score))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, validator_key, pair):
+        entry = self.entries.get((validator_key, pair['nist_control_id'], pair['mitre_technique_id']))
+        if entry is None or entry[0] != pair['text_hash']:
+            return None
+        return {'agree': entry[1], 'score': entry[2]}
+
+    def put(self, validator_key, pair, verdict):
+        key = (validator_key, pair['nist_control_id'], pair['mitre_technique_id'])
+        self.entries[key] = (pair['text_hash'], bool(verdict['agree']), float(verdict['score']))
+        self.dirty = True
+
+    def save(self):
+        if self.path is None or not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".tmp-{os.getpid()}")
+        rows = [(*key, *entry) for key, entry in self.entries.items()]
+        pd.DataFrame(rows, columns=self.COLUMNS).to_csv(tmp, index=False)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+# ------------------------------------------------------------------
+# Pipeline
+# ------------------------------------------------------------------
+
+async def _run_validators(records, validators, cache, concurrency):
+    """Fill ``verdicts[validator][i]`` from the cache or by calling the validator"""
+    semaphore = asyncio.Semaphore(concurrency)
+    verdicts = {_key(v): [None] * len(records) for v in validators}
+
+    async def call(validator, i):
+        async with semaphore:
+            verdict = await validator.validate(records[i])
+        verdicts[_key(validator)][i] = verdict
+        cache.put(_key(validator), records[i], verdict)
+
+    jobs = []
+    for validator in validators:
+        key = _key(validator)
+        for i, record in enumerate(records):
+            cached = cache.get(key, record)
+            if cached is None:
+                jobs.append(call(validator, i))
+            else:
+                verdicts[key][i] = cached
+    await asyncio.gather(*jobs)
+    return verdicts, len(jobs)
+
+
+def validate(pairs, validators, cache=None, concurrency=DEFAULT_CONCURRENCY):
+    """Consensus per pair; returns (results frame, validator calls made)"""
+    cache = cache if cache is not None else VerdictCache()
+    records = pairs[[*PAIR_KEY, 'mapping_confidence', 'inference_path', 'text_hash']].to_dict('records')
+    hits_before = {_key(v): [cache.get(_key(v), r) is not None for r in records] for v in validators}
+    verdicts, calls = asyncio.run(_run_validators(records, validators, cache, concurrency))
+
+    agree = np.array([[v['agree'] for v in verdicts[_key(val)]] for val in validators], dtype=bool)
+    scores = np.array([[v['score'] for v in verdicts[_key(val)]] for val in validators], dtype=np.float64)
+    cached = np.array([hits_before[_key(v)] for v in validators], dtype=bool)
+
+    results = pairs[PAIR_KEY].copy()
+    results['is_consensus'] = agree.all(axis=0) if len(validators) else False
+    results['consensus_confidence'] = np.rint(agree.mean(axis=0) * 100).astype(np.int64) if len(validators) else 0
+    results['mapping_source'] = "consensus (" + " + ".join(v.name for v in validators) + ")"
+    for validator, validator_scores in zip(validators, scores):
+        results[f"{validator.name}_score"] = validator_scores
+    results['revalidated'] = ~cached.all(axis=0) if len(validators) else False
+    return results, calls
+
+
+def neo4j_batches(results, batch_size=DEFAULT_BATCH_SIZE):
+    """``UNWIND`` row batches for the consensus update statement"""
+    for start in range(0, len(results), batch_size):
+        chunk = results.iloc[start:start + batch_size]
+        yield [
+            {'source': c, 'target': t, 'is_consensus': bool(flag),
+             'consensus_confidence': int(conf), 'mapping_source': src}
+            for c, t, flag, conf, src in chunk[[*PAIR_KEY, 'is_consensus', 'consensus_confidence',
+                                                'mapping_source']].itertuples(index=False)
+        ]
+
+
+def apply_neo4j(driver, results, batch_size=DEFAULT_BATCH_SIZE, database=None):
+    """Write consensus updates to Neo4j; returns (statements, rows) written"""
+    def write(tx, rows):
+        tx.run(CONSENSUS_TEMPLATE, rows=rows).consume()
+
+    statements = rows_written = 0
+    with driver.session(database=database) as session:
+        for rows in neo4j_batches(results, batch_size):
+            session.execute_write(write, rows)
+            statements += 1
+            rows_written += len(rows)
+    return statements, rows_written
+
+
+def run(data_path=None, snapshot_path=None, validators=DEFAULT_VALIDATORS, candidates=None,
+        concurrency=DEFAULT_CONCURRENCY, output=None, emit_all=False, driver=None, database=None):
+    """Validate candidate pairs and emit consensus updates; returns a report"""
+    snapshot_path = Path(snapshot_path or config.SNAPSHOT_PATH)
+    dataset = core.Dataset.load(data_path, snapshot_path)
+    validators = [load_validator(spec, dataset) for spec in validators]
+    pairs = candidate_pairs(dataset.tables, candidates)
+    cache = VerdictCache(snapshot_path / VERDICT_FILE)
+
+    start = time.perf_counter()
+    results, calls = validate(pairs, validators, cache, concurrency)
+    seconds = time.perf_counter() - start
+    cache.save()
+
+    updates = results if emit_all else results[results['revalidated']]
+    report = {
+        'data_version': dataset.version,
+        'validators': [_key(v) for v in validators],
+        'pairs': len(results),
+        'revalidated': int(results['revalidated'].sum()),
+        'validator_calls': calls,
+        'cache_hits': len(results) * len(validators) - calls,
+        'consensus': int(results['is_consensus'].sum()),
+        'consensus_rate': round(float(results['is_consensus'].mean()), 4) if len(results) else 0.0,
+        'updates': len(updates),
+        'seconds': round(seconds, 3),
+        'calls_per_second': round(calls / seconds, 1) if calls and seconds > 0 else None,
+    }
+    if output:
+        results.drop(columns='revalidated').to_csv(output, index=False)
+        report['output'] = str(output)
+    if driver is not None and len(updates):
+        statements, rows = apply_neo4j(driver, updates, database=database)
+        report['neo4j'] = {'statements': statements, 'rows': rows}
+    return report
+
+
+def format_report(report):
+    lines = [
+        f"Validated {report['pairs']} pairs with {', '.join(report['validators'])}",
+        f"  revalidated: {report['revalidated']} pairs ({report['validator_calls']} validator calls,"
+        f" {report['cache_hits']} cache hits) in {report['seconds']:.2f}s"
+        + (f" ({report['calls_per_second']:,.0f} calls/s)" if report['calls_per_second'] else ""),
+        f"  consensus: {report['consensus']} ({report['consensus_rate']:.2%})",
+        f"  updates: {report['updates']}",
+    ]
+    if 'output' in report:
+        lines.append(f"  written: {report['output']}")
+    if 'neo4j' in report:
+        lines.append(f"  neo4j: {report['neo4j']['rows']} rows in {report['neo4j']['statements']} statements")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validate MITIGATES mappings")
+    parser.add_argument("--data-path", default=str(config.DATA_PATH), help="source data directory")
+    parser.add_argument("--snapshot-path", default=str(config.SNAPSHOT_PATH), help="snapshot directory (verdict cache)")
+    parser.add_argument("--validators", nargs="+", default=list(DEFAULT_VALIDATORS),
+                        help="built-in names or package.module:factory")
+    parser.add_argument("--candidates", help="CSV of nist_control_id,mitre_technique_id pairs (default: all mappings)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="validator calls in flight")
+    parser.add_argument("--output", help="write is_consensus/consensus_confidence per pair as CSV")
+    parser.add_argument("--all", dest="emit_all", action="store_true",
+                        help="send every pair to Neo4j, not only re-validated ones")
+    parser.add_argument("--neo4j", action="store_true", help="write the updates to Neo4j")
+    parser.add_argument("--fake-neo4j", action="store_true", help="write to the in-process fake driver")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    candidates = pd.read_csv(args.candidates, dtype=str) if args.candidates else None
+    driver = None
+    if args.fake_neo4j:
+        from imgo.fake_neo4j import FakeDriver
+        driver = FakeDriver()
+    elif args.neo4j:
+        driver = neo4j_loader.connect()
+    try:
+        report = run(args.data_path, args.snapshot_path, args.validators, candidates,
+                     args.concurrency, args.output, args.emit_all, driver, config.NEO4J_DATABASE)
+    finally:
+        if driver is not None:
+            driver.close()
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
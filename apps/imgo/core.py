@@ -0,0 +1,249 @@
+"""
+UI-independent data access core
+
+``Dataset`` bundles everything the dashboard views and the HTTP API
+query for one data version: the tables, graph index, aggregate cube,
+paged table views, search index, graph backend, the cached path engine,
+the coverage / gap analysis and residual-risk scoring. Derived structures are built on first
+use and then shared, so one ``Dataset`` per process serves every session
+or request.
+"""
+
+import logging
+import threading
+import time
+from functools import cached_property
+
+from imgo import aggregates, config, figures, graph_index, metrics, paging, paths, query_cache, risk, search, snapshot
+from imgo import backend as graph_backend
+from imgo import coverage as coverage_analysis
+
+logger = logging.getLogger(__name__)
+
+# Public name -> (table, id column)
+BROWSABLE = {
+    'controls': ('nist_controls', "node_id"),
+    'techniques': ('mitre_techniques', "node_id"),
+    'requirements': ('ai_rmf_mapping', "requirement_id"),
+}
+
+
+def to_records(df):
+    """JSON-ready row dicts (Python scalars, NaN as None)"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+class Dataset:
+    """Tables plus their derived indexes for one data version"""
+
+    def __init__(self, tables, snapshot_path=None, cache=None, backend_kind=None):
+        self.tables = tables
+        self.version = tables['data_version']
+        self.snapshot_path = snapshot_path or config.SNAPSHOT_PATH
+        self.cache = cache
+        self.backend_kind = backend_kind
+        self.backend_error = None
+        self._backend = None
+        self._backend_failures = 0
+        self._backend_retry_at = 0.0
+        self._backend_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, data_path=None, snapshot_path=None, **kwargs):
+        snapshot_path = snapshot_path or config.SNAPSHOT_PATH
+        tables = snapshot.load_tables(data_path or config.DATA_PATH, snapshot_path)
+        return cls(tables, snapshot_path=snapshot_path, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Derived structures (built once, on first use)
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def version_dir(self):
+        """Snapshot directory these tables came from, if it is fresh"""
+        return snapshot.fresh_version_dir(self.snapshot_path, self.version)
+
+    @cached_property
+    @metrics.timed("core.build.index")
+    def index(self):
+        return graph_index.load_index(self.tables, self.version_dir)
+
+    @cached_property
+    @metrics.timed("core.build.aggregates")
+    def aggregates(self):
+        return aggregates.AggregateCube.build(self.tables)
+
+    @cached_property
+    @metrics.timed("core.build.views")
+    def views(self):
+        return {
+            name: paging.TableView(self.tables[table], key=key)
+            for name, (table, key) in BROWSABLE.items()
+        }
+
+    @cached_property
+    @metrics.timed("core.build.search_index")
+    def search_index(self):
+        return search.load_index(self.tables, self.version_dir)
+
+    @property
+    def backend(self):
+        """Configured graph backend, falling back to the local snapshot
+
+        After a failed connect the snapshot serves requests until a back-off
+        (NEO4J_RETRY_SECONDS, doubling per failure up to 10x) has passed;
+        the next call then tries the configured backend again.
+        """
+        with self._backend_lock:
+            fallback = self._backend
+            if fallback is not None and (self.backend_error is None or time.monotonic() < self._backend_retry_at):
+                return fallback
+            if fallback is not None:
+                # One caller retries; the others keep the snapshot meanwhile
+                self._backend_retry_at = float('inf')
+        try:
+            backend = graph_backend.create_backend(
+                self.tables, self.index, kind=self.backend_kind, aggregates=self.aggregates
+            )
+        except Exception as e:
+            with self._backend_lock:
+                delay = config.NEO4J_RETRY_SECONDS * min(2 ** self._backend_failures, 10)
+                logger.warning("Graph backend unavailable (%s); using local snapshot for %ss", e, delay)
+                self.backend_error = e
+                self._backend_failures += 1
+                self._backend_retry_at = time.monotonic() + delay
+                if self._backend is None:
+                    self._backend = graph_backend.SnapshotBackend(self.tables, self.index, self.aggregates)
+                return self._backend
+        with self._backend_lock:
+            self._backend = backend
+            self.backend_error = None
+            self._backend_failures = 0
+        return backend
+
+    def built(self, name):
+        """Whether the derived structure ``name`` has been built yet"""
+        if name == 'backend':
+            return self._backend is not None
+        return name in self.__dict__
+
+    @cached_property
+    def memory_usage(self):
+        """Bytes held by each table (deep, so strings are included)"""
+        return {
+            name: int(df.memory_usage(deep=True).sum())
+            for name, df in self.tables.items()
+            if hasattr(df, 'memory_usage')
+        }
+
+    def register_metrics(self):
+        """Expose this dataset's cache hit ratios and table memory as gauges"""
+        metrics.registry.gauge("table_memory_bytes", lambda: metrics.labeled('table', self.memory_usage),
+                               "Memory held by each loaded table")
+        def caches():
+            caches = {'figures': figures.cache}
+            if self.cache is not None:
+                caches['query'] = self.cache
+            return metrics.cache_stats(caches)
+
+        metrics.registry.gauge("cache", caches, "Query and figure cache statistics")
+
+    def _query_cache(self):
+        if self.cache is None:
+            self.cache = query_cache.QueryCache(
+                max_entries=config.QUERY_CACHE_MAX_ENTRIES,
+                max_bytes=config.QUERY_CACHE_MAX_MB * 1024 * 1024,
+                disk_path=config.QUERY_CACHE_PATH,
+            )
+        return self.cache
+
+    @cached_property
+    def engine(self):
+        return query_cache.CachedPathEngine(paths.PathEngine(self.index), self._query_cache(), self.version)
+
+    @cached_property
+    @metrics.timed("core.build.coverage")
+    def coverage(self):
+        return coverage_analysis.CachedCoverage(
+            coverage_analysis.Coverage(self.tables), self._query_cache(), self.version
+        )
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @metrics.timed("core.browse")
+    def browse(self, name, equals=None, ranges=None, ids=None, sort_by=None,
+               ascending=True, page=1, page_size=paging.PAGE_SIZE):
+        """One page of a browsable table (long text columns excluded)
+
+        Raises KeyError for an unknown table and ValueError for an
+        unknown filter or sort column.
+        """
+        view = self.views[name]
+        for column in [*(equals or {}), *(ranges or {}), *([sort_by] if sort_by else [])]:
+            if column not in view.df:
+                raise ValueError(f"Unknown column for {name}: {column}")
+        rows = None
+        if ids is not None:
+            rows = [view.position(i) for i in ids if self.has(name, i)]
+        positions = view.select(equals=equals, ranges=ranges, rows=rows)
+        return view.page(positions, sort_by, ascending, page, page_size)
+
+    def has(self, name, key):
+        view = self.views[name]
+        try:
+            view.position(key)
+        except KeyError:
+            return False
+        return True
+
+    @metrics.timed("core.record")
+    def record(self, name, key):
+        """Full row (including long text) for one id, or None"""
+        if not self.has(name, key):
+            return None
+        view = self.views[name]
+        return to_records(view.df.iloc[[view.position(key)]])[0]
+
+    @metrics.timed("core.mappings_for")
+    def mappings_for(self, control_ids, conf_range=(0.0, 1.0)):
+        """MITIGATES rows per control id, for batch lookups"""
+        mapping = self.tables['nist_mitre_mapping']
+        results = {}
+        for control_id in control_ids:
+            edges = self.index.out_edges(control_id, kind="MITIGATES", conf_range=conf_range)
+            results[control_id] = to_records(mapping.iloc[self.index.edge_rows(edges)])
+        return results
+
+    @metrics.timed("core.paths")
+    def paths(self, source, **params):
+        return self.engine.best_paths(source, **params)
+
+    @metrics.timed("core.neighborhood")
+    def neighborhood(self, source, **params):
+        return self.engine.k_hop(source, **params)
+
+    @metrics.timed("core.gaps")
+    def gaps(self, min_confidence=coverage_analysis.DEFAULT_MIN_CONFIDENCE, tactic=None):
+        """Coverage summary plus uncovered techniques, unbacked requirements and redundant controls"""
+        return {
+            'summary': self.coverage.summary(min_confidence=min_confidence),
+            'uncovered_techniques': to_records(
+                self.coverage.uncovered_techniques(min_confidence=min_confidence, tactic=tactic)),
+            'uncovered_requirements': to_records(self.coverage.uncovered_requirements()),
+            'redundant_controls': to_records(self.coverage.redundant_controls(min_confidence=min_confidence)),
+        }
+
+    @metrics.timed("core.residual_risk")
+    def residual_risk(self, inventory, min_confidence=0.0):
+        """Residual exposure per system of an inventory DataFrame, worst first"""
+        return self._query_cache().get_or_compute(
+            "risk.residual", self.version,
+            lambda: risk.score(risk.RiskModel(self.coverage.coverage, min_confidence), inventory),
+            inventory=risk.inventory_digest(inventory), min_confidence=min_confidence,
+        )
+
+    @metrics.timed("core.search")
+    def search(self, query, k=10, kinds=None):
+        return self.search_index.search(query, k=k, kinds=kinds)
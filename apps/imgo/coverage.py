@@ -0,0 +1,308 @@
+"""
+Coverage and gap analysis across NIST SP 800-53, ATT&CK and the AI RMF
+
+Builds two sparse incidence matrices once per data version:
+
+- controls x techniques: best MITIGATES confidence (``nist_mitre_mapping``)
+- requirements x controls: best confidence of any relationship between an
+  AI RMF requirement and a control, in either direction (``relationships``)
+
+Both are CSR arrays in plain NumPy (``CoverageMatrix.to_scipy`` converts
+when SciPy is installed). Gap questions are thresholded, vectorized
+operations on them:
+
+- ``family_tactic``: control family x tactic matrix of mitigations above
+  a confidence, for the heatmap
+- ``uncovered_techniques``: techniques (optionally of one tactic) with
+  no mitigating control at or above the confidence
+- ``uncovered_requirements``: requirements without a backing control
+- ``redundant_controls``: controls every one of whose techniques is also
+  mitigated by another control, with a single control covering all of
+  them when there is one
+
+``CachedCoverage`` memoizes the results per data version in the query
+cache shared with the path engine.
+"""
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MIN_CONFIDENCE = 0.8
+
+
+class CoverageMatrix:
+    """Sparse rows x columns matrix of the best link confidence (CSR)"""
+
+    def __init__(self, row_ids, col_ids, rows, cols, values):
+        self.row_ids = np.asarray(row_ids, dtype=object)
+        self.col_ids = np.asarray(col_ids, dtype=object)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+
+        # Duplicate links keep their best confidence; entries sorted by (row, col)
+        order = np.lexsort((-values, cols, rows))
+        rows, cols, values = rows[order], cols[order], values[order]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        self.rows, self.indices, self.data = rows[first], cols[first], values[first]
+        self.indptr = np.zeros(len(self.row_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.rows, minlength=len(self.row_ids)), out=self.indptr[1:])
+
+    @property
+    def shape(self):
+        return len(self.row_ids), len(self.col_ids)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def entries(self, min_confidence=0.0):
+        """(rows, cols, values) of the entries at or above ``min_confidence``"""
+        keep = self.data >= min_confidence
+        return self.rows[keep], self.indices[keep], self.data[keep]
+
+    def row_degree(self, min_confidence=0.0):
+        rows, _, _ = self.entries(min_confidence)
+        return np.bincount(rows, minlength=self.shape[0])
+
+    def col_degree(self, min_confidence=0.0):
+        _, cols, _ = self.entries(min_confidence)
+        return np.bincount(cols, minlength=self.shape[1])
+
+    def col_best(self):
+        """Best value and its row per column (-1 row for empty columns)"""
+        best = np.zeros(self.shape[1], dtype=np.float64)
+        np.maximum.at(best, self.indices, self.data)
+        best_row = np.full(self.shape[1], -1, dtype=np.int64)
+        hit = self.data == best[self.indices]
+        # Entries are in row order, so the reversed assignment keeps the first row per column
+        best_row[self.indices[hit][::-1]] = self.rows[hit][::-1]
+        return best, best_row
+
+    def to_dense(self, min_confidence=0.0):
+        dense = np.zeros(self.shape, dtype=np.float64)
+        rows, cols, values = self.entries(min_confidence)
+        dense[rows, cols] = values
+        return dense
+
+    def to_scipy(self):
+        try:
+            from scipy import sparse
+        except ImportError as e:
+            raise ImportError("to_scipy needs SciPy; pip install scipy") from e
+        return sparse.csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+
+def _matrix(row_ids, col_ids, sources, targets, values):
+    """CoverageMatrix from id pairs; pairs with an unknown endpoint are dropped"""
+    row_ids, col_ids = pd.Index(row_ids).unique(), pd.Index(col_ids).unique()
+    rows = row_ids.get_indexer(sources)
+    cols = col_ids.get_indexer(targets)
+    keep = (rows >= 0) & (cols >= 0)
+    return CoverageMatrix(row_ids, col_ids, rows[keep], cols[keep], np.asarray(values, dtype=np.float64)[keep])
+
+
+class Coverage:
+    """Coverage matrices and gap queries for one data version"""
+
+    def __init__(self, tables):
+        self.controls = tables['nist_controls'].drop_duplicates('node_id').set_index('node_id')
+        self.techniques = tables['mitre_techniques'].drop_duplicates('node_id').set_index('node_id')
+        self.requirements = tables['ai_rmf_mapping'].drop_duplicates('requirement_id').set_index('requirement_id')
+
+        mapping = tables['nist_mitre_mapping']
+        self.control_technique = _matrix(
+            self.controls.index, self.techniques.index,
+            mapping['nist_control_id'], mapping['mitre_technique_id'],
+            mapping['mapping_confidence'].fillna(0.0),
+        )
+
+        relationships = tables.get('relationships')
+        if relationships is None:
+            relationships = pd.DataFrame(columns=['source_id', 'target_id', 'confidence'])
+        confidence = relationships['confidence'].fillna(1.0).to_numpy(dtype=np.float64)
+        # Requirement -> control links, whichever way round the relationship points
+        self.requirement_control = _matrix(
+            self.requirements.index, self.controls.index,
+            pd.concat([relationships['source_id'], relationships['target_id']], ignore_index=True),
+            pd.concat([relationships['target_id'], relationships['source_id']], ignore_index=True),
+            np.concatenate([confidence, confidence]),
+        )
+
+        self.families = self.controls['family'].reindex(self.control_technique.row_ids).fillna("").to_numpy(dtype=object)
+        self.tactics = self.techniques['tactic'].reindex(self.control_technique.col_ids).fillna("").to_numpy(dtype=object)
+
+    # ------------------------------------------------------------------
+    # Matrices
+    # ------------------------------------------------------------------
+
+    def family_tactic(self, min_confidence=DEFAULT_MIN_CONFIDENCE, distinct_techniques=False):
+        """Family x tactic counts of mitigations at or above ``min_confidence``
+
+        With ``distinct_techniques`` a cell counts the techniques of that
+        tactic mitigated by any control of that family instead of links.
+        """
+        family_names, family_codes = np.unique(self.families.astype(str), return_inverse=True)
+        tactic_names, tactic_codes = np.unique(self.tactics.astype(str), return_inverse=True)
+        rows, cols, _ = self.control_technique.entries(min_confidence)
+        if distinct_techniques:
+            n_techniques = self.control_technique.shape[1]
+            families, techniques = np.divmod(np.unique(family_codes[rows] * n_techniques + cols), n_techniques)
+            cells = families * len(tactic_names) + tactic_codes[techniques]
+        else:
+            cells = family_codes[rows] * len(tactic_names) + tactic_codes[cols]
+        counts = np.bincount(cells, minlength=len(family_names) * len(tactic_names))
+        return pd.DataFrame(
+            counts.reshape(len(family_names), len(tactic_names)),
+            index=pd.Index(family_names, name="family"),
+            columns=pd.Index(tactic_names, name="tactic"),
+        )
+
+    def tactic_coverage(self, min_confidence=DEFAULT_MIN_CONFIDENCE):
+        """Per tactic: techniques, covered techniques and the covered share"""
+        covered = self.control_technique.col_degree(min_confidence) > 0
+        frame = pd.DataFrame({'tactic': self.tactics, 'covered': covered})
+        summary = frame.groupby('tactic')['covered'].agg(techniques='size', covered='sum')
+        summary['uncovered'] = summary['techniques'] - summary['covered']
+        summary['coverage'] = summary['covered'] / summary['techniques']
+        return summary.reset_index()
+
+    # ------------------------------------------------------------------
+    # Gaps
+    # ------------------------------------------------------------------
+
+    def uncovered_techniques(self, min_confidence=DEFAULT_MIN_CONFIDENCE, tactic=None):
+        """Techniques with no mitigating control at or above ``min_confidence``
+
+        ``best_confidence`` / ``best_control`` show the strongest mapping
+        that does exist (0 / None when the technique is unmapped).
+        """
+        matrix = self.control_technique
+        best, best_row = matrix.col_best()
+        # By degree, not best < min_confidence: unmapped techniques stay uncovered at 0.0
+        uncovered = matrix.col_degree(min_confidence) == 0
+        if tactic is not None:
+            uncovered &= self.tactics == tactic
+        cols = np.flatnonzero(uncovered)
+        ids = matrix.col_ids[cols]
+        return pd.DataFrame({
+            'node_id': ids,
+            'name': self.techniques['name'].reindex(ids).to_numpy(dtype=object),
+            'tactic': self.tactics[cols],
+            'best_confidence': best[cols],
+            'best_control': np.where(best_row[cols] >= 0, matrix.row_ids[np.maximum(best_row[cols], 0)], None),
+        }).sort_values(['tactic', 'best_confidence', 'node_id'], ignore_index=True)
+
+    def uncovered_requirements(self, min_confidence=0.0):
+        """AI RMF requirements with no linked control at or above ``min_confidence``
+
+        ``mitigating_controls`` counts, for requirements that do have
+        controls, how many of them mitigate at least one technique; a
+        requirement whose controls mitigate nothing is reported too.
+        """
+        links = self.requirement_control
+        degree = links.row_degree(min_confidence)
+        rows, cols, _ = links.entries(min_confidence)
+        mitigates = self.control_technique.row_degree(0.0) > 0
+        mitigating = np.bincount(rows, weights=mitigates[cols], minlength=links.shape[0]).astype(np.int64)
+        gaps = np.flatnonzero(mitigating == 0)
+        ids = links.row_ids[gaps]
+        return pd.DataFrame({
+            'requirement_id': ids,
+            'category': self.requirements['category'].reindex(ids).to_numpy(dtype=object),
+            'title': self.requirements['title'].reindex(ids).to_numpy(dtype=object),
+            'linked_controls': degree[gaps],
+            'mitigating_controls': mitigating[gaps],
+        })
+
+    def redundant_controls(self, min_confidence=DEFAULT_MIN_CONFIDENCE):
+        """Controls whose every technique is also mitigated by another control
+
+        ``subset_of`` names one other control mitigating all of them (the
+        one with the fewest techniques), or None when the overlap is spread
+        over several controls.
+        """
+        matrix = self.control_technique
+        rows, cols, _ = matrix.entries(min_confidence)
+        row_degree = np.bincount(rows, minlength=matrix.shape[0])
+        col_degree = np.bincount(cols, minlength=matrix.shape[1])
+        # A control is redundant when none of its techniques is mitigated by it alone
+        unique = np.bincount(rows, weights=col_degree[cols] == 1, minlength=matrix.shape[0])
+        candidates = np.flatnonzero((row_degree > 0) & (unique == 0))
+
+        # Column -> rows (CSC) for the subset search
+        order = np.argsort(cols, kind="stable")
+        col_rows = rows[order]
+        col_ptr = np.zeros(matrix.shape[1] + 1, dtype=np.int64)
+        np.cumsum(col_degree, out=col_ptr[1:])
+        row_ptr = np.zeros(matrix.shape[0] + 1, dtype=np.int64)
+        np.cumsum(row_degree, out=row_ptr[1:])
+
+        subset_of = []
+        for row in candidates:
+            techniques = cols[row_ptr[row]:row_ptr[row + 1]]
+            others = np.concatenate([col_rows[col_ptr[c]:col_ptr[c + 1]] for c in techniques])
+            hits = np.bincount(others, minlength=matrix.shape[0])
+            hits[row] = 0
+            supersets = np.flatnonzero(hits == len(techniques))
+            if len(supersets):
+                best = supersets[np.argmin(row_degree[supersets])]
+                subset_of.append(matrix.row_ids[best])
+            else:
+                subset_of.append(None)
+
+        ids = matrix.row_ids[candidates]
+        return pd.DataFrame({
+            'node_id': ids,
+            'family': self.families[candidates],
+            'title': self.controls['title'].reindex(ids).to_numpy(dtype=object),
+            'techniques': row_degree[candidates],
+            'subset_of': np.asarray(subset_of, dtype=object),
+        })
+
+    def summary(self, min_confidence=DEFAULT_MIN_CONFIDENCE):
+        covered = self.control_technique.col_degree(min_confidence) > 0
+        return {
+            'min_confidence': min_confidence,
+            'techniques': int(self.control_technique.shape[1]),
+            'covered_techniques': int(covered.sum()),
+            'uncovered_techniques': int((~covered).sum()),
+            'controls': int(self.control_technique.shape[0]),
+            'mitigating_controls': int((self.control_technique.row_degree(min_confidence) > 0).sum()),
+            'requirements': int(self.requirement_control.shape[0]),
+            'unbacked_requirements': len(self.uncovered_requirements()),
+        }
+
+
+class CachedCoverage:
+    """Coverage wrapper that memoizes results in a QueryCache"""
+
+    def __init__(self, coverage, cache, data_version):
+        self.coverage = coverage
+        self.cache = cache
+        self.data_version = data_version
+
+    def _cached(self, kind, **params):
+        compute = getattr(self.coverage, kind)
+        return self.cache.get_or_compute(
+            f"coverage.{kind}", self.data_version, lambda: compute(**params), **params
+        )
+
+    def family_tactic(self, **params):
+        return self._cached("family_tactic", **params)
+
+    def tactic_coverage(self, **params):
+        return self._cached("tactic_coverage", **params)
+
+    def uncovered_techniques(self, **params):
+        return self._cached("uncovered_techniques", **params)
+
+    def uncovered_requirements(self, **params):
+        return self._cached("uncovered_requirements", **params)
+
+    def redundant_controls(self, **params):
+        return self._cached("redundant_controls", **params)
+
+    def summary(self, **params):
+        return self._cached("summary", **params)
@@ -0,0 +1,567 @@
+"""
+Incremental delta ingestion for framework release updates
+
+Diffs a new release of the source tables (the ``data/sample`` CSV layout;
+tables missing from the release are left unchanged) against the active
+data by stable id and row content hash, then applies only the changes:
+
+- the graph index keeps its node ids, interns new nodes, drops
+  deprecated ones, drops, updates and appends edges, and re-derives its
+  CSR arrays with one sort
+- the changed source CSVs and a new snapshot version are published
+  atomically (FKGL is re-scored only for changed descriptions)
+- optionally Neo4j receives UNWIND upserts, edge deletions and node
+  deprecations instead of a full reload
+- the BFO integrity checks (``imgo.bfo_verify``) re-run on the changed
+  rows only, before anything is written; a failing release is rejected
+  with ``DeltaError`` and leaves the sources and snapshot untouched
+
+Every run produces a change report of inserted, updated and deprecated
+rows per table.
+
+Usage::
+
+    python -m imgo.delta path/to/release --dry-run
+    python -m imgo.delta path/to/release --neo4j --report changes.json
+"""
+
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from imgo import config, core, graph_index, neo4j_loader, readability, snapshot
+
+logger = logging.getLogger(__name__)
+
+# Stable identity of a row in each table
+KEY_COLUMNS = {
+    'nist_controls': ("node_id",),
+    'mitre_techniques': ("node_id",),
+    'ai_rmf_mapping': ("requirement_id",),
+    'nist_mitre_mapping': ("nist_control_id", "mitre_technique_id"),
+    'relationships': ("source_id", "target_id", "relationship"),
+}
+
+# Node tables: table, id column, label column (None: fixed label)
+NODE_TABLES = [
+    ('nist_controls', "node_id", "label", None),
+    ('mitre_techniques', "node_id", "label", None),
+    ('ai_rmf_mapping', "requirement_id", None, "AIRMFRequirement"),
+]
+# Edge tables: origin code, table, source column, target column, confidence column
+EDGE_TABLES = [
+    (graph_index.ORIGIN_MAPPING, 'nist_mitre_mapping', "nist_control_id", "mitre_technique_id", "mapping_confidence"),
+    (graph_index.ORIGIN_RELATIONSHIPS, 'relationships', "source_id", "target_id", "confidence"),
+]
+
+REPORT_ID_LIMIT = 50
+DEFAULT_BATCH_SIZE = 5000
+
+
+class DeltaError(Exception):
+    """Raised when a release cannot be diffed (e.g. duplicate keys)"""
+
+
+# ------------------------------------------------------------------
+# Diff
+# ------------------------------------------------------------------
+
+def _key_index(df, table):
+    columns = list(KEY_COLUMNS[table])
+    if len(columns) == 1:
+        return pd.Index(df[columns[0]])
+    return pd.MultiIndex.from_frame(df[columns])
+
+
+def _compared_columns(old, new, table):
+    excluded = set(KEY_COLUMNS[table])
+    return [c for c in new.columns if c in old.columns and c not in excluded]
+
+
+def row_hashes(df, columns):
+    """64-bit content hash per row over ``columns``"""
+    if not columns:
+        return np.zeros(len(df), dtype=np.uint64)
+    return pd.util.hash_pandas_object(df[columns].astype(str), index=False).to_numpy()
+
+
+class TableDelta:
+    """Row-level changes to one table
+
+    ``deprecated`` and ``updated`` are positions in the old frame,
+    ``updated_new`` and ``inserted`` positions in the new frame.
+    ``order`` lists new-frame positions in published order (surviving
+    rows keep their old order, inserted rows follow) and ``row_map``
+    maps each old position to its published position (-1: deprecated).
+    """
+
+    def __init__(self, table, deprecated, updated, updated_new, inserted, order, row_map):
+        self.table = table
+        self.deprecated = deprecated
+        self.updated = updated
+        self.updated_new = updated_new
+        self.inserted = inserted
+        self.order = order
+        self.row_map = row_map
+
+    @property
+    def changed(self):
+        return bool(len(self.deprecated) or len(self.updated) or len(self.inserted))
+
+    def counts(self):
+        return {
+            'inserted': len(self.inserted),
+            'updated': len(self.updated),
+            'deprecated': len(self.deprecated),
+            'unchanged': len(self.row_map) - len(self.deprecated) - len(self.updated),
+        }
+
+
+def diff_table(table, old, new):
+    """Match rows by key and compare content hashes"""
+    old_keys, new_keys = _key_index(old, table), _key_index(new, table)
+    if new_keys.has_duplicates:
+        raise DeltaError(f"{table}: duplicate keys in the new release")
+    match = new_keys.get_indexer(old_keys)
+    kept = match >= 0
+
+    columns = _compared_columns(old, new, table)
+    old_hash, new_hash = row_hashes(old, columns), row_hashes(new, columns)
+    changed = np.zeros(len(old), dtype=bool)
+    changed[kept] = old_hash[kept] != new_hash[match[kept]]
+
+    inserted = np.setdiff1d(np.arange(len(new)), match[kept])
+    row_map = np.full(len(old), -1, dtype=np.int64)
+    row_map[kept] = np.arange(int(kept.sum()))
+    return TableDelta(
+        table,
+        deprecated=np.flatnonzero(~kept),
+        updated=np.flatnonzero(changed),
+        updated_new=match[changed],
+        inserted=inserted,
+        order=np.concatenate([match[kept], inserted]).astype(np.int64),
+        row_map=row_map,
+    )
+
+
+class ChangeSet:
+    """Per-table deltas between the current tables and a release"""
+
+    def __init__(self, old, new, deltas):
+        self.old = old
+        self.new = new
+        self.deltas = deltas
+
+    @property
+    def empty(self):
+        return not any(d.changed for d in self.deltas.values())
+
+    def changed_tables(self):
+        return [name for name, d in self.deltas.items() if d.changed]
+
+    def published(self):
+        """Tables after the change, in stable row order"""
+        tables = {
+            name: self.new[name].iloc[d.order].reset_index(drop=True)
+            for name, d in self.deltas.items()
+        }
+        tables['graphrag_paths'] = self.new.get('graphrag_paths', self.old['graphrag_paths'])
+        return tables
+
+    def _ids(self, table, df, positions):
+        keys = df.iloc[positions[:REPORT_ID_LIMIT]][list(KEY_COLUMNS[table])]
+        return [" | ".join(str(v) for v in row) for row in keys.itertuples(index=False)]
+
+    def report(self):
+        tables = {}
+        for name, d in self.deltas.items():
+            entry = d.counts()
+            entry['ids'] = {
+                'inserted': self._ids(name, self.new[name], d.inserted),
+                'updated': self._ids(name, self.new[name], d.updated_new),
+                'deprecated': self._ids(name, self.old[name], d.deprecated),
+            }
+            tables[name] = entry
+        totals = {
+            kind: sum(t[kind] for t in tables.values())
+            for kind in ('inserted', 'updated', 'deprecated', 'unchanged')
+        }
+        return {'tables': tables, 'totals': totals}
+
+
+def diff(old_tables, new_tables):
+    """ChangeSet for every table present in both ``old_tables`` and ``new_tables``"""
+    deltas = {
+        name: diff_table(name, old_tables[name], new_tables[name])
+        for name in KEY_COLUMNS
+        if name in old_tables and name in new_tables
+    }
+    return ChangeSet(old_tables, new_tables, deltas)
+
+
+def read_release(release_path, current, fkgl_store=None):
+    """Tables of a release directory; tables it does not contain stay as ``current``"""
+    release_path = Path(release_path)
+    tables = {}
+    for name, filename in snapshot.SOURCE_FILES.items():
+        path = release_path / filename
+        tables[name] = pd.read_csv(path) if path.exists() else current[name]
+    paths_file = release_path / snapshot.PATHS_FILE
+    if paths_file.exists():
+        with open(paths_file, 'r') as f:
+            tables['graphrag_paths'] = json.load(f)
+
+    controls = tables['nist_controls']
+    if controls is not current['nist_controls']:
+        # A release without published scores keeps the current ones (stale once the description changed)
+        published = controls.get('fkgl_score')
+        if published is None:
+            published = controls['node_id'].map(current['nist_controls'].set_index('node_id')['fkgl_score'])
+        scores, rescored = readability.score_incremental(
+            controls['node_id'], controls['description'], store_path=fkgl_store, published=published,
+        )
+        controls['fkgl_score'] = scores.to_numpy()
+        logger.info("FKGL re-scored for %d controls", rescored)
+    return tables
+
+
+# ------------------------------------------------------------------
+# Apply: graph index
+# ------------------------------------------------------------------
+
+def patch_index(index, changes, tables):
+    """GraphIndex for the published ``tables``, derived from ``index``
+
+    Existing node ids are kept, new nodes are interned and deprecated ones
+    dropped (or, like ``build_index``, kept with an unknown label while a
+    published edge still references them). Edges are dropped,
+    re-weighted, remapped to their published rows or appended.
+    """
+    node_ids = list(index.node_ids)
+    labels = list(index.node_labels)
+    lookup = {node_id: i for i, node_id in enumerate(node_ids)}
+
+    def intern(node_id, label):
+        i = lookup.get(node_id)
+        if i is None:
+            lookup[node_id] = i = len(node_ids)
+            node_ids.append(node_id)
+            labels.append(label)
+        elif label != graph_index.UNKNOWN_LABEL:
+            labels[i] = label
+        return i
+
+    for table, id_column, label_column, fixed_label in NODE_TABLES:
+        delta = changes.deltas.get(table)
+        if delta is None:
+            continue
+        rows = changes.new[table].iloc[np.concatenate([delta.updated_new, delta.inserted])]
+        row_labels = rows[label_column] if label_column else [fixed_label] * len(rows)
+        for node_id, label in zip(rows[id_column], row_labels):
+            intern(node_id, label)
+
+    src, dst, kind, conf, origin, row = [], [], [], [], [], []
+    for code, table, src_column, dst_column, conf_column in EDGE_TABLES:
+        published = tables[table]
+        weights = published[conf_column].fillna(1.0).to_numpy(dtype=np.float64)
+        delta = changes.deltas.get(table)
+        existing = np.flatnonzero(index.origin == code)
+        if delta is None:
+            new_rows = np.asarray(index.row[existing])
+        else:
+            new_rows = delta.row_map[index.row[existing]]
+            existing, new_rows = existing[new_rows >= 0], new_rows[new_rows >= 0]
+        src.append(np.asarray(index.src[existing]))
+        dst.append(np.asarray(index.dst[existing]))
+        kind.append(np.asarray(index.kind[existing]))
+        conf.append(weights[new_rows])
+        origin.append(np.full(len(existing), code, dtype=np.uint8))
+        row.append(new_rows)
+
+        if delta is None or not len(delta.inserted):
+            continue
+        first = len(delta.order) - len(delta.inserted)
+        added = np.arange(first, len(delta.order))
+        rows = published.iloc[added]
+        src.append(np.array([intern(n, graph_index.UNKNOWN_LABEL) for n in rows[src_column]], dtype=np.int64))
+        dst.append(np.array([intern(n, graph_index.UNKNOWN_LABEL) for n in rows[dst_column]], dtype=np.int64))
+        if code == graph_index.ORIGIN_MAPPING:
+            kind.append(np.full(len(rows), graph_index.kind_code("MITIGATES"), dtype=np.uint8))
+        else:
+            kind.append(np.array([graph_index.kind_code(k) for k in rows['relationship']], dtype=np.uint8))
+        conf.append(weights[added])
+        origin.append(np.full(len(rows), code, dtype=np.uint8))
+        row.append(added)
+
+    src, dst = np.concatenate(src), np.concatenate(dst)
+    node_ids = np.asarray(node_ids, dtype=object)
+    labels = np.asarray(labels, dtype=object)
+    deprecated = _deprecated_nodes(changes, tables, lookup)
+    if len(deprecated):
+        referenced = np.zeros(len(node_ids), dtype=bool)
+        referenced[src] = referenced[dst] = True
+        labels[deprecated[referenced[deprecated]]] = graph_index.UNKNOWN_LABEL
+        keep = np.ones(len(node_ids), dtype=bool)
+        keep[deprecated[~referenced[deprecated]]] = False
+        remap = np.cumsum(keep) - 1
+        node_ids, labels, src, dst = node_ids[keep], labels[keep], remap[src], remap[dst]
+
+    return graph_index.GraphIndex(
+        node_ids=node_ids,
+        node_labels=labels,
+        src=src,
+        dst=dst,
+        kind=np.concatenate(kind),
+        confidence=np.concatenate(conf),
+        origin=np.concatenate(origin),
+        row=np.concatenate(row),
+    )
+
+
+def _deprecated_nodes(changes, tables, lookup):
+    """Index positions of nodes deprecated from their table and not published by another"""
+    published = set()
+    deprecated = set()
+    for table, id_column, _, _ in NODE_TABLES:
+        published.update(tables[table][id_column])
+        delta = changes.deltas.get(table)
+        if delta is not None and len(delta.deprecated):
+            deprecated.update(changes.old[table][id_column].iloc[delta.deprecated])
+    return np.array(sorted(lookup[n] for n in deprecated - published if n in lookup), dtype=np.int64)
+
+
+# ------------------------------------------------------------------
+# Apply: Neo4j
+# ------------------------------------------------------------------
+
+DEPRECATE_NODE_TEMPLATE = """
+UNWIND $rows AS row
+MATCH (n:{label} {{{key}: row.id}})
+SET n.deprecated = true
+"""
+
+DELETE_MITIGATES = """
+UNWIND $rows AS row
+MATCH (:NISTControl {control_id: row.source})-[r:MITIGATES]->(:MITRETechnique {technique_id: row.target})
+DELETE r
+"""
+
+DELETE_RELATIONSHIP_TEMPLATE = """
+UNWIND $rows AS row
+MATCH (a {{entity_id: row.source}})-[r:{rel_type}]->(b {{entity_id: row.target}})
+DELETE r
+"""
+
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def neo4j_batches(changes, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield (statement, rows): node upserts, edge upserts, edge deletions, node deprecations"""
+    deltas = changes.deltas
+
+    def upserts(table):
+        delta = deltas[table]
+        return changes.new[table].iloc[np.concatenate([delta.updated_new, delta.inserted])].to_dict("records")
+
+    def removed(table):
+        return changes.old[table].iloc[deltas[table].deprecated].to_dict("records")
+
+    for table, label, key, id_column, properties in neo4j_loader.NODE_SOURCES:
+        if table in deltas:
+            rows = neo4j_loader.node_rows(upserts(table), id_column, properties)
+            for chunk in _chunks(rows, batch_size):
+                yield neo4j_loader.node_statement(label, key), chunk
+
+    if 'nist_mitre_mapping' in deltas:
+        rows = neo4j_loader.mapping_rows(upserts('nist_mitre_mapping'))
+        for chunk in _chunks(rows, batch_size):
+            yield neo4j_loader.relationship_statement("MITIGATES"), chunk
+    if 'relationships' in deltas:
+        by_type = {}
+        for record in upserts('relationships'):
+            by_type.setdefault(record['relationship'], []).append(record)
+        for rel_type, records in sorted(by_type.items()):
+            for chunk in _chunks(neo4j_loader.relationship_rows(records), batch_size):
+                yield neo4j_loader.relationship_statement(rel_type), chunk
+
+    if 'nist_mitre_mapping' in deltas:
+        rows = [{'source': r['nist_control_id'], 'target': r['mitre_technique_id']}
+                for r in removed('nist_mitre_mapping')]
+        for chunk in _chunks(rows, batch_size):
+            yield DELETE_MITIGATES, chunk
+    if 'relationships' in deltas:
+        by_type = {}
+        for record in removed('relationships'):
+            by_type.setdefault(record['relationship'], []).append(
+                {'source': record['source_id'], 'target': record['target_id']})
+        for rel_type, rows in sorted(by_type.items()):
+            statement = DELETE_RELATIONSHIP_TEMPLATE.format(rel_type=rel_type)
+            for chunk in _chunks(rows, batch_size):
+                yield statement, chunk
+
+    for table, label, key, id_column, _ in neo4j_loader.NODE_SOURCES:
+        if table in deltas:
+            rows = [{'id': r[id_column]} for r in removed(table)]
+            statement = DEPRECATE_NODE_TEMPLATE.format(label=label, key=key)
+            for chunk in _chunks(rows, batch_size):
+                yield statement, chunk
+
+
+def apply_neo4j(driver, changes, batch_size=DEFAULT_BATCH_SIZE, database=None):
+    """Write the change set to Neo4j; returns (statements, rows) written"""
+    def write(tx, statement, rows):
+        tx.run(statement, rows=rows).consume()
+
+    statements = rows_written = 0
+    with driver.session(database=database) as session:
+        for statement, rows in neo4j_batches(changes, batch_size):
+            session.execute_write(write, statement, rows)
+            statements += 1
+            rows_written += len(rows)
+    return statements, rows_written
+
+
+# ------------------------------------------------------------------
+# Pipeline
+# ------------------------------------------------------------------
+
+def ingest(release_path, data_path=None, snapshot_path=None, dry_run=False, driver=None,
+           database=None, verify=True):
+    """Diff a release against the active data and apply it; returns the change report"""
+    data_path = Path(data_path or config.DATA_PATH)
+    snapshot_path = Path(snapshot_path or config.SNAPSHOT_PATH)
+    timings = {}
+
+    start = time.perf_counter()
+    dataset = core.Dataset.load(data_path, snapshot_path)
+    fkgl_store = snapshot_path / readability.STORE_FILE
+    release = read_release(release_path, dataset.tables, fkgl_store=fkgl_store)
+    timings['load'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    changes = diff(dataset.tables, release)
+    timings['diff'] = time.perf_counter() - start
+
+    report = changes.report()
+    report['release'] = str(release_path)
+    report['dry_run'] = dry_run
+    report['data_version'] = dataset.version
+    report['timings'] = timings
+    if changes.empty or dry_run:
+        return report
+
+    start = time.perf_counter()
+    tables = changes.published()
+    index = patch_index(dataset.index, changes, tables)
+    timings['patch'] = time.perf_counter() - start
+
+    # Nothing is written until the release passes: a failure leaves the
+    # sources and the CURRENT snapshot untouched
+    verifier = None
+    if verify:
+        from imgo import bfo_verify  # imports this module
+
+        start = time.perf_counter()
+        verifier = (bfo_verify.Verifier.load(dataset.tables, None, dataset.version_dir)
+                    or bfo_verify.Verifier(dataset.tables))
+        verifier = verifier.update(changes, tables, index)
+        report['bfo'] = verifier.report()
+        timings['verify'] = time.perf_counter() - start
+        if not report['bfo']['passed']:
+            failed = [f"{c['check']} {c['table']}" for c in report['bfo']['checks'] if not c['passed']]
+            raise DeltaError(f"BFO verification failed ({', '.join(failed)}); release not applied")
+
+    start = time.perf_counter()
+    snapshot.write_sources(tables, data_path, changes.changed_tables())
+    if 'graphrag_paths' in release and release['graphrag_paths'] is not dataset.tables['graphrag_paths']:
+        with open(data_path / snapshot.PATHS_FILE, 'w') as f:
+            json.dump(release['graphrag_paths'], f, indent=2)
+    data_version = snapshot.source_hash(data_path)
+    tables['data_version'] = data_version
+    version_dir = snapshot.publish_snapshot(tables, snapshot_path, data_version, index=index)
+    if verifier is not None:
+        verifier.save(version_dir)
+    if 'nist_controls' in changes.changed_tables():
+        controls = tables['nist_controls']
+        readability.save_store(fkgl_store, controls['node_id'], controls['description'], controls['fkgl_score'])
+    timings['apply'] = time.perf_counter() - start
+    report['data_version'] = data_version
+
+    if driver is not None:
+        start = time.perf_counter()
+        statements, rows = apply_neo4j(driver, changes, database=database)
+        timings['neo4j'] = time.perf_counter() - start
+        report['neo4j'] = {'statements': statements, 'rows': rows}
+    return report
+
+
+def format_report(report):
+    lines = [f"Release {report['release']}" + (" (dry run)" if report['dry_run'] else "")]
+    for name, entry in report['tables'].items():
+        lines.append(
+            f"  {name}: +{entry['inserted']} ~{entry['updated']} -{entry['deprecated']}"
+            f" ({entry['unchanged']} unchanged)"
+        )
+        for kind in ('inserted', 'updated', 'deprecated'):
+            if entry['ids'][kind]:
+                lines.append(f"    {kind}: {', '.join(entry['ids'][kind])}")
+    totals = report['totals']
+    lines.append(
+        f"  total: +{totals['inserted']} ~{totals['updated']} -{totals['deprecated']}"
+    )
+    if 'neo4j' in report:
+        lines.append(f"  neo4j: {report['neo4j']['rows']} rows in {report['neo4j']['statements']} statements")
+    if 'bfo' in report:
+        failed = [f"{c['check']} {c['table']} ({c['violations']})" for c in report['bfo']['checks'] if not c['passed']]
+        lines.append(f"  bfo: {'passed' if not failed else 'FAILED ' + ', '.join(failed)}"
+                     f" ({report['bfo']['rows_rechecked']} rows re-checked)")
+    lines.append("  timings: " + ", ".join(f"{k} {v:.3f}s" for k, v in report['timings'].items()))
+    lines.append(f"  data version: {report['data_version'][:16]}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a framework release as an incremental delta")
+    parser.add_argument("release", help="directory with the new release CSVs (data/sample layout)")
+    parser.add_argument("--data-path", default=str(config.DATA_PATH), help="source data directory")
+    parser.add_argument("--snapshot-path", default=str(config.SNAPSHOT_PATH), help="snapshot directory")
+    parser.add_argument("--dry-run", action="store_true", help="report changes without applying them")
+    parser.add_argument("--neo4j", action="store_true", help="also apply the changes to Neo4j")
+    parser.add_argument("--fake-neo4j", action="store_true", help="apply to the in-process fake driver")
+    parser.add_argument("--report", help="write the change report as JSON")
+    parser.add_argument("--no-verify", action="store_true", help="skip the BFO integrity re-verification")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    driver = None
+    if args.fake_neo4j:
+        from imgo.fake_neo4j import FakeDriver
+        driver = FakeDriver()
+    elif args.neo4j:
+        driver = neo4j_loader.connect()
+    try:
+        report = ingest(args.release, args.data_path, args.snapshot_path,
+                        dry_run=args.dry_run, driver=driver, database=config.NEO4J_DATABASE,
+                        verify=not args.no_verify)
+    except DeltaError as e:
+        parser.error(str(e))
+    finally:
+        if driver is not None:
+            driver.close()
+
+    print(format_report(report))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+"""
+Streaming bulk export of filtered views, knowledge paths and coverage results
+
+Every export is a generator of encoded byte chunks built from CHUNK_ROWS
+row slices of the selection, so memory stays at one chunk however large
+the export is:
+
+- ``csv`` / ``jsonl``: one text block per slice (header once)
+- ``parquet``: one row group per slice through a ``pyarrow`` writer
+  (optional dependency)
+- ``stix``: a STIX 2.1 bundle written object by object; controls and AI
+  RMF requirements become ``course-of-action``, techniques
+  ``attack-pattern`` (with the ``mitre-attack`` external id and kill
+  chain phase ``imgo.importers`` reads back) and edges ``relationship``
+  objects. Ids are uuid5 of the node id, so they are stable across runs.
+
+Sources (``SOURCES``): the browsable tables, ``mappings``,
+``relationships``, ``graph`` (every edge with its ``bfo_type``; 41,911 at
+full scale), ``paths`` (the precomputed GraphRAG paths, or best paths
+computed from ``--path-source`` controls) and ``gaps`` (uncovered
+techniques).
+
+Usage::
+
+    python -m imgo.export graph --format stix --output exports/imgo-graph.json
+    python -m imgo.export controls --where family=AC --range fkgl_score=10:20 --format parquet --output ac.parquet
+    python -m imgo.export paths --path-source SR-3 --path-source AC-2 --format jsonl --output paths.jsonl
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from imgo import config, core, graph_index, paging
+from imgo.importers import TACTICS
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 5000
+# format -> (MIME type, file extension)
+FORMATS = {
+    'csv': ("text/csv", ".csv"),
+    'jsonl': ("application/x-ndjson", ".jsonl"),
+    'parquet': ("application/vnd.apache.parquet", ".parquet"),
+    'stix': ("application/stix+json;version=2.1", ".json"),
+}
+# Public name -> table
+TABLE_SOURCES = {
+    **{name: table for name, (table, _) in core.BROWSABLE.items()},
+    'mappings': 'nist_mitre_mapping',
+    'relationships': 'relationships',
+}
+SOURCES = [*TABLE_SOURCES, 'graph', 'paths', 'gaps']
+STIX_SOURCES = ('controls', 'techniques', 'requirements', 'mappings', 'relationships', 'graph')
+GRAPH_COLUMNS = ['source_id', 'target_id', 'relationship', 'bfo_type', 'confidence']
+PATH_COLUMNS = ['query', 'nist_controls', 'mitre_techniques', 'reasoning', 'confidence', 'path_length']
+
+STIX_NAMESPACE = uuid.UUID("9a3c5f0e-51b4-4c1e-9d7a-2f6a1c8e4b10")
+_PHASES = {name: phase for phase, name in TACTICS.items()}
+
+
+def formats(source):
+    """Export formats available for a source"""
+    return [f for f in FORMATS if f != 'stix' or source in STIX_SOURCES]
+
+
+def file_name(source, fmt):
+    return f"imgo-{source}{FORMATS[fmt][1]}"
+
+
+# ------------------------------------------------------------------
+# Selections
+# ------------------------------------------------------------------
+
+def table_chunks(df, positions=None, columns=None, chunk_rows=CHUNK_ROWS):
+    """Yield ``chunk_rows`` slices of ``df`` at ``positions`` (all rows when None)"""
+    total = len(df) if positions is None else len(positions)
+    if total == 0:
+        yield df.iloc[:0] if columns is None else df.iloc[:0][columns]
+    for start in range(0, total, chunk_rows):
+        rows = slice(start, start + chunk_rows) if positions is None else positions[start:start + chunk_rows]
+        chunk = df.iloc[rows]
+        yield chunk if columns is None else chunk[columns]
+
+
+def graph_chunks(tables, chunk_rows=CHUNK_ROWS):
+    """Every MITIGATES mapping and other relationship as one edge list"""
+    for chunk in table_chunks(tables['nist_mitre_mapping'], chunk_rows=chunk_rows):
+        yield pd.DataFrame({
+            'source_id': chunk['nist_control_id'].to_numpy(),
+            'target_id': chunk['mitre_technique_id'].to_numpy(),
+            'relationship': "MITIGATES",
+            'bfo_type': graph_index.BFO_TYPES["MITIGATES"],
+            'confidence': chunk['mapping_confidence'].to_numpy(),
+        }, columns=GRAPH_COLUMNS)
+    relationships = tables.get('relationships')
+    if relationships is None:
+        return
+    for chunk in table_chunks(relationships, chunk_rows=chunk_rows):
+        yield pd.DataFrame({
+            'source_id': chunk['source_id'].to_numpy(),
+            'target_id': chunk['target_id'].to_numpy(),
+            'relationship': chunk['relationship'].to_numpy(),
+            'bfo_type': chunk['relationship'].map(graph_index.BFO_TYPES).to_numpy(),
+            'confidence': chunk['confidence'].to_numpy(),
+        }, columns=GRAPH_COLUMNS)
+
+
+def path_chunks(paths, nested=False, chunk_rows=CHUNK_ROWS):
+    """Knowledge path dicts as DataFrames; every list field joined with "; " unless ``nested``"""
+    # Every chunk gets the same columns, including keys only some paths carry
+    columns = list(dict.fromkeys([*PATH_COLUMNS, *(key for path in paths for key in path)]))
+    if not paths:
+        yield pd.DataFrame(columns=columns)  # header / schema of an empty export
+    for start in range(0, len(paths), chunk_rows):
+        chunk = pd.DataFrame(paths[start:start + chunk_rows])
+        absent = [c for c in columns if c not in chunk]
+        chunk = chunk.reindex(columns=columns)
+        chunk[absent] = chunk[absent].astype(object)  # not float NaN, so the Arrow schema stays text
+        if not nested:
+            chunk = chunk.drop(columns=['relationships'], errors='ignore')
+            for column in chunk.columns[chunk.dtypes == object]:
+                if chunk[column].map(lambda v: isinstance(v, list)).any():
+                    chunk[column] = chunk[column].map(lambda v: "; ".join(map(str, v)) if isinstance(v, list) else v)
+        yield chunk
+
+
+def mapping_rows(index, control_id=None, conf_range=(0.0, 1.0)):
+    """Positions in ``nist_mitre_mapping`` of the NIST-MITRE view's filter"""
+    if control_id is not None:
+        edges = index.out_edges(control_id, kind="MITIGATES", conf_range=conf_range)
+    else:
+        edges = index.edges_in_range(conf_range[0], conf_range[1], kind="MITIGATES")
+    return np.sort(index.edge_rows(edges))
+
+
+# ------------------------------------------------------------------
+# Encoders
+# ------------------------------------------------------------------
+
+def csv_bytes(chunks):
+    for i, chunk in enumerate(chunks):
+        yield chunk.to_csv(index=False, header=i == 0).encode("utf-8")
+
+
+def jsonl_bytes(chunks):
+    for chunk in chunks:
+        if len(chunk):
+            yield chunk.to_json(orient='records', lines=True, force_ascii=False).rstrip("\n").encode("utf-8") + b"\n"
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:  # pragma: no cover - depends on the environment
+        raise ImportError("Parquet export needs pyarrow (pip install pyarrow)") from None
+    return pa, pq
+
+
+def _arrow_schema(pa, chunk):
+    # Text columns stay strings even when a slice holds only nulls
+    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type) or chunk[field.name].dtype == object:
+            schema = schema.set(i, pa.field(field.name, pa.string()))
+    return schema
+
+
+def parquet_bytes(chunks):
+    """One row group per chunk; bytes are handed on as soon as each group is written"""
+    pa, pq = _pyarrow()
+    buffer = io.BytesIO()
+    writer = None
+    for chunk in chunks:
+        if writer is None:
+            schema = _arrow_schema(pa, chunk)
+            writer = pq.ParquetWriter(buffer, schema)
+        writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        yield _drain(buffer)
+    if writer is not None:
+        writer.close()
+        yield _drain(buffer)
+
+
+def _drain(buffer):
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+ENCODERS = {'csv': csv_bytes, 'jsonl': jsonl_bytes, 'parquet': parquet_bytes}
+
+
+# ------------------------------------------------------------------
+# STIX 2.1
+# ------------------------------------------------------------------
+
+def stix_id(kind, key):
+    return f"{kind}--{uuid.uuid5(STIX_NAMESPACE, f'{kind}:{key}')}"
+
+
+def _stix_control(row, timestamp):
+    return {
+        'type': "course-of-action", 'spec_version': "2.1", 'id': stix_id("course-of-action", row['node_id']),
+        'created': timestamp, 'modified': timestamp,
+        'name': f"{row['node_id']}: {row.get('title') or ''}".rstrip(": "),
+        'description': row.get('description') or "",
+        'external_references': [{'source_name': "NIST SP 800-53", 'external_id': row['node_id']}],
+    }
+
+
+def _stix_technique(row, timestamp):
+    obj = {
+        'type': "attack-pattern", 'spec_version': "2.1", 'id': stix_id("attack-pattern", row['node_id']),
+        'created': timestamp, 'modified': timestamp,
+        'name': row.get('name') or row['node_id'],
+        'description': row.get('description') or "",
+        'external_references': [{'source_name': "mitre-attack", 'external_id': row['node_id']}],
+    }
+    tactic = row.get('tactic')
+    if isinstance(tactic, str) and tactic:
+        obj['kill_chain_phases'] = [{'kill_chain_name': "mitre-attack",
+                                     'phase_name': _PHASES.get(tactic, tactic.lower().replace(" ", "-"))}]
+    return obj
+
+
+def _stix_requirement(row, timestamp):
+    return {
+        'type': "course-of-action", 'spec_version': "2.1",
+        'id': stix_id("course-of-action", row['requirement_id']),
+        'created': timestamp, 'modified': timestamp,
+        'name': f"{row['requirement_id']}: {row.get('title') or ''}".rstrip(": "),
+        'description': row.get('description') or "",
+        'external_references': [{'source_name': "NIST AI RMF", 'external_id': row['requirement_id']}],
+    }
+
+
+STIX_NODES = {
+    'nist_controls': ("node_id", _stix_control),
+    'mitre_techniques': ("node_id", _stix_technique),
+    'ai_rmf_mapping': ("requirement_id", _stix_requirement),
+}
+
+
+# Edge table -> (source column, target column)
+EDGE_ENDPOINTS = {
+    'nist_mitre_mapping': ("nist_control_id", "mitre_technique_id"),
+    'relationships': ("source_id", "target_id"),
+}
+
+
+def _stix_refs(tables):
+    """Node id -> STIX id over all node tables (computed once per export)"""
+    refs = pd.concat([
+        pd.Series(tables[table][key].to_numpy(), index=pd.Index(tables[table][key]))
+        .map(lambda node_id, kind=("attack-pattern" if table == 'mitre_techniques' else "course-of-action"):
+             stix_id(kind, node_id))
+        for table, (key, _) in STIX_NODES.items() if table in tables
+    ])
+    return refs[~refs.index.duplicated()]
+
+
+def stix_objects(tables, nodes=None, edges=None, chunk_rows=CHUNK_ROWS):
+    """STIX objects for node rows ``{table: positions or None}`` and edge chunks
+
+    ``edges`` is an iterable of ``GRAPH_COLUMNS`` DataFrames; edges whose
+    endpoints are not nodes of the tables are skipped.
+    """
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    for table, positions in (nodes or {}).items():
+        key, build = STIX_NODES[table]
+        for chunk in table_chunks(tables[table], positions, chunk_rows=chunk_rows):
+            for row in chunk.to_dict('records'):
+                yield build({k: (None if isinstance(v, float) and np.isnan(v) else v) for k, v in row.items()},
+                            timestamp)
+    if edges is None:
+        return
+    refs = _stix_refs(tables)
+    for chunk in edges:
+        source_refs = refs.reindex(chunk['source_id']).to_numpy(dtype=object)
+        target_refs = refs.reindex(chunk['target_id']).to_numpy(dtype=object)
+        for source, target, kind, bfo_type, confidence, source_ref, target_ref in zip(
+                chunk['source_id'], chunk['target_id'], chunk['relationship'], chunk['bfo_type'],
+                chunk['confidence'], source_refs, target_refs):
+            if not isinstance(source_ref, str) or not isinstance(target_ref, str):
+                continue
+            obj = {
+                'type': "relationship", 'spec_version': "2.1",
+                'id': stix_id("relationship", f"{source}|{kind}|{target}"),
+                'created': timestamp, 'modified': timestamp,
+                'relationship_type': kind.lower().replace("_", "-"),
+                'source_ref': source_ref,
+                'target_ref': target_ref,
+                'x_imgo_bfo_type': bfo_type,
+            }
+            if not pd.isna(confidence):
+                obj['confidence'] = int(round(float(confidence) * 100))
+            yield obj
+
+
+def stix_bytes(objects, chunk_objects=CHUNK_ROWS):
+    """A STIX 2.1 bundle serialized object by object"""
+    yield json.dumps({'type': "bundle", 'id': f"bundle--{uuid.uuid4()}"})[:-1].encode("utf-8") + b', "objects": ['
+    batch = []
+    first = True
+    for obj in objects:
+        batch.append(json.dumps(obj, ensure_ascii=False))
+        if len(batch) >= chunk_objects:
+            yield ((b"" if first else b",") + ",".join(batch).encode("utf-8"))
+            batch, first = [], False
+    if batch:
+        yield (b"" if first else b",") + ",".join(batch).encode("utf-8")
+    yield b"]}\n"
+
+
+# ------------------------------------------------------------------
+# Exports
+# ------------------------------------------------------------------
+
+def coerce(column, value):
+    """``value`` as the dtype of ``column`` when it is given as a string (CLI filters)"""
+    if not isinstance(value, str) or column.dtype == object or pd.api.types.is_string_dtype(column):
+        return value
+    if pd.api.types.is_bool_dtype(column):
+        return value.strip().lower() in ("1", "true", "yes")
+    try:
+        return pd.Series([value.strip()]).astype(column.dtype).iloc[0]
+    except (TypeError, ValueError):
+        raise ValueError(f"{column.name}: {value!r} is not a {column.dtype} value") from None
+
+
+def select(dataset, source, equals=None, ranges=None, sort_by=None, ascending=True):
+    """Row positions of a table source after filters and sort (all rows when unfiltered)
+
+    String ``equals`` values are coerced to the column dtype, so
+    ``fkgl_score="24.5"`` matches the float 24.5.
+    """
+    table = TABLE_SOURCES[source]
+    view = dataset.views[source] if source in core.BROWSABLE else paging.TableView(dataset.tables[table])
+    for column in [*(equals or {}), *(ranges or {}), *([sort_by] if sort_by else [])]:
+        if column not in view.df:
+            raise ValueError(f"Unknown column for {source}: {column}")
+    equals = {column: coerce(view.df[column], value) for column, value in (equals or {}).items()}
+    return view.order(view.select(equals=equals, ranges=ranges), sort_by, ascending)
+
+
+def table_export(tables, source, fmt, positions=None, chunk_rows=CHUNK_ROWS):
+    """Byte chunks of a table source (``TABLE_SOURCES``) at ``positions``"""
+    table = TABLE_SOURCES[source]
+    if fmt != 'stix':
+        return ENCODERS[fmt](table_chunks(tables[table], positions, chunk_rows=chunk_rows))
+    if table in STIX_NODES:
+        return stix_bytes(stix_objects(tables, nodes={table: positions}, chunk_rows=chunk_rows))
+    # Edge tables: the relationships plus the nodes they connect
+    rows = tables[table] if positions is None else tables[table].iloc[positions]
+    edges = graph_chunks({table: rows} if table == 'nist_mitre_mapping'
+                         else {'nist_mitre_mapping': tables['nist_mitre_mapping'].iloc[:0], table: rows},
+                         chunk_rows=chunk_rows)
+    source, target = EDGE_ENDPOINTS[table]
+    endpoints = pd.Index(pd.concat([rows[source], rows[target]], ignore_index=True).unique())
+    nodes = {
+        name: np.flatnonzero(tables[name][key].isin(endpoints).to_numpy())
+        for name, (key, _) in STIX_NODES.items() if name in tables
+    }
+    return stix_bytes(stix_objects(tables, nodes=nodes, edges=edges, chunk_rows=chunk_rows))
+
+
+def graph_export(tables, fmt, chunk_rows=CHUNK_ROWS):
+    """The full graph: an edge list, or in STIX every node and relationship"""
+    if fmt == 'stix':
+        nodes = {name: None for name in STIX_NODES if name in tables}
+        return stix_bytes(stix_objects(tables, nodes=nodes, edges=graph_chunks(tables, chunk_rows),
+                                       chunk_rows=chunk_rows))
+    return ENCODERS[fmt](graph_chunks(tables, chunk_rows))
+
+
+def paths_export(paths, fmt, chunk_rows=CHUNK_ROWS):
+    return ENCODERS[fmt](path_chunks(paths, nested=fmt == 'jsonl', chunk_rows=chunk_rows))
+
+
+def frame_export(df, fmt, chunk_rows=CHUNK_ROWS):
+    """Byte chunks of a computed DataFrame (coverage results, pages)"""
+    return ENCODERS[fmt](table_chunks(df, chunk_rows=chunk_rows))
+
+
+def to_bytes(chunks):
+    return b"".join(chunks)
+
+
+def write(chunks, path):
+    """Stream byte chunks to ``path`` (atomic replace); returns the bytes written"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    written = 0
+    try:
+        with open(tmp, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return written
+
+
+def _pairs(values, parse=str):
+    pairs = {}
+    for value in values or []:
+        column, sep, rest = value.partition("=")
+        if not sep:
+            raise SystemExit(f"Expected column=value, got {value!r}")
+        pairs[column] = parse(rest)
+    return pairs
+
+
+def _range(value):
+    low, _, high = value.partition(":")
+    return (float(low) if low else -np.inf, float(high) if high else np.inf)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export IMGO views, paths and coverage results")
+    parser.add_argument("source", choices=SOURCES)
+    parser.add_argument("--format", choices=list(FORMATS), default='csv')
+    parser.add_argument("--output", help="output file (default: stdout)")
+    parser.add_argument("--data-path", default=str(config.DATA_PATH))
+    parser.add_argument("--snapshot-path", default=str(config.SNAPSHOT_PATH))
+    parser.add_argument("--where", action="append", help="equality filter column=value (table sources)")
+    parser.add_argument("--range", action="append", help="range filter column=low:high (table sources)")
+    parser.add_argument("--sort", help="sort column (table sources)")
+    parser.add_argument("--descending", action="store_true")
+    parser.add_argument("--path-source", action="append", help="compute best paths from this control (paths)")
+    parser.add_argument("--min-confidence", type=float, default=0.8, help="coverage threshold (gaps)")
+    parser.add_argument("--tactic", help="only this tactic (gaps)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+    if args.format not in formats(args.source):
+        parser.error(f"{args.format} export is not available for {args.source}")
+    dataset = core.Dataset.load(args.data_path, args.snapshot_path)
+    tables = dataset.tables
+
+    start = time.perf_counter()
+    if args.source in TABLE_SOURCES:
+        try:
+            positions = select(dataset, args.source, equals=_pairs(args.where), ranges=_pairs(args.range, _range),
+                               sort_by=args.sort, ascending=not args.descending)
+        except ValueError as e:
+            parser.error(str(e))
+        rows = len(positions)
+        chunks = table_export(tables, args.source, args.format, positions, args.chunk_rows)
+    elif args.source == 'graph':
+        rows = len(tables['nist_mitre_mapping']) + len(tables.get('relationships', ()))
+        chunks = graph_export(tables, args.format, args.chunk_rows)
+    elif args.source == 'paths':
+        paths = tables['graphrag_paths']
+        if args.path_source:
+            paths = [p for source in args.path_source for p in dataset.paths(source)['paths']]
+        rows = len(paths)
+        chunks = paths_export(paths, args.format, args.chunk_rows)
+    else:
+        gaps = dataset.coverage.uncovered_techniques(min_confidence=args.min_confidence, tactic=args.tactic)
+        rows = len(gaps)
+        chunks = frame_export(gaps, args.format, args.chunk_rows)
+
+    if args.output:
+        written = write(chunks, args.output)
+    else:
+        written = 0
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+            written += len(chunk)
+        sys.stdout.buffer.flush()
+    seconds = time.perf_counter() - start
+    logger.info("Exported %d %s rows as %s: %.1f MB in %.2fs (%.0f rows/s, %.1f MB/s)",
+                rows, args.source, args.format, written / 1e6, seconds,
+                rows / seconds if seconds else 0, written / 1e6 / seconds if seconds else 0)
+
+
+if __name__ == "__main__":
+    main()
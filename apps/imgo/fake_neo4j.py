@@ -0,0 +1,94 @@
+"""
+In-process stand-in for the Neo4j Python driver
+
+Implements the small part of the driver API used by IMGO
+(``driver.session()``, ``session.execute_read/execute_write``, ``tx.run``)
+and records every statement with its parameters, so loaders and backends
+can be exercised without a database.
+"""
+
+import threading
+
+
+class FakeResult:
+    def __init__(self, records=None):
+        self._records = list(records or [])
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def data(self):
+        return list(self._records)
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+    def consume(self):
+        return None
+
+
+class FakeTransaction:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        params = dict(parameters or {}, **kwargs)
+        return self._driver._execute(query, params)
+
+
+class FakeSession:
+    def __init__(self, driver, database=None):
+        self._driver = driver
+        self.database = database
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        pass
+
+    def run(self, query, parameters=None, **kwargs):
+        return FakeTransaction(self._driver).run(query, parameters, **kwargs)
+
+    def execute_write(self, fn, *args, **kwargs):
+        return fn(FakeTransaction(self._driver), *args, **kwargs)
+
+    def execute_read(self, fn, *args, **kwargs):
+        return fn(FakeTransaction(self._driver), *args, **kwargs)
+
+
+class FakeDriver:
+    """Records statements; optionally answers them via a responder callable
+
+    ``responder(query, params)`` may return a list of record dicts; when it
+    is omitted every statement returns an empty result.
+    """
+
+    def __init__(self, responder=None):
+        self.responder = responder
+        self.statements = []
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def session(self, database=None, **kwargs):
+        return FakeSession(self, database)
+
+    def verify_connectivity(self):
+        return None
+
+    def close(self):
+        self.closed = True
+
+    def _execute(self, query, params):
+        with self._lock:
+            self.statements.append((query, params))
+        records = self.responder(query, params) if self.responder else None
+        return FakeResult(records)
+
+    def rows_written(self):
+        """Total rows sent through ``UNWIND $rows`` statements"""
+        with self._lock:
+            return sum(len(p.get('rows', ())) for _, p in self.statements)
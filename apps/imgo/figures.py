@@ -0,0 +1,273 @@
+"""
+Plotly figure builders with memoized, size-bounded specs
+
+Overview and relationship charts are rebuilt only when the data version
+or the filter state changes: ``get`` keeps built figures in a
+process-wide LRU keyed by ``(name, data version, filter state)`` and
+bounded by entry count and an estimate of their size (the trace arrays;
+figures are not serialized just to be measured).
+
+Builders keep the figure size independent of the data size:
+
+- histograms take pre-binned counts (``AggregateCube.histogram``)
+- category charts fold the long tail into "Other"
+- the NIST-MITRE network keeps the ``max_edges`` most confident edges,
+  draws edges as one ``scattergl`` line trace per confidence band (NaN
+  separated segments) and nodes as ``scattergl`` markers, so tens of
+  thousands of edges render on the GPU
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+CACHE_ENTRIES = 64
+CACHE_MAX_BYTES = 64 * 1024 * 1024  # estimated, see figure_bytes
+MAX_CATEGORIES = 24  # NIST has 20 control families, ATT&CK 14 tactics
+MAX_NETWORK_EDGES = 50000
+CONFIDENCE_BANDS = [(0.0, 0.7, "#c6dbef"), (0.7, 0.85, "#6baed6"), (0.85, 0.95, "#2171b5"),
+                    (0.95, 1.0, "#08306b")]
+TRANSPARENT = 'rgba(0,0,0,0)'
+ARRAY_PROPS = ('x', 'y', 'z', 'values', 'labels', 'text', 'hovertext', 'customdata')
+LAYOUT_BYTES = 4096  # allowance per figure for the layout and scalar trace properties
+ITEM_BYTES = 16      # per element of a non-numpy sequence
+
+
+def figure_bytes(figure):
+    """Cheap size estimate of a figure: its trace arrays plus a fixed layout allowance"""
+    total = LAYOUT_BYTES
+    for trace in figure.data:
+        for prop in ARRAY_PROPS:
+            value = trace[prop] if prop in trace else None
+            if value is None or isinstance(value, str):
+                continue
+            nbytes = getattr(value, 'nbytes', None)
+            total += nbytes if nbytes is not None else ITEM_BYTES * len(value)
+    return total
+
+
+class FigureCache:
+    """LRU of built figures keyed by (name, data version, filter state)"""
+
+    def __init__(self, max_entries=CACHE_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        figure = build()
+        entry = {'figure': figure, 'bytes': figure_bytes(figure)}
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = entry
+                self.bytes += entry['bytes']
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries
+                                              or self.bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted['bytes']
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+
+cache = FigureCache()
+
+
+def get(name, version, build, state=()):
+    """Memoized figure for ``name`` at ``version`` and filter ``state`` (hashable)"""
+    return cache.get((name, version, state), build)['figure']
+
+
+# ------------------------------------------------------------------
+# Downsampling
+# ------------------------------------------------------------------
+
+def fold_categories(counts, max_categories=MAX_CATEGORIES):
+    """Keep the largest ``max_categories - 1`` entries of a count Series and sum the rest as "Other" """
+    if len(counts) <= max_categories:
+        return counts
+    counts = counts.sort_values(ascending=False)
+    head = counts.iloc[:max_categories - 1].copy()
+    head.loc["Other"] = counts.iloc[max_categories - 1:].sum()
+    return head
+
+
+def top_edges(edges, confidence, max_edges=MAX_NETWORK_EDGES):
+    """The ``max_edges`` most confident of ``edges`` (all of them when fewer)"""
+    if len(edges) <= max_edges:
+        return edges
+    keep = np.argpartition(-confidence[edges], max_edges - 1)[:max_edges]
+    return np.sort(edges[keep])
+
+
+# ------------------------------------------------------------------
+# Builders
+# ------------------------------------------------------------------
+
+def _go():
+    import plotly.graph_objects as go
+    return go
+
+
+def category_pie(counts, title):
+    go = _go()
+    import plotly.express as px
+
+    counts = fold_categories(counts)
+    fig = go.Figure(data=[go.Pie(labels=list(counts.index), values=counts.to_numpy(),
+                                 marker=dict(colors=px.colors.sequential.Blues_r))])
+    fig.update_layout(title=title, legend_title_text=None)
+    return fig
+
+
+def category_bar(counts, title, x_title, y_title="Count", colorscale='Reds'):
+    go = _go()
+    counts = fold_categories(counts)
+    fig = go.Figure(data=[go.Bar(
+        x=list(counts.index), y=counts.to_numpy(),
+        marker=dict(color=counts.to_numpy(), colorscale=colorscale, showscale=True,
+                    colorbar=dict(title=y_title)),
+    )])
+    fig.update_layout(title=title, xaxis_title=x_title, yaxis_title=y_title)
+    return fig
+
+
+def histogram_bar(counts, bins, title, x_title, color, precision=1):
+    """Bar chart of pre-binned counts (``np.histogram``-style edges)"""
+    go = _go()
+    labels = [f"{bins[i]:.{precision}f}-{bins[i + 1]:.{precision}f}" for i in range(len(bins) - 1)]
+    fig = go.Figure(data=[go.Bar(
+        x=labels, y=counts, text=counts, textposition='outside',
+        marker=dict(color=color, line=dict(color='white', width=2)),
+    )])
+    fig.update_layout(
+        title=title, xaxis_title=x_title, yaxis_title="Count", showlegend=False, bargap=0.2,
+        height=400, plot_bgcolor=TRANSPARENT, paper_bgcolor=TRANSPARENT,
+    )
+    return fig
+
+
+def heatmap(matrix, title, x_title, y_title, colorscale='Blues', value_title="Count"):
+    """Heatmap of a count DataFrame (rows on y, columns on x), zero cells left blank"""
+    go = _go()
+    values = matrix.to_numpy()
+    fig = go.Figure(data=[go.Heatmap(
+        z=np.where(values > 0, values, np.nan), x=list(matrix.columns), y=list(matrix.index),
+        colorscale=colorscale, colorbar=dict(title=value_title), hoverongaps=False,
+        text=values, texttemplate="%{text}", hovertemplate="%{y} × %{x}: %{z}<extra></extra>",
+    )])
+    fig.update_layout(
+        title=title, xaxis_title=x_title, yaxis_title=y_title,
+        height=max(400, 28 * len(matrix.index) + 160), yaxis=dict(autorange='reversed'),
+        plot_bgcolor=TRANSPARENT, paper_bgcolor=TRANSPARENT,
+    )
+    return fig
+
+
+def _positions(ids, order_keys):
+    """y in [0, 1] for each id, spread evenly in ``order_keys`` order"""
+    order = np.lexsort(order_keys[::-1]) if order_keys else np.arange(len(ids))
+    y = np.empty(len(ids), dtype=np.float64)
+    y[order] = np.linspace(1.0, 0.0, len(ids)) if len(ids) > 1 else 0.5
+    return y
+
+
+def network(index, tables, min_confidence=0.0, family=None, max_edges=MAX_NETWORK_EDGES):
+    """Bipartite NIST control -> MITRE technique graph (MITIGATES edges) in WebGL
+
+    Controls sit on the left ordered by id, techniques on the right ordered
+    by tactic; edges are shaded by confidence band.
+    """
+    go = _go()
+    controls_table = tables['nist_controls'].set_index('node_id')
+    edges = index.edges_in_range(min_confidence, 1.0, kind="MITIGATES")
+    if family is not None:
+        families = controls_table['family'].reindex(index.node_ids).to_numpy(dtype=object)
+        edges = edges[families[index.src[edges]] == family]
+    total = len(edges)
+    edges = top_edges(edges, np.asarray(index.confidence), max_edges)
+
+    src = np.asarray(index.src[edges])
+    dst = np.asarray(index.dst[edges])
+    conf = np.asarray(index.confidence[edges])
+    controls, control_pos = np.unique(src, return_inverse=True)
+    techniques, technique_pos = np.unique(dst, return_inverse=True)
+
+    titles = controls_table['title']
+    technique_info = tables['mitre_techniques'].set_index('node_id')
+    control_ids = index.node_ids[controls]
+    technique_ids = index.node_ids[techniques]
+    tactics = technique_info['tactic'].reindex(technique_ids).fillna("").to_numpy(dtype=object)
+
+    control_y = _positions(control_ids, [control_ids.astype(str)])
+    technique_y = _positions(technique_ids, [tactics.astype(str), technique_ids.astype(str)])
+
+    traces = []
+    for low, high, color in CONFIDENCE_BANDS:
+        band = (conf >= low) & ((conf < high) if high < 1.0 else (conf <= high))
+        if not band.any():
+            continue
+        n = int(band.sum())
+        x = np.tile([0.0, 1.0, np.nan], n)
+        y = np.empty(n * 3)
+        y[0::3] = control_y[control_pos[band]]
+        y[1::3] = technique_y[technique_pos[band]]
+        y[2::3] = np.nan
+        traces.append(go.Scattergl(
+            x=x, y=y, mode='lines', line=dict(width=0.6, color=color), opacity=0.5,
+            hoverinfo='skip', name=f"confidence {low:.2f}-{high:.2f} ({n:,})",
+        ))
+
+    control_degree = np.bincount(control_pos, minlength=len(controls))
+    technique_degree = np.bincount(technique_pos, minlength=len(techniques))
+    traces.append(go.Scattergl(
+        x=np.zeros(len(controls)), y=control_y, mode='markers', name="NIST controls",
+        marker=dict(size=np.clip(4 + np.sqrt(control_degree), 4, 16), color="#1f77b4"),
+        text=[f"{c}: {titles.get(c, '')}<br>{d} mapped techniques"
+              for c, d in zip(control_ids, control_degree)],
+        hoverinfo='text',
+    ))
+    traces.append(go.Scattergl(
+        x=np.ones(len(techniques)), y=technique_y, mode='markers', name="MITRE techniques",
+        marker=dict(size=np.clip(4 + np.sqrt(technique_degree), 4, 16), color="#d62728"),
+        text=[f"{t}: {technique_info['name'].get(t, '')}<br>{tactic}<br>{d} mapped controls"
+              for t, tactic, d in zip(technique_ids, tactics, technique_degree)],
+        hoverinfo='text',
+    ))
+
+    shown = f"{len(edges):,} of {total:,}" if len(edges) < total else f"{total:,}"
+    fig = go.Figure(data=traces)
+    fig.update_layout(
+        title=f"NIST → MITRE Mitigation Network ({shown} edges)",
+        height=700, hovermode='closest', showlegend=True,
+        xaxis=dict(visible=False, range=[-0.15, 1.15]), yaxis=dict(visible=False),
+        plot_bgcolor=TRANSPARENT, paper_bgcolor=TRANSPARENT,
+        legend=dict(orientation='h', y=-0.05),
+    )
+    return fig
@@ -0,0 +1,290 @@
+"""
+In-memory adjacency index for the NIST / MITRE / AI RMF graph
+
+Nodes are interned to dense integer ids and edges are stored in CSR form
+(forward and reverse) with parallel arrays for edge kind, confidence and
+the originating table row. Within each node's slice edges are ordered by
+descending confidence, so confidence-range filters are binary searches
+rather than DataFrame scans.
+
+The arrays can be persisted next to the data snapshot and reopened
+memory-mapped, so every process serving the same version shares one
+copy through the page cache.
+
+Edge kinds and their BFO properties follow
+``neo4j_bfo/02_add_bfo_relationship_properties.cypher``.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Relationship type -> BFO relationship property
+BFO_TYPES = {
+    "MITIGATES": "realized_in",
+    "ADDRESSES": "is_about",
+    "RELATED_TO": "is_about",
+    "BELONGS_TO": "is_about",
+    "USES": "participates_in",
+}
+EDGE_KINDS = tuple(BFO_TYPES)
+
+# Edge origin -> source table
+ORIGIN_MAPPING = 0          # nist_mitre_mapping
+ORIGIN_RELATIONSHIPS = 1    # relationships
+
+UNKNOWN_LABEL = "Unknown"
+INDEX_DIR = "graph"
+
+
+def kind_code(kind):
+    """Integer code for a relationship type name"""
+    try:
+        return EDGE_KINDS.index(kind)
+    except ValueError:
+        raise KeyError(f"Unknown relationship type: {kind}") from None
+
+
+class GraphIndex:
+    """CSR adjacency over interned node ids"""
+
+    def __init__(self, node_ids, node_labels, src, dst, kind, confidence,
+                 origin, row):
+        self.node_ids = np.asarray(node_ids, dtype=object)
+        self.node_labels = np.asarray(node_labels, dtype=object)
+        self._lookup = {node_id: i for i, node_id in enumerate(self.node_ids)}
+
+        self.src = np.asarray(src, dtype=np.int32)
+        self.dst = np.asarray(dst, dtype=np.int32)
+        self.kind = np.asarray(kind, dtype=np.uint8)
+        self.confidence = np.asarray(confidence, dtype=np.float64)
+        self.origin = np.asarray(origin, dtype=np.uint8)
+        self.row = np.asarray(row, dtype=np.int64)
+
+        n = len(self.node_ids)
+        self.fwd_offsets, self.fwd_edges = self._csr(self.src, n)
+        self.rev_offsets, self.rev_edges = self._csr(self.dst, n)
+
+        # Global confidence order for range queries without a start node
+        self._conf_order = np.argsort(self.confidence, kind="stable").astype(np.int32)
+        self._conf_sorted = self.confidence[self._conf_order]
+
+    def _csr(self, keys, n):
+        order = np.lexsort((-self.confidence, keys)).astype(np.int32)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=n), out=offsets[1:])
+        return offsets, order
+
+    # ------------------------------------------------------------------
+    # Persist
+    # ------------------------------------------------------------------
+
+    # Attribute -> file name; everything derived in __init__ is stored too
+    ARRAYS = {
+        'src': "src", 'dst': "dst", 'kind': "kind", 'confidence': "confidence",
+        'origin': "origin", 'row': "row",
+        'fwd_offsets': "fwd_offsets", 'fwd_edges': "fwd_edges",
+        'rev_offsets': "rev_offsets", 'rev_edges': "rev_edges",
+        '_conf_order': "conf_order", '_conf_sorted': "conf_sorted",
+    }
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for attr, name in self.ARRAYS.items():
+            np.save(path / f"{name}.npy", getattr(self, attr))
+        with open(path / "nodes.json", 'w') as f:
+            json.dump({'node_ids': self.node_ids.tolist(), 'node_labels': self.node_labels.tolist()}, f)
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map a persisted index (read-only, no CSR rebuild)"""
+        path = Path(path)
+        with open(path / "nodes.json", 'r') as f:
+            nodes = json.load(f)
+        index = cls.__new__(cls)
+        index.node_ids = np.asarray(nodes['node_ids'], dtype=object)
+        index.node_labels = np.asarray(nodes['node_labels'], dtype=object)
+        index._lookup = {node_id: i for i, node_id in enumerate(index.node_ids)}
+        for attr, name in cls.ARRAYS.items():
+            setattr(index, attr, np.load(path / f"{name}.npy", mmap_mode='r'))
+        return index
+
+    # ------------------------------------------------------------------
+    # Nodes
+    # ------------------------------------------------------------------
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self):
+        return len(self.src)
+
+    def __contains__(self, node_id):
+        return node_id in self._lookup
+
+    def node_index(self, node_id):
+        """Dense id for ``node_id`` (KeyError if unknown)"""
+        return self._lookup[node_id]
+
+    def label(self, node_id):
+        return self.node_labels[self._lookup[node_id]]
+
+    def nodes(self, label=None):
+        """Node ids, optionally restricted to one domain label"""
+        if label is None:
+            return self.node_ids.tolist()
+        return self.node_ids[self.node_labels == label].tolist()
+
+    # ------------------------------------------------------------------
+    # Edges
+    # ------------------------------------------------------------------
+
+    def _slice(self, node_id, reverse):
+        i = self._lookup.get(node_id)
+        if i is None:
+            return np.empty(0, dtype=np.int32)
+        offsets, edges = (self.rev_offsets, self.rev_edges) if reverse \
+            else (self.fwd_offsets, self.fwd_edges)
+        return edges[offsets[i]:offsets[i + 1]]
+
+    def _filter(self, edges, kind, conf_range):
+        if kind is not None:
+            edges = edges[self.kind[edges] == kind_code(kind)]
+        if conf_range is not None:
+            # Slices are sorted by descending confidence
+            neg = -self.confidence[edges]
+            lo = np.searchsorted(neg, -conf_range[1], side="left")
+            hi = np.searchsorted(neg, -conf_range[0], side="right")
+            edges = edges[lo:hi]
+        return edges
+
+    def out_edges(self, node_id, kind=None, conf_range=None):
+        """Edge ids leaving ``node_id``, highest confidence first"""
+        return self._filter(self._slice(node_id, False), kind, conf_range)
+
+    def in_edges(self, node_id, kind=None, conf_range=None):
+        """Edge ids entering ``node_id``, highest confidence first"""
+        return self._filter(self._slice(node_id, True), kind, conf_range)
+
+    def neighbors(self, node_id, kind=None, conf_range=None, reverse=False):
+        """Adjacent node ids (successors, or predecessors if ``reverse``)"""
+        if reverse:
+            edges = self.in_edges(node_id, kind, conf_range)
+            return self.node_ids[self.src[edges]].tolist()
+        edges = self.out_edges(node_id, kind, conf_range)
+        return self.node_ids[self.dst[edges]].tolist()
+
+    def out_degree(self, node_id, kind=None):
+        return len(self.out_edges(node_id, kind))
+
+    def in_degree(self, node_id, kind=None):
+        return len(self.in_edges(node_id, kind))
+
+    def degrees(self, kind=None, reverse=False):
+        """Degree of every node as an array aligned with ``node_ids``"""
+        keys = self.dst if reverse else self.src
+        if kind is not None:
+            keys = keys[self.kind == kind_code(kind)]
+        return np.bincount(keys, minlength=self.num_nodes)
+
+    def sources(self, kind=None):
+        """Node ids with at least one outgoing edge of ``kind``"""
+        return self.node_ids[self.degrees(kind) > 0].tolist()
+
+    def edges_in_range(self, lo, hi, kind=None):
+        """All edge ids with ``lo <= confidence <= hi``, in edge order"""
+        start = np.searchsorted(self._conf_sorted, lo, side="left")
+        stop = np.searchsorted(self._conf_sorted, hi, side="right")
+        edges = np.sort(self._conf_order[start:stop])
+        if kind is not None:
+            edges = edges[self.kind[edges] == kind_code(kind)]
+        return edges
+
+    def edge_rows(self, edges, origin=ORIGIN_MAPPING):
+        """Source-table row positions for the edges that came from ``origin``"""
+        edges = np.asarray(edges, dtype=np.int64)
+        return np.sort(self.row[edges[self.origin[edges] == origin]])
+
+    def edge_records(self, edges):
+        """Edges as plain dicts (source, target, relationship, bfo_type, confidence)"""
+        return [
+            {
+                'source': self.node_ids[self.src[e]],
+                'target': self.node_ids[self.dst[e]],
+                'relationship': EDGE_KINDS[self.kind[e]],
+                'bfo_type': BFO_TYPES[EDGE_KINDS[self.kind[e]]],
+                'confidence': float(self.confidence[e]),
+            }
+            for e in edges
+        ]
+
+
+def build_index(data):
+    """Build a GraphIndex from the tables returned by ``load_data()``"""
+    controls = data['nist_controls']
+    techniques = data['mitre_techniques']
+    requirements = data['ai_rmf_mapping']
+    mapping = data['nist_mitre_mapping']
+    relationships = data.get('relationships')
+
+    node_ids = pd.Index(
+        pd.concat([
+            controls['node_id'], techniques['node_id'], requirements['requirement_id'],
+        ], ignore_index=True)
+    )
+    labels = pd.concat([
+        controls['label'],
+        techniques['label'],
+        pd.Series("AIRMFRequirement", index=requirements.index),
+    ], ignore_index=True)
+    first = ~node_ids.duplicated()
+    node_ids, labels = node_ids[first], labels[first].to_numpy()
+
+    # Edge lists from each source table
+    src_ids = [mapping['nist_control_id']]
+    dst_ids = [mapping['mitre_technique_id']]
+    kinds = [np.full(len(mapping), kind_code("MITIGATES"), dtype=np.uint8)]
+    conf = [mapping['mapping_confidence'].to_numpy(dtype=np.float64)]
+    origin = [np.full(len(mapping), ORIGIN_MAPPING, dtype=np.uint8)]
+    rows = [np.arange(len(mapping))]
+
+    if relationships is not None and len(relationships):
+        src_ids.append(relationships['source_id'])
+        dst_ids.append(relationships['target_id'])
+        kinds.append(np.array([kind_code(k) for k in relationships['relationship']], dtype=np.uint8))
+        conf.append(relationships['confidence'].fillna(1.0).to_numpy(dtype=np.float64))
+        origin.append(np.full(len(relationships), ORIGIN_RELATIONSHIPS, dtype=np.uint8))
+        rows.append(np.arange(len(relationships)))
+
+    src_ids = pd.concat(src_ids, ignore_index=True)
+    dst_ids = pd.concat(dst_ids, ignore_index=True)
+
+    # Endpoints missing from the node tables are interned with an unknown label
+    endpoints = pd.Index(pd.concat([src_ids, dst_ids], ignore_index=True)).unique()
+    missing = endpoints[node_ids.get_indexer(endpoints) < 0]
+    if len(missing):
+        node_ids = node_ids.append(missing)
+        labels = np.concatenate([labels, np.full(len(missing), UNKNOWN_LABEL, dtype=object)])
+
+    return GraphIndex(
+        node_ids=node_ids.to_numpy(dtype=object),
+        node_labels=labels,
+        src=node_ids.get_indexer(src_ids),
+        dst=node_ids.get_indexer(dst_ids),
+        kind=np.concatenate(kinds),
+        confidence=np.concatenate(conf),
+        origin=np.concatenate(origin),
+        row=np.concatenate(rows),
+    )
+
+
+def load_index(data, version_dir=None):
+    """Open the persisted index for this snapshot version, or build in memory"""
+    if version_dir is not None and (Path(version_dir) / INDEX_DIR / "nodes.json").exists():
+        return GraphIndex.open(Path(version_dir) / INDEX_DIR)
+    return build_index(data)
@@ -0,0 +1,312 @@
+"""
+Streaming importers for the NIST SP 800-53 OSCAL catalog and the MITRE
+ATT&CK STIX 2.1 bundle
+
+Both sources are parsed iteratively with ijson (one control or STIX
+object in memory at a time) and written in chunks to the exact CSV
+schemas of ``data/sample``:
+
+- ``nist_controls_sample.csv``: controls and control enhancements
+  (``ac-2.1`` becomes ``AC-2(1)``), statement prose with parameter
+  placeholders resolved, FKGL scored per chunk
+- ``mitre_techniques_sample.csv``: techniques and sub-techniques
+  (``T1195.001``), revoked and deprecated objects skipped, one tactic
+  per technique (the earliest in kill-chain order)
+
+The output directory is a complete data directory (tables not imported
+are copied from ``--base``), so it can be compiled straight into the
+columnar snapshot or applied with ``imgo.delta``.
+
+Usage::
+
+    python -m imgo.importers --oscal NIST_SP-800-53_rev5_catalog.json \\
+        --stix enterprise-attack.json --output data/import --snapshot-path data/snapshot
+"""
+
+import argparse
+import logging
+import os
+import re
+import resource
+import shutil
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from imgo import config, readability, snapshot
+
+logger = logging.getLogger(__name__)
+
+CONTROL_COLUMNS = ['node_id', 'label', 'family', 'title', 'description', 'fkgl_score']
+TECHNIQUE_COLUMNS = ['node_id', 'label', 'name', 'tactic', 'description']
+CHUNK_ROWS = 2000
+
+# ATT&CK tactics in kill-chain order (phase name -> display name)
+TACTICS = {
+    "reconnaissance": "Reconnaissance",
+    "resource-development": "Resource Development",
+    "initial-access": "Initial Access",
+    "execution": "Execution",
+    "persistence": "Persistence",
+    "privilege-escalation": "Privilege Escalation",
+    "defense-evasion": "Defense Evasion",
+    "credential-access": "Credential Access",
+    "discovery": "Discovery",
+    "lateral-movement": "Lateral Movement",
+    "collection": "Collection",
+    "command-and-control": "Command and Control",
+    "exfiltration": "Exfiltration",
+    "impact": "Impact",
+}
+_TACTIC_ORDER = {name: i for i, name in enumerate(TACTICS)}
+
+TECHNIQUE_ID = re.compile(r"^T\d{4}(?:\.\d{3})?$")
+_PARAM = re.compile(r"\{\{\s*insert:\s*param,\s*([\w.-]+)\s*\}\}")
+_CITATION = re.compile(r"\s*\(Citation:[^)]*\)")
+_MARKDOWN_LINK = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+_MARKUP = re.compile(r"</?code>|\*\*|`")
+_SPACE = re.compile(r"\s+")
+
+
+def _ijson():
+    try:
+        import ijson
+    except ImportError:  # pragma: no cover - depends on the environment
+        raise ImportError("The importers need ijson (pip install ijson)") from None
+    return ijson
+
+
+def _clean(text):
+    return _SPACE.sub(" ", text or "").strip()
+
+
+# ------------------------------------------------------------------
+# OSCAL catalog
+# ------------------------------------------------------------------
+
+def control_id(oscal_id):
+    """``ac-2`` -> ``AC-2``, ``ac-2.1`` -> ``AC-2(1)``"""
+    base, _, enhancement = oscal_id.partition(".")
+    base = base.upper()
+    return f"{base}({enhancement})" if enhancement else base
+
+
+def _param_text(param):
+    select = param.get('select')
+    if select:
+        choices = "; ".join(_clean(str(c)) for c in select.get('choice', []))
+        return f"[Selection: {choices}]"
+    label = param.get('label') or param.get('id', "")
+    return f"[Assignment: {_clean(label)}]"
+
+
+def _prose(parts, params):
+    """Statement text with its nested items, parameters substituted"""
+    text = []
+    for part in parts or []:
+        if part.get('name') not in ("statement", "item"):
+            continue
+        if part.get('prose'):
+            text.append(_PARAM.sub(lambda m: params.get(m.group(1), "[Assignment]"), part['prose']))
+        text.append(_prose(part.get('parts'), params))
+    return _clean(" ".join(t for t in text if t))
+
+
+def _withdrawn(control):
+    return any(
+        p.get('name') == "status" and p.get('value') == "withdrawn"
+        for p in control.get('props', [])
+    )
+
+
+def _oscal_records(control, params, include_withdrawn):
+    params = dict(params)
+    params.update({p['id']: _param_text(p) for p in control.get('params', []) if 'id' in p})
+    if include_withdrawn or not _withdrawn(control):
+        node_id = control_id(control['id'])
+        yield {
+            'node_id': node_id,
+            'label': "NISTControl",
+            'family': node_id.split("-")[0],
+            'title': _clean(control.get('title')),
+            'description': _prose(control.get('parts'), params),
+        }
+    # Enhancements are nested controls; they may reference the parent's params
+    for enhancement in control.get('controls', []):
+        yield from _oscal_records(enhancement, params, include_withdrawn)
+
+
+def iter_oscal_controls(path, include_withdrawn=False):
+    """Yield control rows from an OSCAL catalog, one top-level control at a time"""
+    ijson = _ijson()
+    with open(path, 'rb') as f:
+        for control in ijson.items(f, 'catalog.groups.item.controls.item'):
+            yield from _oscal_records(control, {}, include_withdrawn)
+
+
+# ------------------------------------------------------------------
+# STIX bundle
+# ------------------------------------------------------------------
+
+def _attack_id(obj):
+    for ref in obj.get('external_references', []):
+        if str(ref.get('source_name', "")).startswith("mitre-") and \
+                TECHNIQUE_ID.match(str(ref.get('external_id', ""))):
+            return ref['external_id']
+    return None
+
+
+def _tactic(obj):
+    phases = [
+        p.get('phase_name') for p in obj.get('kill_chain_phases', [])
+        if str(p.get('kill_chain_name', "")).startswith("mitre-")
+    ]
+    known = sorted((p for p in phases if p in TACTICS), key=_TACTIC_ORDER.get)
+    if known:
+        return TACTICS[known[0]]
+    return phases[0].replace("-", " ").title() if phases else None
+
+
+def _stix_text(text):
+    text = _CITATION.sub("", text or "")
+    text = _MARKDOWN_LINK.sub(r"\1", text)
+    return _clean(_MARKUP.sub("", text))
+
+
+def iter_stix_techniques(path, include_deprecated=False):
+    """Yield technique rows from a STIX 2.1 bundle, one object at a time"""
+    ijson = _ijson()
+    seen = set()
+    with open(path, 'rb') as f:
+        for obj in ijson.items(f, 'objects.item'):
+            if obj.get('type') != "attack-pattern":
+                continue
+            if not include_deprecated and (obj.get('revoked') or obj.get('x_mitre_deprecated')):
+                continue
+            node_id = _attack_id(obj)
+            if node_id is None or node_id in seen:
+                continue
+            seen.add(node_id)
+            yield {
+                'node_id': node_id,
+                'label': "MITRETechnique",
+                'name': _clean(obj.get('name')),
+                'tactic': _tactic(obj),
+                'description': _stix_text(obj.get('description')),
+            }
+
+
+# ------------------------------------------------------------------
+# Writing
+# ------------------------------------------------------------------
+
+def _chunks(records, size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_table(records, path, columns, score=False, chunk_rows=CHUNK_ROWS):
+    """Stream row dicts to a CSV in chunks (atomic replace); returns the row count"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+    rows = 0
+    with open(tmp, 'w', newline="", encoding="utf-8") as f:
+        pd.DataFrame(columns=columns).to_csv(f, index=False)
+        for chunk in _chunks(records, chunk_rows):
+            df = pd.DataFrame(chunk, columns=columns)
+            if score:
+                df['fkgl_score'] = readability.fkgl(df['description'], workers=1).to_numpy()
+            df.to_csv(f, header=False, index=False)
+            rows += len(df)
+    os.replace(tmp, path)
+    return rows
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def import_sources(output, oscal=None, stix=None, base=None, snapshot_path=None,
+                   include_withdrawn=False):
+    """Import the given sources into ``output``; returns a throughput report"""
+    output = Path(output)
+    base = Path(base or config.DATA_PATH)
+    output.mkdir(parents=True, exist_ok=True)
+    report = {'output': str(output), 'sources': {}}
+
+    jobs = [
+        ('nist_controls', oscal, lambda p: iter_oscal_controls(p, include_withdrawn), CONTROL_COLUMNS, True),
+        ('mitre_techniques', stix, lambda p: iter_stix_techniques(p, include_withdrawn), TECHNIQUE_COLUMNS, False),
+    ]
+    for table, source, reader, columns, score in jobs:
+        if source is None:
+            continue
+        start = time.perf_counter()
+        rows = write_table(reader(source), output / snapshot.SOURCE_FILES[table], columns, score=score)
+        seconds = time.perf_counter() - start
+        size_mb = Path(source).stat().st_size / (1024 * 1024)
+        report['sources'][table] = {
+            'source': str(source),
+            'rows': rows,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round(rows / seconds, 1) if seconds > 0 else None,
+            'mb_per_second': round(size_mb / seconds, 2) if seconds > 0 else None,
+        }
+
+    # Tables that were not imported come from the base data directory
+    for path in snapshot.source_files(base):
+        target = output / path.name
+        if not target.exists() and path.exists() and output.resolve() != base.resolve():
+            shutil.copyfile(path, target)
+
+    if snapshot_path is not None:
+        start = time.perf_counter()
+        report['snapshot'] = str(snapshot.build_snapshot(output, snapshot_path))
+        report['snapshot_seconds'] = round(time.perf_counter() - start, 3)
+    report['peak_rss_mb'] = round(_peak_rss_mb(), 1)
+    return report
+
+
+def format_report(report):
+    lines = [f"Imported into {report['output']}"]
+    for table, stats in report['sources'].items():
+        lines.append(
+            f"  {table}: {stats['rows']:,} rows in {stats['seconds']:.2f}s"
+            f" ({stats['rows_per_second'] or 0:,.0f} rows/s, {stats['mb_per_second'] or 0:.1f} MB/s)"
+        )
+    if 'snapshot' in report:
+        lines.append(f"  snapshot: {report['snapshot']} ({report['snapshot_seconds']:.2f}s)")
+    lines.append(f"  peak RSS: {report['peak_rss_mb']:.0f} MB")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import OSCAL / STIX sources into the sample CSV schema")
+    parser.add_argument("--oscal", help="NIST SP 800-53 OSCAL catalog (JSON)")
+    parser.add_argument("--stix", help="MITRE ATT&CK STIX 2.1 bundle (JSON)")
+    parser.add_argument("--output", required=True, help="output data directory")
+    parser.add_argument("--base", default=str(config.DATA_PATH), help="data directory for tables not imported")
+    parser.add_argument("--snapshot-path", help="also compile the output into this snapshot directory")
+    parser.add_argument("--include-withdrawn", action="store_true",
+                        help="keep withdrawn controls and revoked/deprecated techniques")
+    args = parser.parse_args(argv)
+    if not args.oscal and not args.stix:
+        parser.error("nothing to import: pass --oscal and/or --stix")
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    report = import_sources(args.output, oscal=args.oscal, stix=args.stix, base=args.base,
+                            snapshot_path=args.snapshot_path,
+                            include_withdrawn=args.include_withdrawn)
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
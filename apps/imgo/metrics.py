@@ -0,0 +1,299 @@
+"""
+Lightweight hot-path instrumentation
+
+Timing spans, counters and scrape-time gauges in one process-wide
+registry, rendered in the Prometheus text exposition format:
+
+- ``span(name)`` / ``@timed(name)`` record wall-clock time into a
+  per-name histogram
+- ``rerun(session)`` counts dashboard reruns per browser session
+- ``gauge(name, fn)`` registers a callable sampled at scrape time (cache
+  hit ratios, table memory footprint)
+
+With metrics disabled (the default; set ``METRICS_ENABLED=1``) ``span``
+returns a shared no-op context manager and ``timed`` adds one attribute
+check per call, so instrumented code pays practically nothing.
+
+The API serves the registry at ``/metrics``; the dashboard process can
+expose it with ``start_exporter(port)`` (``METRICS_PORT``), a small
+``http.server`` thread.
+"""
+
+import contextlib
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from imgo import config
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "imgo"
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MAX_SESSIONS = 100  # sessions kept for per-session rerun counts
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_NOOP = contextlib.nullcontext()
+
+
+class _Histogram:
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+
+    def quantile(self, q):
+        """Upper bucket bound holding the q-quantile (Prometheus-style estimate)"""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max
+
+
+class _Span:
+    __slots__ = ('registry', 'name', 'start')
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Registry:
+    """Span histograms, counters and gauges for one process"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._spans = {}
+        self._counters = {}
+        self._sessions = OrderedDict()
+        self._gauges = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def span(self, name):
+        """Context manager timing a block (no-op when disabled)"""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self._spans.get(name)
+            if histogram is None:
+                histogram = self._spans[name] = _Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def rerun(self, session):
+        """Count one script rerun for a browser session"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters['reruns'] = self._counters.get('reruns', 0) + 1
+            self._sessions[session] = self._sessions.pop(session, 0) + 1
+            while len(self._sessions) > MAX_SESSIONS:
+                self._sessions.popitem(last=False)
+
+    def gauge(self, name, fn, help_text=""):
+        """Register ``fn() -> {labels tuple: value}`` (or a number), sampled at scrape time"""
+        with self._lock:
+            self._gauges[name] = (fn, help_text)
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self._sessions.clear()
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def spans(self):
+        """Per-span summary: count, total/mean/max seconds and p95 estimate"""
+        with self._lock:
+            return {
+                name: {
+                    'count': h.count,
+                    'total': h.total,
+                    'mean': h.total / h.count if h.count else 0.0,
+                    'max': h.max,
+                    'p95': h.quantile(0.95),
+                }
+                for name, h in sorted(self._spans.items())
+            }
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def sessions(self):
+        with self._lock:
+            return dict(self._sessions)
+
+    def gauges(self):
+        """Current gauge samples as {name: {labels: value}}"""
+        with self._lock:
+            gauges = dict(self._gauges)
+        samples = {}
+        for name, (fn, _) in gauges.items():
+            try:
+                value = fn()
+            except Exception as e:  # a broken gauge must not break the scrape
+                logger.warning("Gauge %s failed: %s", name, e)
+                continue
+            samples[name] = value if isinstance(value, dict) else {(): value}
+        return samples
+
+    def render(self):
+        """Prometheus text exposition of everything recorded"""
+        lines = []
+        with self._lock:
+            spans = [(name, h.count, h.total, list(h.buckets)) for name, h in sorted(self._spans.items())]
+            counters = sorted(self._counters.items())
+            sessions = list(self._sessions.items())
+            helps = {name: help_text for name, (_, help_text) in self._gauges.items()}
+
+        metric = f"{PREFIX}_span_seconds"
+        lines += [f"# HELP {metric} Wall-clock time of instrumented spans", f"# TYPE {metric} histogram"]
+        for name, count, total, buckets in spans:
+            cumulative = 0
+            for bound, n in zip(BUCKETS, buckets):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{span="{_escape(name)}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{span="{_escape(name)}",le="+Inf"}} {count}')
+            lines.append(f'{metric}_sum{{span="{_escape(name)}"}} {total:.6f}')
+            lines.append(f'{metric}_count{{span="{_escape(name)}"}} {count}')
+
+        for name, value in counters:
+            metric = f"{PREFIX}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        if sessions:
+            metric = f"{PREFIX}_session_reruns"
+            lines += [f"# HELP {metric} Reruns per recent browser session", f"# TYPE {metric} gauge"]
+            lines += [f'{metric}{{session="{_escape(s)}"}} {n}' for s, n in sessions]
+
+        for name, samples in self.gauges().items():
+            metric = f"{PREFIX}_{name}"
+            if helps.get(name):
+                lines.append(f"# HELP {metric} {helps[name]}")
+            lines.append(f"# TYPE {metric} gauge")
+            for labels, value in samples.items():
+                lines.append(f"{metric}{_labels(labels)} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    """``(('table', 'x'),)`` -> ``{table="x"}``"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+registry = Registry(enabled=config.METRICS_ENABLED)
+
+
+def span(name):
+    return registry.span(name)
+
+
+def timed(name):
+    """Decorator recording every call of the function as span ``name``"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                registry.observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+# ------------------------------------------------------------------
+# Common gauges
+# ------------------------------------------------------------------
+
+def labeled(label, values):
+    """``{'a': 1}`` -> ``{(('label', 'a'),): 1}`` for a single-label gauge"""
+    return {((label, key),): value for key, value in values.items()}
+
+
+def cache_stats(caches):
+    """Hit ratio and size per named cache with a ``stats()`` method"""
+    samples = {}
+    for name, cache in caches.items():
+        stats = cache.stats()
+        samples[(('cache', name), ('stat', "hit_ratio"))] = stats['hit_ratio']
+        samples[(('cache', name), ('stat', "entries"))] = stats['entries']
+        samples[(('cache', name), ('stat', "bytes"))] = stats['bytes']
+    return samples
+
+
+# ------------------------------------------------------------------
+# Exporter
+# ------------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_exporter(port, host="0.0.0.0"):
+    """Serve ``/metrics`` from a daemon thread; returns the server"""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="imgo-metrics", daemon=True).start()
+    logger.info("Metrics exporter listening on %s:%d", host, port)
+    return server
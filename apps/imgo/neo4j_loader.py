@@ -0,0 +1,389 @@
+"""
+Streaming bulk loader from the CSV data files into Neo4j
+
+Reads the source CSVs in chunks and writes nodes and relationships with
+parameterized ``UNWIND`` batches. Nodes are created with their BFO labels
+and relationships with their ``bfo_type`` already set, so the
+``neo4j_bfo/01`` and ``02`` migration passes are not needed after a load.
+
+Batches are written by a pool of worker threads (one session per batch,
+connections come from the driver pool). Completed batches are recorded in
+a checkpoint file so an interrupted load can be resumed. Batch ids are
+chunk ordinals, so the checkpoint stores its batch size and a resume with
+a different ``--batch-size`` is refused.
+
+Usage::
+
+    python -m imgo.neo4j_loader --data-path data/sample --batch-size 5000 --workers 4
+    python -m imgo.neo4j_loader --fake      # dry run against the in-process fake driver
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import pandas as pd
+
+from imgo import config
+from imgo.graph_index import BFO_TYPES
+from imgo.snapshot import SOURCE_FILES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_WORKERS = 4
+SCHEMA_FILE = Path("neo4j_bfo/schema.cypher")
+
+# Domain label -> BFO labels (neo4j_bfo/01_add_bfo_labels.cypher)
+BFO_LABELS = {
+    "NISTControl": ("Continuant", "InformationContentEntity"),
+    "AIRMFRequirement": ("Continuant", "InformationContentEntity"),
+    "MITRETechnique": ("Occurrent", "Process"),
+    "Asset": ("IndependentContinuant",),
+    "System": ("IndependentContinuant",),
+}
+
+# Node sources: table, domain label, key property, id column, {property: column}
+NODE_SOURCES = [
+    ('nist_controls', "NISTControl", "control_id", "node_id",
+     {'family': "family", 'name': "title", 'description': "description", 'fkgl_score': "fkgl_score"}),
+    ('mitre_techniques', "MITRETechnique", "technique_id", "node_id",
+     {'name': "name", 'tactic': "tactic", 'description': "description"}),
+    ('ai_rmf_mapping', "AIRMFRequirement", "requirement_id", "requirement_id",
+     {'category': "category", 'title': "title", 'description': "description"}),
+]
+
+NODE_TEMPLATE = """
+UNWIND $rows AS row
+MERGE (n:{label} {{{key}: row.id}})
+SET n:{bfo_labels}, n.entity_id = row.id, n += row.props
+"""
+
+MITIGATES_TEMPLATE = """
+UNWIND $rows AS row
+MATCH (c:NISTControl {{control_id: row.source}})
+MATCH (t:MITRETechnique {{technique_id: row.target}})
+MERGE (c)-[r:MITIGATES]->(t)
+SET r.bfo_type = "{bfo_type}", r += row.props
+"""
+
+# Endpoints of generic relationships may be Continuants or Occurrents
+RELATIONSHIP_TEMPLATE = """
+UNWIND $rows AS row
+CALL {{
+  WITH row MATCH (a:Continuant {{entity_id: row.source}}) RETURN a
+  UNION
+  WITH row MATCH (a:Occurrent {{entity_id: row.source}}) RETURN a
+}}
+CALL {{
+  WITH row MATCH (b:Continuant {{entity_id: row.target}}) RETURN b
+  UNION
+  WITH row MATCH (b:Occurrent {{entity_id: row.target}}) RETURN b
+}}
+MERGE (a)-[r:{rel_type}]->(b)
+SET r.bfo_type = "{bfo_type}", r += row.props
+"""
+
+
+def node_statement(label, key):
+    return NODE_TEMPLATE.format(label=label, key=key, bfo_labels=":".join(BFO_LABELS[label]))
+
+
+def relationship_statement(rel_type):
+    if rel_type not in BFO_TYPES:
+        raise ValueError(f"Unknown relationship type: {rel_type}")
+    if rel_type == "MITIGATES":
+        return MITIGATES_TEMPLATE.format(bfo_type=BFO_TYPES[rel_type])
+    return RELATIONSHIP_TEMPLATE.format(rel_type=rel_type, bfo_type=BFO_TYPES[rel_type])
+
+
+def schema_statements(path=SCHEMA_FILE):
+    """Executable statements from schema.cypher (comments stripped)"""
+    text = "\n".join(
+        line for line in Path(path).read_text().splitlines()
+        if not line.strip().startswith("//")
+    )
+    return [s.strip() for s in text.split(";") if s.strip()]
+
+
+def _clean(value):
+    return None if pd.isna(value) else value
+
+
+def node_rows(records, id_column, properties):
+    """UNWIND rows for a node statement from row dicts"""
+    return [
+        {'id': record[id_column], 'props': {prop: _clean(record[col]) for prop, col in properties.items()}}
+        for record in records
+    ]
+
+
+def mapping_rows(records):
+    """UNWIND rows for the MITIGATES statement from mapping row dicts"""
+    return [
+        {
+            'source': record['nist_control_id'],
+            'target': record['mitre_technique_id'],
+            'props': {
+                'confidence': _clean(record['mapping_confidence']),
+                'inference_path': _clean(record['inference_path']),
+            },
+        }
+        for record in records
+    ]
+
+
+def relationship_rows(records):
+    """UNWIND rows for a generic relationship statement from row dicts"""
+    return [
+        {
+            'source': record['source_id'],
+            'target': record['target_id'],
+            'props': {'confidence': _clean(record['confidence'])},
+        }
+        for record in records
+    ]
+
+
+# ------------------------------------------------------------------
+# Batch generators (one chunk in memory at a time)
+# ------------------------------------------------------------------
+
+def iter_node_batches(data_path, batch_size):
+    """Yield (source name, batch number, statement, rows) for node sources"""
+    for table, label, key, id_column, properties in NODE_SOURCES:
+        path = Path(data_path) / SOURCE_FILES[table]
+        statement = node_statement(label, key)
+        for number, chunk in enumerate(pd.read_csv(path, chunksize=batch_size)):
+            yield table, number, statement, node_rows(chunk.to_dict("records"), id_column, properties)
+
+
+def iter_relationship_batches(data_path, batch_size):
+    """Yield (source name, batch number, statement, rows) for relationship sources"""
+    path = Path(data_path) / SOURCE_FILES['nist_mitre_mapping']
+    statement = relationship_statement("MITIGATES")
+    for number, chunk in enumerate(pd.read_csv(path, chunksize=batch_size)):
+        yield 'nist_mitre_mapping', number, statement, mapping_rows(chunk.to_dict("records"))
+
+    path = Path(data_path) / SOURCE_FILES['relationships']
+    if not path.exists():
+        return
+    for number, chunk in enumerate(pd.read_csv(path, chunksize=batch_size)):
+        # One statement per relationship type (types cannot be parameters)
+        for rel_type, group in chunk.groupby("relationship", sort=True):
+            batch_id = f"{number}:{rel_type}"
+            yield ('relationships', batch_id, relationship_statement(rel_type),
+                   relationship_rows(group.to_dict("records")))
+
+
+# ------------------------------------------------------------------
+# Checkpoints
+# ------------------------------------------------------------------
+
+class CheckpointError(Exception):
+    """Raised when a checkpoint cannot be resumed (e.g. another batch size)"""
+
+
+class Checkpoint:
+    """Set of completed batch ids per source for one batch size, persisted as JSON"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.batch_size = None
+        self._done = defaultdict(set)
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+            self.batch_size = state.get('batch_size')
+            for source, batches in state.get('done', {}).items():
+                self._done[source] = {str(b) for b in batches}
+
+    def use_batch_size(self, batch_size):
+        """Bind the checkpoint to ``batch_size``; completed batches of another size cannot be reused"""
+        with self._lock:
+            if self.batch_size not in (None, batch_size) and any(self._done.values()):
+                raise CheckpointError(
+                    f"Checkpoint {self.path} was written with batch size {self.batch_size}, not {batch_size};"
+                    " resume with the same --batch-size or pass --restart"
+                )
+            self.batch_size = batch_size
+
+    def is_done(self, source, batch_id):
+        with self._lock:
+            return str(batch_id) in self._done[source]
+
+    def mark_done(self, source, batch_id):
+        with self._lock:
+            self._done[source].add(str(batch_id))
+            if self.path is None:
+                return
+            tmp = self.path.with_suffix(f".tmp-{os.getpid()}")
+            with open(tmp, 'w') as f:
+                json.dump({'batch_size': self.batch_size,
+                           'done': {s: sorted(b) for s, b in self._done.items()}}, f)
+            os.replace(tmp, self.path)
+
+    def clear(self):
+        with self._lock:
+            self._done.clear()
+            self.batch_size = None
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
+
+
+# ------------------------------------------------------------------
+# Loader
+# ------------------------------------------------------------------
+
+def connect(uri=None, user=None, password=None, max_pool_size=None):
+    """Create a pooled Neo4j driver from arguments or configuration"""
+    from neo4j import GraphDatabase
+
+    return GraphDatabase.driver(
+        uri or config.NEO4J_URI,
+        auth=(user or config.NEO4J_USER, password or config.NEO4J_PASSWORD),
+        max_connection_pool_size=max_pool_size or config.NEO4J_POOL_SIZE,
+    )
+
+
+def _write_batch(tx, statement, rows):
+    tx.run(statement, rows=rows).consume()
+
+
+class BulkLoader:
+    """Writes node and relationship batches through a worker pool"""
+
+    def __init__(self, driver, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS,
+                 checkpoint=None, database=None):
+        self.driver = driver
+        self.batch_size = batch_size
+        self.workers = workers
+        self.checkpoint = checkpoint or Checkpoint()
+        self.checkpoint.use_batch_size(batch_size)
+        self.database = database
+
+    def _write(self, source, batch_id, statement, rows):
+        with self.driver.session(database=self.database) as session:
+            session.execute_write(_write_batch, statement, rows)
+        self.checkpoint.mark_done(source, batch_id)
+        return source, len(rows)
+
+    def _run_phase(self, batches, report):
+        """Drain a batch generator through the pool with bounded in-flight work"""
+        stats = report.setdefault('sources', {})
+        start = time.perf_counter()
+        pending = set()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for source, batch_id, statement, rows in batches:
+                entry = stats.setdefault(source, {'rows': 0, 'batches': 0, 'skipped_batches': 0})
+                if self.checkpoint.is_done(source, batch_id):
+                    entry['skipped_batches'] += 1
+                    continue
+                pending.add(pool.submit(self._write, source, batch_id, statement, rows))
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._collect(done, stats)
+            done, _ = wait(pending)
+            self._collect(done, stats)
+        return time.perf_counter() - start
+
+    @staticmethod
+    def _collect(done, stats):
+        for future in done:
+            source, count = future.result()
+            stats[source]['rows'] += count
+            stats[source]['batches'] += 1
+
+    def apply_schema(self, path=SCHEMA_FILE):
+        with self.driver.session(database=self.database) as session:
+            for statement in schema_statements(path):
+                session.run(statement).consume()
+
+    def load(self, data_path):
+        """Load nodes, then relationships; returns a throughput report"""
+        report = {'batch_size': self.batch_size, 'workers': self.workers}
+        node_seconds = self._run_phase(iter_node_batches(data_path, self.batch_size), report)
+        node_rows = sum(report['sources'][t]['rows'] for t, *_ in NODE_SOURCES if t in report['sources'])
+        edge_seconds = self._run_phase(iter_relationship_batches(data_path, self.batch_size), report)
+        edge_rows = sum(
+            s['rows'] for name, s in report['sources'].items()
+            if name not in {t for t, *_ in NODE_SOURCES}
+        )
+        report['phases'] = {
+            'nodes': _throughput(node_rows, node_seconds),
+            'relationships': _throughput(edge_rows, edge_seconds),
+        }
+        report['total'] = _throughput(node_rows + edge_rows, node_seconds + edge_seconds)
+        return report
+
+
+def _throughput(rows, seconds):
+    return {
+        'rows': rows,
+        'seconds': round(seconds, 4),
+        'rows_per_second': round(rows / seconds, 1) if seconds > 0 else None,
+    }
+
+
+def format_report(report):
+    lines = [f"Batch size {report['batch_size']}, {report['workers']} workers"]
+    for source, stats in report['sources'].items():
+        lines.append(
+            f"  {source}: {stats['rows']} rows in {stats['batches']} batches"
+            f" ({stats['skipped_batches']} skipped from checkpoint)"
+        )
+    for phase, stats in list(report['phases'].items()) + [('total', report['total'])]:
+        rate = stats['rows_per_second']
+        lines.append(
+            f"  {phase}: {stats['rows']} rows in {stats['seconds']:.2f}s"
+            + (f" ({rate:,.0f} rows/s)" if rate else "")
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load IMGO CSV data into Neo4j")
+    parser.add_argument("--data-path", default=str(config.DATA_PATH), help="source data directory")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--checkpoint", default=None, help="checkpoint file for resumable loads")
+    parser.add_argument("--restart", action="store_true", help="ignore and clear an existing checkpoint")
+    parser.add_argument("--schema", action="store_true", help="apply neo4j_bfo/schema.cypher first")
+    parser.add_argument("--fake", action="store_true", help="write to the in-process fake driver")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.restart:
+        checkpoint.clear()
+
+    if args.fake:
+        from imgo.fake_neo4j import FakeDriver
+        driver = FakeDriver()
+    else:
+        driver = connect(max_pool_size=max(args.workers, config.NEO4J_POOL_SIZE))
+
+    try:
+        loader = BulkLoader(driver, batch_size=args.batch_size, workers=args.workers,
+                            checkpoint=checkpoint, database=config.NEO4J_DATABASE)
+    except CheckpointError as e:
+        driver.close()
+        parser.error(str(e))
+    try:
+        if args.schema:
+            loader.apply_schema()
+        report = loader.load(args.data_path)
+    finally:
+        driver.close()
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
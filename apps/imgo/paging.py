@@ -0,0 +1,135 @@
+"""
+Server-side filtering, sorting and paging for the data browser views
+
+``TableView`` answers a view query with row *positions* instead of
+DataFrame copies. It pushes predicates down to lazily built per-column
+indexes:
+
+- equality filters use the column's group index (value -> positions)
+- range filters binary-search the column's cached sort order
+- sorting reuses the same cached order; missing values (None/NaN) sort
+  last in either direction and never match a range
+
+Only the requested page is materialized, without the long text columns.
+Those are fetched per row with ``detail`` when the user expands one.
+"""
+
+import math
+
+import numpy as np
+
+PAGE_SIZE = 25
+LONG_TEXT_COLUMNS = ('description', 'inference_path')
+
+
+def window(total, page=1, page_size=PAGE_SIZE):
+    """Clamp ``page`` and return ``(page, pages, start, stop)``"""
+    pages = max(1, math.ceil(total / page_size))
+    page = min(max(int(page), 1), pages)
+    start = (page - 1) * page_size
+    return page, pages, start, min(start + page_size, total)
+
+
+class TableView:
+    """Filter/sort/page one table by row positions; never copies the frame"""
+
+    def __init__(self, df, key=None, text_columns=LONG_TEXT_COLUMNS):
+        self.df = df
+        self.key = key
+        self.text_columns = [c for c in text_columns if c in df]
+        self.columns = [c for c in df.columns if c not in self.text_columns]
+        self._groups = {}
+        self._orders = {}
+        self._ranks = {}
+        self._keys = None
+
+    def __len__(self):
+        return len(self.df)
+
+    # ------------------------------------------------------------------
+    # Column indexes (built on first use, then shared)
+    # ------------------------------------------------------------------
+
+    def _group(self, column):
+        if column not in self._groups:
+            self._groups[column] = self.df.groupby(column, sort=False).indices
+        return self._groups[column]
+
+    def _order(self, column):
+        """(positions in ascending order of ``column`` with nulls last, sorted non-null values)"""
+        if column not in self._orders:
+            # pandas orders mixed None/str object columns; np.argsort cannot compare them
+            ranked = self.df[column].reset_index(drop=True).sort_values(kind="stable", na_position="last")
+            order = ranked.index.to_numpy(dtype=np.int64)
+            self._orders[column] = (order, ranked.iloc[:int(ranked.notna().sum())].to_numpy())
+        return self._orders[column]
+
+    def _rank(self, column):
+        if column not in self._ranks:
+            order, _ = self._order(column)
+            rank = np.empty(len(order), dtype=np.int64)
+            rank[order] = np.arange(len(order))
+            self._ranks[column] = rank
+        return self._ranks[column]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def select(self, equals=None, ranges=None, rows=None):
+        """Sorted row positions matching every predicate
+
+        ``equals`` maps column -> value, ``ranges`` maps column ->
+        ``(low, high)`` (inclusive) and ``rows`` restricts to positions
+        produced elsewhere (e.g. search hits).
+        """
+        selected = None
+        if rows is not None:
+            selected = np.unique(np.asarray(rows, dtype=np.int64))
+        for column, value in (equals or {}).items():
+            positions = self._group(column).get(value, np.empty(0, dtype=np.int64))
+            selected = positions if selected is None else np.intersect1d(selected, positions)
+        for column, (low, high) in (ranges or {}).items():
+            order, values = self._order(column)
+            lo = np.searchsorted(values, low, side="left")
+            hi = np.searchsorted(values, high, side="right")
+            positions = np.sort(order[lo:hi])
+            selected = positions if selected is None else np.intersect1d(selected, positions)
+        if selected is None:
+            return np.arange(len(self.df))
+        return np.sort(selected)
+
+    def order(self, positions, sort_by=None, ascending=True):
+        """The selected positions in ``sort_by`` order (unchanged without one)"""
+        positions = np.asarray(positions, dtype=np.int64)
+        if sort_by is not None:
+            positions = positions[np.argsort(self._rank(sort_by)[positions], kind="stable")]
+            if not ascending:
+                # Reverse the non-null rows only; nulls stay last
+                nulls = self._rank(sort_by)[positions] >= len(self._order(sort_by)[1])
+                positions = np.concatenate([positions[~nulls][::-1], positions[nulls]])
+        return positions
+
+    def page(self, positions, sort_by=None, ascending=True, page=1, page_size=PAGE_SIZE):
+        """One page of the selected rows, long text columns excluded"""
+        positions = self.order(positions, sort_by, ascending)
+        page, pages, start, stop = window(len(positions), page, page_size)
+        rows = positions[start:stop]
+        return {
+            'rows': self.df.iloc[rows][self.columns],
+            'positions': rows,
+            'total': len(positions),
+            'page': page,
+            'pages': pages,
+        }
+
+    def position(self, key):
+        """Row position of ``key`` in the key column"""
+        if self._keys is None:
+            self._keys = {k: i for i, k in enumerate(self.df[self.key])}
+        return self._keys[key]
+
+    def detail(self, position):
+        """Long text columns for a single row"""
+        row = self.df.iloc[int(position)]
+        return {column: row[column] for column in self.text_columns}
@@ -0,0 +1,237 @@
+"""
+Local multi-hop path engine
+
+Answers k-hop neighborhood and top-k best-confidence path queries over a
+``GraphIndex`` without a graph database. Path confidence is the product of
+edge confidences, so best-first search runs on ``-log(confidence)``.
+
+Results use the same record shape as ``graphrag_paths_sample.json``
+(``nist_controls``, ``mitre_techniques``, ``confidence``, ``path_length``,
+optional ``ai_rmf_requirements``), plus the concrete ``nodes`` and
+``relationships`` along the path.
+
+Every query honours a wall-clock budget; when it runs out the best
+results found so far are returned with ``truncated`` set.
+"""
+
+import heapq
+import math
+import time
+
+import numpy as np
+
+from imgo.graph_index import EDGE_KINDS, kind_code
+
+MAX_HOPS = 10
+DEFAULT_TIME_BUDGET = 0.25  # seconds
+_CHECK_EVERY = 256  # heap pops between clock checks
+
+LABEL_KEYS = {
+    "NISTControl": 'nist_controls',
+    "MITRETechnique": 'mitre_techniques',
+    "AIRMFRequirement": 'ai_rmf_requirements',
+}
+
+
+class PathEngine:
+    """Multi-hop queries over a GraphIndex"""
+
+    def __init__(self, index):
+        self.index = index
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _kind_mask(self, kinds):
+        if kinds is None:
+            return None
+        mask = np.zeros(len(EDGE_KINDS), dtype=bool)
+        mask[[kind_code(k) for k in kinds]] = True
+        return mask
+
+    def _expand(self, node, direction, kind_mask, min_confidence):
+        """Yield (edge, neighbor, relationship arrow) for one node"""
+        index = self.index
+        steps = [(False, index.dst)] if direction == "out" else \
+            [(False, index.dst), (True, index.src)]
+        for reverse, far in steps:
+            offsets, edges = (index.rev_offsets, index.rev_edges) if reverse \
+                else (index.fwd_offsets, index.fwd_edges)
+            for e in edges[offsets[node]:offsets[node + 1]]:
+                # Slices are sorted by descending confidence
+                if index.confidence[e] < min_confidence:
+                    break
+                if kind_mask is not None and not kind_mask[index.kind[e]]:
+                    continue
+                yield e, far[e], reverse
+
+    def _record(self, query, nodes, steps, confidence):
+        index = self.index
+        record = {'query': query, 'nist_controls': [], 'mitre_techniques': []}
+        for node in nodes:
+            key = LABEL_KEYS.get(index.node_labels[node])
+            if key is None:
+                continue
+            node_id = index.node_ids[node]
+            if node_id not in record.setdefault(key, []):
+                record[key].append(node_id)
+
+        parts = [index.node_ids[nodes[0]]]
+        relationships = []
+        for (edge, reverse), node in zip(steps, nodes[1:]):
+            kind = EDGE_KINDS[index.kind[edge]]
+            arrow = f"<-[{kind}]-" if reverse else f"-[{kind}]->"
+            parts.append(f"{arrow} {index.node_ids[node]}")
+            relationships.append({
+                'source': index.node_ids[index.src[edge]],
+                'target': index.node_ids[index.dst[edge]],
+                'relationship': kind,
+                'confidence': float(index.confidence[edge]),
+            })
+
+        record['reasoning'] = " ".join(parts)
+        record['confidence'] = round(confidence, 4)
+        record['path_length'] = len(steps)
+        record['nodes'] = [index.node_ids[n] for n in nodes]
+        record['relationships'] = relationships
+        return record
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def best_paths(self, source, target=None, k=5, max_hops=3, kinds=None,
+                   min_confidence=0.0, direction="out",
+                   time_budget=DEFAULT_TIME_BUDGET, query=None):
+        """Top-k simple paths from ``source`` ranked by product confidence
+
+        With ``target=None`` every path ending at a MITRE technique counts
+        as a result. ``direction="both"`` also walks edges backwards (e.g.
+        control -> technique <- control). Each (node, depth) pair is
+        settled at most ``k`` times, which bounds the search while keeping
+        the k best walks under the hop limit.
+        """
+        index = self.index
+        max_hops = min(max_hops, MAX_HOPS)
+        query = query or f"Paths from {source}" + (f" to {target}" if target else "")
+        result = {'query': query, 'paths': [], 'truncated': False}
+        if source not in index or (target is not None and target not in index):
+            return result
+
+        start = index.node_index(source)
+        goal = index.node_index(target) if target is not None else None
+        kind_mask = self._kind_mask(kinds)
+        deadline = time.perf_counter() + time_budget
+
+        settled = {}
+        counter = 0
+        heap = [(0.0, counter, start, (start,), ())]
+        pops = 0
+        while heap and len(result['paths']) < k:
+            pops += 1
+            if pops % _CHECK_EVERY == 0 and time.perf_counter() > deadline:
+                result['truncated'] = True
+                break
+
+            cost, _, node, nodes, steps = heapq.heappop(heap)
+            depth = len(steps)
+            seen = settled.get((node, depth), 0)
+            if seen >= k:
+                continue
+            settled[(node, depth)] = seen + 1
+
+            if depth > 0:
+                is_goal = node == goal if goal is not None \
+                    else index.node_labels[node] == "MITRETechnique"
+                if is_goal:
+                    result['paths'].append(
+                        self._record(query, nodes, steps, math.exp(-cost))
+                    )
+                    continue
+            if depth == max_hops:
+                continue
+
+            for edge, neighbor, reverse in self._expand(node, direction, kind_mask, min_confidence):
+                if neighbor in nodes:
+                    continue
+                conf = max(float(index.confidence[edge]), 1e-9)
+                counter += 1
+                heapq.heappush(heap, (
+                    cost - math.log(conf), counter, int(neighbor),
+                    nodes + (int(neighbor),), steps + ((edge, reverse),),
+                ))
+        return result
+
+    def k_hop(self, source, max_hops=2, kinds=None, min_confidence=0.0,
+              direction="out", time_budget=DEFAULT_TIME_BUDGET, query=None):
+        """Bounded BFS neighborhood of ``source``, expanded level by level
+
+        Returns a single record whose node lists hold everything reachable
+        within ``max_hops``; ``hops`` maps each reached node to its BFS
+        depth and ``confidence`` is the mean confidence of traversed edges.
+        """
+        index = self.index
+        max_hops = min(max_hops, MAX_HOPS)
+        query = query or f"{max_hops}-hop neighborhood of {source}"
+        result = {
+            'query': query, 'nist_controls': [], 'mitre_techniques': [],
+            'confidence': 0.0, 'path_length': 0, 'hops': {}, 'truncated': False,
+        }
+        if source not in index:
+            return result
+
+        deadline = time.perf_counter() + time_budget
+        kind_mask = self._kind_mask(kinds)
+        depth_of = np.full(index.num_nodes, -1, dtype=np.int32)
+        start = index.node_index(source)
+        depth_of[start] = 0
+        frontier = np.array([start], dtype=np.int64)
+        traversed = []
+
+        steps = [(index.fwd_offsets, index.fwd_edges, index.dst)]
+        if direction == "both":
+            steps.append((index.rev_offsets, index.rev_edges, index.src))
+
+        for depth in range(1, max_hops + 1):
+            if not len(frontier):
+                break
+            if time.perf_counter() > deadline:
+                result['truncated'] = True
+                break
+            reached = []
+            for offsets, edges, far in steps:
+                # Gather all CSR slices of the frontier in one pass
+                starts, stops = offsets[frontier], offsets[frontier + 1]
+                lengths = stops - starts
+                total = int(lengths.sum())
+                if not total:
+                    continue
+                shift = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+                level = edges[shift + np.arange(total)]
+                keep = index.confidence[level] >= min_confidence
+                if kind_mask is not None:
+                    keep &= kind_mask[index.kind[level]]
+                level = level[keep]
+                traversed.append(level)
+                reached.append(far[level])
+            if not reached:
+                break
+            candidates = np.unique(np.concatenate(reached))
+            frontier = candidates[depth_of[candidates] < 0]
+            depth_of[frontier] = depth
+            if len(frontier):
+                result['path_length'] = depth
+
+        reached_nodes = np.flatnonzero(depth_of > 0)
+        for node in reached_nodes[np.argsort(depth_of[reached_nodes], kind="stable")]:
+            node_id = index.node_ids[node]
+            result['hops'][node_id] = int(depth_of[node])
+            key = LABEL_KEYS.get(index.node_labels[node])
+            if key is not None:
+                result.setdefault(key, []).append(node_id)
+        if traversed:
+            conf = index.confidence[np.unique(np.concatenate(traversed))]
+            if len(conf):
+                result['confidence'] = round(float(conf.mean()), 4)
+        return result
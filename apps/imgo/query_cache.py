@@ -0,0 +1,231 @@
+"""
+Memoized query cache for path and neighborhood queries
+
+Results are keyed by a normalized query plus the data version (the
+snapshot source hash). The in-memory tier is an LRU bounded by both entry
+count and total pickled size; an optional on-disk tier keeps results
+across container restarts. Seeing a new data version drops everything
+cached for older versions, so reloading the data invalidates the cache
+automatically.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Free-text parameters; every other parameter (node ids, tactics,
+# relationship kinds) is matched exactly downstream and keyed verbatim
+TEXT_PARAMS = frozenset({'query'})
+
+
+def _fold(text):
+    return " ".join(text.split()).lower().rstrip("?")
+
+
+def _normalize(value):
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_normalize(v) for v in value]
+        return sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    return value
+
+
+def make_key(kind, **params):
+    """Normalized cache key for a query of ``kind`` with ``params``
+
+    Free text (TEXT_PARAMS) is case- and whitespace-folded and unordered
+    collections are sorted, so equivalent questions from different
+    analysts share a key. Ids and other exact-match values are kept
+    verbatim.
+    """
+    params = {
+        k: _fold(v) if k in TEXT_PARAMS and isinstance(v, str) else _normalize(v)
+        for k, v in params.items() if v is not None
+    }
+    return json.dumps([kind, params], sort_keys=True, default=str)
+
+
+class QueryCache:
+    """Thread-safe LRU with size-based eviction and an optional disk tier"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 disk_path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_path = Path(disk_path) if disk_path else None
+
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ------------------------------------------------------------------
+    # Versioning
+    # ------------------------------------------------------------------
+
+    def _check_version(self, data_version):
+        """Drop every entry cached for another data version"""
+        if data_version == self._version:
+            return
+        if self._version is not None:
+            logger.info("Data version changed; invalidating %d cached queries", len(self._entries))
+        self._entries.clear()
+        self._bytes = 0
+        self._version = data_version
+        if self.disk_path is not None and self.disk_path.exists():
+            for old in self.disk_path.iterdir():
+                if old.is_dir() and old.name != self._disk_dir_name():
+                    shutil.rmtree(old, ignore_errors=True)
+
+    def _disk_dir_name(self):
+        return str(self._version)[:16]
+
+    def _disk_file(self, key):
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.disk_path / self._disk_dir_name() / f"{digest}.pkl"
+
+    # ------------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------------
+
+    def get(self, key, data_version, default=None):
+        with self._lock:
+            self._check_version(data_version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        payload = self._read_disk(key)
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return default
+            self.disk_hits += 1
+            value = pickle.loads(payload)
+            self._insert(key, value, len(payload))
+            return value
+
+    def put(self, key, data_version, value):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._check_version(data_version)
+            self._insert(key, value, len(payload))
+        self._write_disk(key, payload)
+
+    def get_or_compute(self, kind, data_version, compute, cache_if=None, **params):
+        """Return the cached result for a query, computing it on a miss
+
+        ``cache_if(result)`` can veto storing a result (e.g. one cut short
+        by a time budget).
+        """
+        key = make_key(kind, **params)
+        missing = object()
+        value = self.get(key, data_version, default=missing)
+        if value is not missing:
+            return value
+        value = compute()
+        if cache_if is None or cache_if(value):
+            self.put(key, data_version, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = None
+        if self.disk_path is not None:
+            shutil.rmtree(self.disk_path, ignore_errors=True)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals (memory tier callers hold the lock)
+    # ------------------------------------------------------------------
+
+    def _insert(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def _read_disk(self, key):
+        if self.disk_path is None:
+            return None
+        try:
+            return self._disk_file(key).read_bytes()
+        except OSError:
+            return None
+
+    def _write_disk(self, key, payload):
+        if self.disk_path is None:
+            return
+        path = self._disk_file(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".tmp-{os.getpid()}-{threading.get_ident()}")
+            tmp.write_bytes(payload)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("Could not write query cache entry: %s", e)
+
+
+class CachedPathEngine:
+    """PathEngine wrapper that memoizes queries in a QueryCache"""
+
+    def __init__(self, engine, cache, data_version):
+        self.engine = engine
+        self.index = engine.index
+        self.cache = cache
+        self.data_version = data_version
+
+    def _cached(self, kind, compute, params):
+        return self.cache.get_or_compute(
+            kind, self.data_version,
+            lambda: compute(**params),
+            cache_if=lambda result: not result.get('truncated'),
+            **params
+        )
+
+    def best_paths(self, source, **params):
+        return self._cached("best_paths", self.engine.best_paths, dict(source=source, **params))
+
+    def k_hop(self, source, **params):
+        return self._cached("k_hop", self.engine.k_hop, dict(source=source, **params))
@@ -0,0 +1,177 @@
+"""
+Vectorized Flesch-Kincaid Grade Level (FKGL) scoring
+
+    FKGL = 0.39 * (words / sentences) + 11.8 * (syllables / words) - 15.59
+
+Sentences and words are counted for a whole text column at once with
+pandas string operations; syllables are looked up per *distinct* word
+through a cached lexicon. Large corpora are split across a process pool.
+
+``score_incremental`` keeps the ``fkgl_score`` published in the source
+CSV (the reference values, computed from the full control texts) and
+reads a store of the description hash each row was scored for. Only rows
+without a published score, or whose description changed since the store
+was written, are scored here, so after a text revision only those rows
+are re-scored.
+"""
+
+import argparse
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SENTENCE_PATTERN = r"[.!?]+(?=\s|$)"
+WORD_PATTERN = r"[a-z]+(?:'[a-z]+)?"
+PARALLEL_THRESHOLD = 20000  # rows
+CHUNK_SIZE = 5000
+STORE_FILE = "fkgl_scores.csv"  # kept next to the snapshot
+
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+")
+
+
+@lru_cache(maxsize=200000)
+def count_syllables(word):
+    """Heuristic syllable count for a lower-case word (cached lexicon)"""
+    count = len(_VOWEL_GROUPS.findall(word))
+    if word.endswith("e") and not word.endswith(("le", "ee", "ye")) and count > 1:
+        count -= 1
+    if word.endswith(("ed", "es")) and count > 1 and not word.endswith(("ted", "ded", "ses", "zes", "ces", "ges")):
+        count -= 1
+    return max(count, 1)
+
+
+def text_stats(texts):
+    """Sentence, word and syllable counts for a Series of texts"""
+    texts = pd.Series(texts, dtype=object).fillna("")
+    sentences = texts.str.count(SENTENCE_PATTERN).clip(lower=1)
+
+    words = texts.str.lower().str.findall(WORD_PATTERN).explode().dropna()
+    lexicon = {w: count_syllables(w) for w in pd.unique(words)}
+    syllables = words.map(lexicon)
+
+    return pd.DataFrame({
+        'sentences': sentences,
+        'words': words.groupby(level=0).size().reindex(texts.index, fill_value=0),
+        'syllables': syllables.groupby(level=0).sum().reindex(texts.index, fill_value=0),
+    })
+
+
+def _fkgl(texts):
+    stats = text_stats(texts)
+    words = stats['words'].where(stats['words'] > 0)
+    scores = 0.39 * (words / stats['sentences']) + 11.8 * (stats['syllables'] / words) - 15.59
+    return scores.round(1)
+
+
+def fkgl(texts, workers=None):
+    """FKGL score for every text in ``texts`` (NaN for texts without words)
+
+    Corpora above PARALLEL_THRESHOLD rows are scored in CHUNK_SIZE chunks
+    on a process pool (``workers=1`` forces in-process scoring).
+    """
+    texts = pd.Series(texts, dtype=object)
+    if len(texts) < PARALLEL_THRESHOLD or workers == 1:
+        return _fkgl(texts)
+    chunks = [texts.iloc[i:i + CHUNK_SIZE] for i in range(0, len(texts), CHUNK_SIZE)]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return pd.concat(list(pool.map(_fkgl, chunks)))
+
+
+def text_hashes(texts):
+    """Stable content hash per text"""
+    return pd.Series(
+        [hashlib.sha1(str(t).encode("utf-8")).hexdigest() for t in texts],
+        index=getattr(texts, 'index', None),
+        dtype=object,
+    )
+
+
+def load_store(path):
+    """Previously scored rows as a DataFrame indexed by node id"""
+    try:
+        return pd.read_csv(path, dtype={'node_id': str, 'description_hash': str}).set_index('node_id')
+    except (FileNotFoundError, ValueError):
+        return pd.DataFrame({'description_hash': pd.Series(dtype=object),
+                             'fkgl_score': pd.Series(dtype=np.float64)},
+                            index=pd.Index([], name='node_id', dtype=object))
+
+
+def save_store(path, node_ids, texts, scores):
+    """Record the scores with the hash of the description each was computed for"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".tmp-{os.getpid()}")
+    pd.DataFrame({
+        'node_id': np.asarray(node_ids),
+        'description_hash': text_hashes(texts).to_numpy(),
+        'fkgl_score': np.asarray(scores),
+    }).to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def score_incremental(node_ids, texts, store_path=None, workers=None, published=None):
+    """FKGL per row, scoring only rows without a published or stored score
+
+    ``published`` holds the source CSV's ``fkgl_score`` column. A
+    published score is kept unless the store shows the description changed
+    since that score was recorded (it then still equals the stored score,
+    so it is stale); a published score that differs from the store is a
+    new reference value and is kept. Rows without a published score keep
+    their stored score while the description hash is unchanged; every
+    other row is scored. The store at ``store_path`` is only read: callers
+    that publish the scores record them with ``save_store``.
+
+    Returns ``(scores, rescored)`` where ``rescored`` counts computed rows.
+    """
+    node_ids = pd.Series(node_ids, dtype=object).reset_index(drop=True)
+    texts = pd.Series(texts, dtype=object).reset_index(drop=True)
+    store = load_store(store_path)
+
+    stored_hash = node_ids.map(store['description_hash'])
+    stored = node_ids.map(store['fkgl_score']).astype(np.float64)
+    changed = (stored_hash.notna() & (stored_hash != text_hashes(texts))).to_numpy()
+    scores = stored.copy()
+    scores[changed] = np.nan
+
+    if published is not None:
+        published = pd.to_numeric(pd.Series(published).reset_index(drop=True), errors='coerce')
+        stale = changed & (published.to_numpy() == stored.to_numpy())
+        keep = published.notna().to_numpy() & ~stale
+        scores[keep] = published[keep].to_numpy()
+
+    todo = scores.isna().to_numpy() & texts.notna().to_numpy()
+    if todo.any():
+        scores[todo] = fkgl(texts[todo], workers=workers).to_numpy()
+    return scores, int(todo.sum())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute FKGL scores for a controls CSV")
+    parser.add_argument("input", help="CSV with node_id and description columns")
+    parser.add_argument("--output", help="output CSV (default: overwrite fkgl_score in place)")
+    parser.add_argument("--store", help="score store for incremental re-scoring")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size")
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the store and the published scores; re-score every row")
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.input)
+    store = None if args.full else args.store
+    published = None if args.full or 'fkgl_score' not in df else df['fkgl_score']
+    scores, rescored = score_incremental(df['node_id'], df['description'], store, workers=args.workers,
+                                         published=published)
+    df['fkgl_score'] = scores.to_numpy()
+    df.to_csv(args.output or args.input, index=False)
+    if args.store:
+        save_store(args.store, df['node_id'], df['description'], df['fkgl_score'])
+    print(f"Scored {len(df)} rows ({rescored} recomputed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Residual-risk scoring of system control inventories
+
+An inventory lists, per system (``schema.cypher`` ``System`` / ``Asset``),
+the NIST controls it implements, one row per system and control::
+
+    system_id,system_name,asset_type,control_id
+    SYS-001,Payroll,System,AC-2
+
+A technique's residual exposure on a system is the probability that none
+of the system's controls mitigates it, treating MITIGATES confidences as
+independent::
+
+    residual(s, t) = prod over implemented c of (1 - confidence(c, t))
+
+computed in log space as the product of the systems x controls incidence
+matrix with the sparse controls x techniques matrix of ``log(1 - c)``
+(``coverage.Coverage.control_technique``). Per tactic, exposure is the
+mean residual over its techniques; a technique no implemented control
+mitigates counts fully.
+
+Systems are scored in chunks; inventories above PARALLEL_THRESHOLD
+systems are spread over a process pool. ``score_inventory`` yields one
+DataFrame per chunk in inventory order, so results stream to disk.
+
+Usage::
+
+    python -m imgo.risk data/sample/system_inventory_sample.csv
+    python -m imgo.risk inventory.csv --min-confidence 0.8 --workers 8 --output residual_risk.csv
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from imgo import config, snapshot
+from imgo.coverage import Coverage
+
+logger = logging.getLogger(__name__)
+
+INVENTORY_FILE = "system_inventory_sample.csv"  # in data/sample
+MAX_CONFIDENCE = 0.999  # a confidence of 1.0 would make log(1 - c) infinite
+EXPOSED_THRESHOLD = 0.5  # residual at or above which a technique counts as exposed
+PARALLEL_THRESHOLD = 10000  # systems
+CHUNK_SIZE = 500  # systems
+SUMMARY_COLUMNS = ['system_id', 'system_name', 'asset_type', 'controls', 'unknown_controls',
+                   'exposure', 'exposed_techniques', 'worst_tactic']
+
+
+# ------------------------------------------------------------------
+# Inventory
+# ------------------------------------------------------------------
+
+def load_inventory(path):
+    """Inventory CSV as a DataFrame (system_id, control_id[, system_name, asset_type])"""
+    inventory = pd.read_csv(path, dtype=str)
+    missing = {'system_id', 'control_id'} - set(inventory.columns)
+    if missing:
+        raise ValueError(f"Inventory {path} lacks columns: {', '.join(sorted(missing))}")
+    inventory['system_id'] = inventory['system_id'].str.strip()
+    inventory['control_id'] = inventory['control_id'].str.strip()
+    return inventory.dropna(subset=['system_id', 'control_id'])
+
+
+def inventory_digest(inventory):
+    """Content hash of an inventory (its query cache key)"""
+    digest = hashlib.sha1()
+    digest.update(pd.util.hash_pandas_object(inventory, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class Systems:
+    """Inventory grouped by system: ids, attributes and control rows (CSR)"""
+
+    def __init__(self, inventory, control_ids):
+        inventory = inventory.drop_duplicates(['system_id', 'control_id'])
+        system_codes, ids = pd.factorize(inventory['system_id'])
+        self.ids = np.asarray(ids, dtype=object)
+        first = inventory[~inventory['system_id'].duplicated()]
+        self.attributes = {
+            column: first[column].to_numpy(dtype=object)
+            for column in ('system_name', 'asset_type') if column in inventory
+        }
+        controls = pd.Index(control_ids).get_indexer(inventory['control_id'])
+        known = controls >= 0
+        self.unknown = np.bincount(system_codes[~known], minlength=len(self.ids))
+        order = np.argsort(system_codes[known], kind="stable")
+        self.controls = controls[known][order]
+        self.indptr = np.zeros(len(self.ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(system_codes[known], minlength=len(self.ids)), out=self.indptr[1:])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def chunk(self, start, stop):
+        """Systems ``start:stop`` as a picklable task for ``RiskModel.score``"""
+        lo, hi = self.indptr[start], self.indptr[stop]
+        return {
+            'ids': self.ids[start:stop],
+            'attributes': {k: v[start:stop] for k, v in self.attributes.items()},
+            'unknown': self.unknown[start:stop],
+            'indptr': self.indptr[start:stop + 1] - lo,
+            'controls': self.controls[lo:hi],
+        }
+
+
+# ------------------------------------------------------------------
+# Scoring
+# ------------------------------------------------------------------
+
+class RiskModel:
+    """Sparse controls x techniques ``log(1 - confidence)`` with the technique tactics"""
+
+    def __init__(self, coverage, min_confidence=0.0):
+        matrix = coverage.control_technique
+        rows, cols, values = matrix.entries(min_confidence)
+        self.min_confidence = min_confidence
+        self.control_ids = matrix.row_ids
+        self.technique_ids = matrix.col_ids
+        self.indices = cols
+        self.log_residual = np.log1p(-np.minimum(values, MAX_CONFIDENCE))
+        self.indptr = np.zeros(len(self.control_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(self.control_ids)), out=self.indptr[1:])
+        self.tactic_names, self.tactic_codes = np.unique(coverage.tactics.astype(str), return_inverse=True)
+        # techniques x tactics averaging matrix: one-hot scaled by 1 / techniques per tactic
+        tactic_size = np.bincount(self.tactic_codes, minlength=len(self.tactic_names))
+        self.tactic_mean = (self.tactic_codes[:, None] == np.arange(len(self.tactic_names))) / tactic_size
+
+    @property
+    def n_techniques(self):
+        return len(self.technique_ids)
+
+    def residual(self, indptr, controls):
+        """Dense systems x techniques residual exposure for systems given as control CSR"""
+        n_systems = len(indptr) - 1
+        systems = np.repeat(np.arange(n_systems), np.diff(indptr))
+        starts = self.indptr[controls]
+        lengths = self.indptr[controls + 1] - starts
+        # Positions of every (system, control, technique) entry in the model CSR
+        total = int(lengths.sum())
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(starts, lengths)
+        cells = np.repeat(systems, lengths) * self.n_techniques + self.indices[offsets]
+        log_residual = np.bincount(cells, weights=self.log_residual[offsets],
+                                   minlength=n_systems * self.n_techniques)
+        return np.exp(log_residual).reshape(n_systems, self.n_techniques)
+
+    def score(self, task):
+        """Summary and per-tactic exposure DataFrame for one ``Systems.chunk``"""
+        residual = self.residual(task['indptr'], task['controls'])
+        per_tactic = residual @ self.tactic_mean
+        frame = pd.DataFrame({
+            'system_id': task['ids'],
+            **task['attributes'],
+            'controls': np.diff(task['indptr']),
+            'unknown_controls': task['unknown'],
+            'exposure': residual.mean(axis=1) if self.n_techniques else np.zeros(len(residual)),
+            'exposed_techniques': (residual >= EXPOSED_THRESHOLD).sum(axis=1),
+            'worst_tactic': self.tactic_names[per_tactic.argmax(axis=1)] if len(self.tactic_names) else None,
+        })
+        tactics = pd.DataFrame(per_tactic, columns=list(self.tactic_names))
+        return pd.concat([frame, tactics], axis=1)
+
+
+_worker_model = None
+
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+
+def _score_chunk(task):
+    return _worker_model.score(task)
+
+
+def score_inventory(model, inventory, workers=None, chunk_size=CHUNK_SIZE):
+    """Yield result DataFrames per chunk of CHUNK_SIZE systems, in inventory order
+
+    Inventories above PARALLEL_THRESHOLD systems are scored on a process
+    pool (``workers=1`` forces in-process scoring).
+    """
+    systems = Systems(inventory, model.control_ids)
+    tasks = (systems.chunk(start, min(start + chunk_size, len(systems)))
+             for start in range(0, len(systems), chunk_size))
+    if len(systems) < PARALLEL_THRESHOLD or workers == 1:
+        for task in tasks:
+            yield model.score(task)
+        return
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             initializer=_init_worker, initargs=(model,)) as pool:
+        yield from pool.map(_score_chunk, tasks)
+
+
+def score(model, inventory, workers=None):
+    """All results of ``score_inventory`` as one DataFrame, worst-exposed first"""
+    frames = list(score_inventory(model, inventory, workers=workers))
+    if not frames:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    return pd.concat(frames, ignore_index=True).sort_values(
+        ['exposure', 'system_id'], ascending=[False, True], ignore_index=True)
+
+
+def write_results(frames, path):
+    """Stream result chunks to a CSV or JSON Lines file; returns the row count"""
+    path = Path(path)
+    rows = 0
+    with open(path, 'w', newline='') as f:
+        for frame in frames:
+            if path.suffix == ".jsonl":
+                frame.to_json(f, orient='records', lines=True)
+            else:
+                frame.to_csv(f, index=False, header=rows == 0)
+            rows += len(frame)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score system control inventories for residual ATT&CK exposure")
+    parser.add_argument("inventory", nargs="?", default=str(config.DATA_PATH / INVENTORY_FILE),
+                        help="CSV with system_id and control_id columns")
+    parser.add_argument("--data-path", default=str(config.DATA_PATH))
+    parser.add_argument("--snapshot-path", default=str(config.SNAPSHOT_PATH))
+    parser.add_argument("--min-confidence", type=float, default=0.0, help="ignore weaker mappings")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size")
+    parser.add_argument("--output", help="stream results to this .csv or .jsonl file")
+    parser.add_argument("--top", type=int, default=10, help="worst-exposed systems to print")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    tables = snapshot.load_tables(args.data_path, args.snapshot_path)
+    model = RiskModel(Coverage(tables), args.min_confidence)
+    inventory = load_inventory(args.inventory)
+
+    start = time.perf_counter()
+    if args.output:
+        systems = write_results(score_inventory(model, inventory, workers=args.workers), args.output)
+        logger.info("Scored %d systems in %.2fs -> %s", systems, time.perf_counter() - start, args.output)
+        return
+    results = score(model, inventory, workers=args.workers)
+    logger.info("Scored %d systems in %.2fs", len(results), time.perf_counter() - start)
+    columns = [c for c in SUMMARY_COLUMNS if c in results]
+    print(results[columns].head(args.top).to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Hybrid lexical + vector search over controls, techniques and requirements
+
+Two CPU-only indexes are built over ``title`` + ``description``:
+
+- BM25 over an inverted index stored as CSR postings (term -> doc, tf)
+- hashed TF-IDF embeddings (signed feature hashing, L2-normalized) in a
+  dense float32 matrix searched exactly with one matrix-vector product
+
+Results from both are merged with reciprocal rank fusion. Indexes are
+written as ``.npy`` files next to the data snapshot and memory-mapped
+when opened.
+"""
+
+import json
+import re
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+# Document sources: table, id column, title column, domain label
+DOCUMENT_SOURCES = [
+    ('nist_controls', "node_id", "title", "NISTControl"),
+    ('mitre_techniques', "node_id", "name", "MITRETechnique"),
+    ('ai_rmf_mapping', "requirement_id", "title", "AIRMFRequirement"),
+]
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-.][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or that the their "
+    "this to with within without".split()
+)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+VECTOR_DIM = 512
+RRF_K = 60
+INDEX_DIR = "search"
+
+
+def tokenize(text):
+    """Lower-cased tokens; control/technique ids such as sr-3 or t1195.001 stay whole"""
+    return [t for t in TOKEN_PATTERN.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def _feature(term, dim):
+    h = zlib.crc32(term.encode("utf-8"))
+    return h % dim, (1.0 if (h >> 16) & 1 else -1.0)
+
+
+class SearchIndex:
+    """BM25 postings plus a hashed TF-IDF matrix over one document set"""
+
+    def __init__(self, doc_ids, doc_kinds, doc_titles, doc_rows, vocabulary,
+                 term_offsets, postings_docs, postings_tf, doc_lengths, idf, vectors):
+        self.doc_ids = doc_ids
+        self.doc_kinds = doc_kinds
+        self.doc_titles = doc_titles
+        self.doc_rows = doc_rows
+        self.vocabulary = vocabulary
+        self._term_ids = {term: i for i, term in enumerate(vocabulary)}
+        self.term_offsets = term_offsets
+        self.postings_docs = postings_docs
+        self.postings_tf = postings_tf
+        self.doc_lengths = doc_lengths
+        self.idf = idf
+        self.vectors = vectors
+        self._avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    # ------------------------------------------------------------------
+    # Build / persist
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, data, dim=VECTOR_DIM):
+        doc_ids, doc_kinds, doc_titles, doc_rows, tokens = [], [], [], [], []
+        for table, id_column, title_column, label in DOCUMENT_SOURCES:
+            df = data[table]
+            for row, (doc_id, title, description) in enumerate(
+                zip(df[id_column], df[title_column], df['description'])
+            ):
+                doc_ids.append(doc_id)
+                doc_kinds.append(label)
+                doc_titles.append(title)
+                doc_rows.append(row)
+                tokens.append(tokenize(f"{doc_id} {title} {description}"))
+
+        # Term frequencies per document
+        vocab = {}
+        entries = []  # (term id, doc, tf)
+        for doc, doc_tokens in enumerate(tokens):
+            counts = {}
+            for token in doc_tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                entries.append((vocab.setdefault(token, len(vocab)), doc, tf))
+
+        n_docs, n_terms = len(doc_ids), len(vocab)
+        entries = np.array(entries, dtype=np.int64).reshape(-1, 3)
+        order = np.lexsort((entries[:, 1], entries[:, 0]))
+        entries = entries[order]
+        term_offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(entries[:, 0], minlength=n_terms), out=term_offsets[1:])
+        postings_docs = entries[:, 1].astype(np.int32)
+        postings_tf = entries[:, 2].astype(np.float32)
+
+        doc_freq = np.diff(term_offsets).astype(np.float64)
+        idf = np.log(1.0 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        doc_lengths = np.array([len(t) for t in tokens], dtype=np.float32)
+
+        # Hashed TF-IDF vectors
+        vocabulary = [None] * n_terms
+        for term, i in vocab.items():
+            vocabulary[i] = term
+        features = np.array([_feature(t, dim) for t in vocabulary], dtype=np.float64).reshape(-1, 2)
+        term_ids = entries[:, 0]
+        weights = (1.0 + np.log(postings_tf)) * idf[term_ids] * features[term_ids, 1]
+        vectors = np.zeros((n_docs, dim), dtype=np.float32)
+        np.add.at(vectors, (postings_docs, features[term_ids, 0].astype(np.int64)), weights)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1.0)
+
+        return cls(doc_ids, doc_kinds, doc_titles, np.array(doc_rows, dtype=np.int64),
+                   vocabulary, term_offsets, postings_docs, postings_tf, doc_lengths, idf, vectors)
+
+    ARRAYS = ('doc_rows', 'term_offsets', 'postings_docs', 'postings_tf', 'doc_lengths', 'idf', 'vectors')
+
+    def save(self, path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(path / f"{name}.npy", getattr(self, name))
+        with open(path / "documents.json", 'w') as f:
+            json.dump({
+                'doc_ids': list(self.doc_ids),
+                'doc_kinds': list(self.doc_kinds),
+                'doc_titles': list(self.doc_titles),
+                'vocabulary': list(self.vocabulary),
+            }, f)
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map a persisted index"""
+        path = Path(path)
+        with open(path / "documents.json", 'r') as f:
+            meta = json.load(f)
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode='r') for name in cls.ARRAYS}
+        return cls(meta['doc_ids'], meta['doc_kinds'], meta['doc_titles'],
+                   vocabulary=meta['vocabulary'], **arrays)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def bm25(self, query):
+        """BM25 score of every document for ``query``"""
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths / max(self._avg_length, 1e-9))
+        for term in set(tokenize(query)):
+            t = self._term_ids.get(term)
+            if t is None:
+                continue
+            lo, hi = self.term_offsets[t], self.term_offsets[t + 1]
+            docs = self.postings_docs[lo:hi]
+            tf = self.postings_tf[lo:hi]
+            scores[docs] += self.idf[t] * tf * (BM25_K1 + 1) / (tf + norm[docs])
+        return scores
+
+    def embed(self, query):
+        dim = self.vectors.shape[1]
+        vector = np.zeros(dim, dtype=np.float32)
+        counts = {}
+        for term in tokenize(query):
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            t = self._term_ids.get(term)
+            if t is None:
+                continue
+            slot, sign = _feature(term, dim)
+            vector[slot] += sign * (1.0 + np.log(tf)) * self.idf[t]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def cosine(self, query):
+        """Cosine similarity of every document to ``query`` (exact search)"""
+        return self.vectors @ self.embed(query)
+
+    def search(self, query, k=10, kinds=None):
+        """Top-k hybrid results merged with reciprocal rank fusion"""
+        lexical = self.bm25(query)
+        semantic = self.cosine(query)
+        fused = np.zeros(len(self.doc_ids), dtype=np.float64)
+        for scores in (lexical, semantic):
+            candidates = np.flatnonzero(scores > 0)
+            ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+            fused[ranked] += 1.0 / (RRF_K + np.arange(1, len(ranked) + 1))
+
+        if kinds is not None:
+            fused[~np.isin(np.asarray(self.doc_kinds, dtype=object), list(kinds))] = 0.0
+        hits = np.flatnonzero(fused > 0)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-fused[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-fused[hits], kind="stable")]
+        return [
+            {
+                'id': self.doc_ids[d],
+                'kind': self.doc_kinds[d],
+                'title': self.doc_titles[d],
+                'row': int(self.doc_rows[d]),
+                'score': round(float(fused[d]), 6),
+                'bm25': round(float(lexical[d]), 4),
+                'cosine': round(float(semantic[d]), 4),
+            }
+            for d in hits
+        ]
+
+
+def build_index(data, path=None, dim=VECTOR_DIM):
+    """Build the search index and optionally persist it under ``path``"""
+    index = SearchIndex.build(data, dim=dim)
+    if path is not None:
+        index.save(path)
+    return index
+
+
+def load_index(data, version_dir=None):
+    """Open the persisted index for this snapshot version, or build in memory"""
+    if version_dir is not None and (Path(version_dir) / INDEX_DIR / "documents.json").exists():
+        return SearchIndex.open(Path(version_dir) / INDEX_DIR)
+    return build_index(data)
@@ -0,0 +1,368 @@
+"""
+Columnar binary snapshot store
+
+Compiles the sample data directory into a versioned, memory-mappable
+snapshot so the dashboard does not re-parse CSV/JSON on every cold start.
+
+Layout::
+
+    data/snapshot/
+        CURRENT                      # name of the active version directory
+        <hash16>/
+            manifest.json            # format version, source hash, schemas
+            graphrag_paths.json
+            graph/                   # CSR adjacency arrays (imgo.graph_index)
+            search/                  # BM25 + vector search index (imgo.search)
+            <table>/<column>.npy                 # numeric columns
+            <table>/<column>.codes.npy           # string columns (int32 codes)
+            <table>/<column>.dict.bytes.npy      # UTF-8 dictionary blob
+            <table>/<column>.dict.offsets.npy    # dictionary offsets
+
+Numeric columns and the graph index arrays are opened with
+``np.load(mmap_mode='r')``, so every process serving a version shares
+one read-only copy through the page cache; string columns are
+dictionary-decoded once per process. The snapshot is only used when its
+``source_hash`` matches the current content of the source files,
+otherwise the loader falls back to the CSVs.
+
+Publishing a new version writes it to a staging directory and then
+atomically swaps ``CURRENT``; readers keep the version they opened until
+they notice the swap via ``current_version``.
+
+Usage::
+
+    python -m imgo.snapshot --data-path data/sample --snapshot-path data/snapshot
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from imgo import graph_index, readability, search
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# Table name -> source CSV file
+SOURCE_FILES = {
+    'nist_controls': "nist_controls_sample.csv",
+    'mitre_techniques': "mitre_techniques_sample.csv",
+    'ai_rmf_mapping': "ai_rmf_sample.csv",
+    'nist_mitre_mapping': "mapping_sample.csv",
+    'relationships': "relationships_sample.csv",
+}
+# Optional sources: an absent file reads as an empty table with these columns
+OPTIONAL_SOURCES = {
+    'relationships': {'source_id': object, 'target_id': object, 'relationship': object, 'confidence': np.float64},
+}
+PATHS_FILE = "graphrag_paths_sample.json"
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+KEEP_VERSIONS = 2
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, stale or unreadable"""
+
+
+def source_files(data_path):
+    """Return the source files that make up a dataset, in a stable order
+
+    Optional sources are only listed when present.
+    """
+    data_path = Path(data_path)
+    optional = {SOURCE_FILES[name] for name in OPTIONAL_SOURCES}
+    names = sorted(SOURCE_FILES.values()) + [PATHS_FILE]
+    return [data_path / name for name in names
+            if name not in optional or (data_path / name).exists()]
+
+
+def read_source(data_path, name):
+    """One source CSV as a DataFrame (empty for an absent optional source)"""
+    path = Path(data_path) / SOURCE_FILES[name]
+    if name in OPTIONAL_SOURCES and not path.exists():
+        return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in OPTIONAL_SOURCES[name].items()})
+    return pd.read_csv(path)
+
+
+def source_hash(data_path):
+    """Content hash (sha256 hex) over all source files"""
+    digest = hashlib.sha256()
+    for path in source_files(data_path):
+        digest.update(path.name.encode("utf-8") + b"\0")
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def read_sources(data_path, fkgl_store=None):
+    """Parse the source CSV/JSON files into DataFrames
+
+    Published ``fkgl_score`` values are kept; ``readability`` scores only
+    controls without one or whose description changed since ``fkgl_store``
+    was written. The store is only read here.
+    """
+    data_path = Path(data_path)
+    tables = {name: read_source(data_path, name) for name in SOURCE_FILES}
+    with open(data_path / PATHS_FILE, 'r') as f:
+        tables['graphrag_paths'] = json.load(f)
+
+    controls = tables['nist_controls']
+    scores, _ = readability.score_incremental(controls['node_id'], controls['description'], store_path=fkgl_store,
+                                              published=controls.get('fkgl_score'))
+    controls['fkgl_score'] = scores.to_numpy()
+    return tables
+
+
+# ------------------------------------------------------------------
+# Column encoding
+# ------------------------------------------------------------------
+
+def _write_string_column(table_dir, column, values):
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    encoded = [str(u).encode("utf-8") for u in uniques]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    np.save(table_dir / f"{column}.codes.npy", codes.astype(np.int32))
+    np.save(table_dir / f"{column}.dict.bytes.npy", blob)
+    np.save(table_dir / f"{column}.dict.offsets.npy", offsets)
+
+
+def _read_string_column(table_dir, column):
+    codes = np.load(table_dir / f"{column}.codes.npy", mmap_mode='r')
+    blob = np.load(table_dir / f"{column}.dict.bytes.npy", mmap_mode='r')
+    offsets = np.load(table_dir / f"{column}.dict.offsets.npy", mmap_mode='r')
+
+    raw = blob.tobytes()
+    dictionary = np.empty(len(offsets), dtype=object)
+    for i in range(len(offsets) - 1):
+        dictionary[i] = raw[offsets[i]:offsets[i + 1]].decode("utf-8")
+    # Last slot holds the missing-value marker for code -1
+    dictionary[-1] = None
+    return dictionary.take(codes)
+
+
+def _write_table(table_dir, df):
+    table_dir.mkdir(parents=True)
+    columns = []
+    for column in df.columns:
+        series = df[column]
+        if series.dtype.kind in "biuf":
+            np.save(table_dir / f"{column}.npy", series.to_numpy())
+            kind = "numeric"
+        else:
+            _write_string_column(table_dir, column, series)
+            kind = "string"
+        columns.append({'name': column, 'kind': kind, 'dtype': str(series.dtype)})
+    return {'rows': len(df), 'columns': columns}
+
+
+def _read_table(table_dir, schema):
+    data = {}
+    for column in schema['columns']:
+        name = column['name']
+        if column['kind'] == "numeric":
+            data[name] = np.load(table_dir / f"{name}.npy", mmap_mode='r')
+        else:
+            data[name] = _read_string_column(table_dir, name)
+    return pd.DataFrame(data, copy=False)
+
+
+# ------------------------------------------------------------------
+# Build / open
+# ------------------------------------------------------------------
+
+def current_version_dir(snapshot_path):
+    """Return the active version directory, or None if there is none"""
+    snapshot_path = Path(snapshot_path)
+    try:
+        name = (snapshot_path / CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        return None
+    return snapshot_path / name if name else None
+
+
+def current_version(snapshot_path):
+    """Name of the active version (cheap; one small file read), or None"""
+    version_dir = current_version_dir(snapshot_path)
+    return version_dir.name if version_dir is not None else None
+
+
+def build_snapshot(data_path, snapshot_path, force=False):
+    """Compile the source files into a new snapshot version
+
+    The version directory is fully written before ``CURRENT`` is swapped
+    to point at it, so readers never observe a half-written snapshot.
+    Returns the path of the active version directory.
+    """
+    data_path = Path(data_path)
+    snapshot_path = Path(snapshot_path)
+    digest = source_hash(data_path)
+    version_name = digest[:16]
+    version_dir = snapshot_path / version_name
+
+    if not force and current_version_dir(snapshot_path) == version_dir \
+            and (version_dir / MANIFEST_FILE).exists():
+        logger.info("Snapshot %s is up to date", version_name)
+        return version_dir
+
+    fkgl_store = snapshot_path / readability.STORE_FILE
+    tables = read_sources(data_path, fkgl_store=fkgl_store)
+    version_dir = publish_snapshot(tables, snapshot_path, digest)
+    controls = tables['nist_controls']
+    readability.save_store(fkgl_store, controls['node_id'], controls['description'], controls['fkgl_score'])
+    return version_dir
+
+
+def publish_snapshot(tables, snapshot_path, digest, index=None):
+    """Write ``tables`` as the snapshot version for source hash ``digest``
+
+    ``index`` is a prebuilt GraphIndex for these tables (e.g. patched by
+    a delta); it is built from the tables when omitted.
+    """
+    snapshot_path = Path(snapshot_path)
+    version_name = digest[:16]
+    version_dir = snapshot_path / version_name
+
+    staging_dir = snapshot_path / f".{version_name}.tmp-{os.getpid()}"
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)
+    staging_dir.mkdir(parents=True)
+
+    manifest = {
+        'format_version': SNAPSHOT_VERSION,
+        'source_hash': digest,
+        'tables': {},
+    }
+    for name in SOURCE_FILES:
+        manifest['tables'][name] = _write_table(staging_dir / name, tables[name])
+    with open(staging_dir / "graphrag_paths.json", 'w') as f:
+        json.dump(tables['graphrag_paths'], f)
+    (index if index is not None else graph_index.build_index(tables)).save(staging_dir / graph_index.INDEX_DIR)
+    search.build_index(tables, staging_dir / search.INDEX_DIR)
+    with open(staging_dir / MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    if version_dir.exists():
+        shutil.rmtree(version_dir)
+    os.replace(staging_dir, version_dir)
+    _swap_current(snapshot_path, version_name)
+    _prune_versions(snapshot_path, keep=version_name)
+    return version_dir
+
+
+def _swap_current(snapshot_path, version_name):
+    tmp = snapshot_path / f".{CURRENT_FILE}.tmp-{os.getpid()}"
+    tmp.write_text(version_name + "\n")
+    os.replace(tmp, snapshot_path / CURRENT_FILE)
+
+
+def _prune_versions(snapshot_path, keep):
+    """Remove old version directories, keeping the newest KEEP_VERSIONS"""
+    versions = [
+        p for p in snapshot_path.iterdir()
+        if p.is_dir() and not p.name.startswith(".") and p.name != keep
+    ]
+    versions.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in versions[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def fresh_version_dir(snapshot_path, data_version):
+    """Active version directory if it was built from ``data_version``, else None"""
+    version_dir = current_version_dir(snapshot_path)
+    if version_dir is None:
+        return None
+    try:
+        with open(version_dir / MANIFEST_FILE, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return version_dir if manifest.get('source_hash') == data_version else None
+
+
+def write_sources(tables, data_path, names=None):
+    """Write tables back to their source CSVs (each file replaced atomically)"""
+    data_path = Path(data_path)
+    for name in names or SOURCE_FILES:
+        path = data_path / SOURCE_FILES[name]
+        tmp = path.with_name(f".{path.name}.tmp-{os.getpid()}")
+        tables[name].to_csv(tmp, index=False)
+        os.replace(tmp, path)
+
+
+def load_snapshot(snapshot_path, expected_hash=None):
+    """Open the active snapshot version
+
+    Raises SnapshotError if there is no snapshot, its format version is
+    unknown, or its source hash does not match ``expected_hash``.
+    """
+    version_dir = current_version_dir(snapshot_path)
+    if version_dir is None or not (version_dir / MANIFEST_FILE).exists():
+        raise SnapshotError(f"No snapshot found in {snapshot_path}")
+
+    with open(version_dir / MANIFEST_FILE, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != SNAPSHOT_VERSION:
+        raise SnapshotError(
+            f"Unsupported snapshot format {manifest.get('format_version')}"
+        )
+    if expected_hash is not None and manifest['source_hash'] != expected_hash:
+        raise SnapshotError("Snapshot is stale (source hash mismatch)")
+
+    tables = {
+        name: _read_table(version_dir / name, schema)
+        for name, schema in manifest['tables'].items()
+    }
+    with open(version_dir / "graphrag_paths.json", 'r') as f:
+        tables['graphrag_paths'] = json.load(f)
+    return tables
+
+
+def load_tables(data_path, snapshot_path):
+    """Load all datasets, preferring a fresh snapshot over the CSV files
+
+    The returned dict carries a ``data_version`` key (the source content
+    hash) that downstream caches can key on.
+    """
+    digest = source_hash(data_path)
+    try:
+        tables = load_snapshot(snapshot_path, expected_hash=digest)
+    except SnapshotError as e:
+        logger.info("%s; falling back to CSV sources", e)
+        tables = read_sources(data_path, fkgl_store=Path(snapshot_path) / readability.STORE_FILE)
+    tables['data_version'] = digest
+    return tables
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the IMGO columnar data snapshot")
+    parser.add_argument("--data-path", default="data/sample", help="source data directory")
+    parser.add_argument("--snapshot-path", default="data/snapshot", help="snapshot output directory")
+    parser.add_argument("--force", action="store_true", help="rebuild even if up to date")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    version_dir = build_snapshot(args.data_path, args.snapshot_path, force=args.force)
+    with open(version_dir / MANIFEST_FILE, 'r') as f:
+        manifest = json.load(f)
+    for name, schema in manifest['tables'].items():
+        print(f"{name}: {schema['rows']} rows, {len(schema['columns'])} columns")
+    print(f"Snapshot written to {version_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+Synthetic full-scale datasets in the ``data/sample`` layout
+
+Generates every sample file (controls, techniques, AI RMF requirements,
+MITIGATES mappings, other relationships, GraphRAG paths and the system
+control inventory) with the same
+columns and id formats at a configurable scale. ``scale=1`` matches the
+full research dataset described in the About page: 1,642 nodes (1,196
+controls and enhancements from 324 base controls, 374 techniques, 72
+requirements) and 41,911 relationships (20,658 MITIGATES).
+
+Distributions follow the sample files: confidences are Beta-distributed
+with the sample mean and spread, descriptions are built from the sample
+vocabulary and sentence lengths (FKGL is scored from the generated text),
+and mapping degree is skewed so a few controls map to many techniques.
+Output is deterministic for a given ``seed``.
+
+Usage::
+
+    python -m imgo.synthetic --scale 10 --output data/synthetic-10x
+"""
+
+import argparse
+import json
+import logging
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from imgo import config, readability, risk, snapshot
+from imgo.importers import TACTICS
+
+logger = logging.getLogger(__name__)
+
+# Full dataset counts at scale 1
+BASE_CONTROLS = 324
+CONTROL_NODES = 1196
+TECHNIQUES = 374
+REQUIREMENTS = 72
+MITIGATES = 20658
+OTHER_RELATIONSHIPS = 21253
+USES = 34
+PATHS = 100
+SYSTEMS = 500  # system control inventory
+SYSTEM_CONTROLS = (10, 120)  # implemented controls per system
+
+CONTROL_FAMILIES = [
+    "AC", "AT", "AU", "CA", "CM", "CP", "IA", "IR", "MA", "MP",
+    "PE", "PL", "PM", "PS", "PT", "RA", "SA", "SC", "SI", "SR",
+]
+# AI RMF function -> category column value
+RMF_FUNCTIONS = {"GOVERN": "Governance", "MAP": "Map", "MEASURE": "Measure", "MANAGE": "Manage"}
+# Share of each tactic among ATT&CK enterprise techniques (approximate)
+TACTIC_WEIGHTS = [1, 2, 3, 4, 6, 4, 10, 5, 5, 2, 4, 4, 2, 3]
+INFERENCE_TAGS = [
+    "DIRECT MITIGATION", "SUBPROCESS CONTROL", "TARGETED MITIGATION", "PREVENTIVE CONTROL",
+    "HARDWARE FOCUS", "ACCOUNT CONTROL", "AUTHENTICATION BARRIER", "DETECTION CONTROL",
+    "FORENSIC EVIDENCE", "INTEGRITY VERIFICATION",
+]
+QUERY_TEMPLATES = [
+    "How does {control} mitigate {technique}?",
+    "What controls detect {technique}?",
+    "Which safeguards reduce exposure to {technique}?",
+    "How do {control} and related controls address {technique}?",
+]
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z-]+")
+
+
+def _beta(rng, mean, std, size, low=0.0, high=1.0, decimals=2):
+    """Beta samples with the given moments, clipped and rounded like the sample files"""
+    var = min(std ** 2, mean * (1 - mean) * 0.99)
+    common = mean * (1 - mean) / var - 1
+    values = rng.beta(mean * common, (1 - mean) * common, size)
+    return np.round(np.clip(values, low, high), decimals)
+
+
+def _counts(rng, total, weights, minimum=1):
+    """Split ``total`` into len(weights) parts (each >= ``minimum``) proportional to ``weights``"""
+    weights = np.asarray(weights, dtype=np.float64)
+    parts = np.maximum(np.floor(total * weights / weights.sum()).astype(np.int64), minimum)
+    for i in rng.choice(len(parts), size=max(total - parts.sum(), 0), p=weights / weights.sum()):
+        parts[i] += 1
+    return parts
+
+
+class TextModel:
+    """Word and sentence-length statistics of the sample descriptions"""
+
+    def __init__(self, texts, rng):
+        self.rng = rng
+        sentences = [s for t in texts for s in re.split(r"(?<=[.!?])\s+", str(t)) if s]
+        self.sentence_lengths = np.array([len(_WORD.findall(s)) for s in sentences] or [20])
+        words = [w.lower() for t in texts for w in _WORD.findall(str(t))]
+        self.vocabulary, counts = np.unique(words, return_counts=True)
+        self.weights = counts / counts.sum()
+
+    def sentence(self):
+        length = int(self.rng.choice(self.sentence_lengths))
+        words = self.rng.choice(self.vocabulary, size=max(length, 4), p=self.weights)
+        return " ".join(words).capitalize() + "."
+
+    def text(self, sentences):
+        return " ".join(self.sentence() for _ in range(sentences))
+
+    def title(self, low=2, high=5):
+        words = self.rng.choice(self.vocabulary, size=int(self.rng.integers(low, high + 1)), p=self.weights)
+        return " ".join(w.capitalize() for w in words)
+
+
+def _sample_stats(sample_path):
+    sample_path = Path(sample_path)
+    tables = {name: snapshot.read_source(sample_path, name) for name in snapshot.SOURCE_FILES}
+    mapping = tables['nist_mitre_mapping']['mapping_confidence']
+    relationships = tables['relationships']['confidence']
+    with open(sample_path / snapshot.PATHS_FILE) as f:
+        paths = json.load(f)
+    path_conf = pd.Series([p['confidence'] for p in paths])
+    texts = pd.concat([tables[t]['description'] for t in ('nist_controls', 'mitre_techniques', 'ai_rmf_mapping')])
+    return {
+        'mapping': (mapping.mean(), mapping.std()),
+        # Without sample relationships, their confidences follow the mappings
+        'relationships': (relationships.mean(), relationships.std()) if len(relationships) > 1
+        else (mapping.mean(), mapping.std()),
+        'paths': (path_conf.mean(), path_conf.std()),
+        'texts': texts.dropna().tolist(),
+    }
+
+
+# ------------------------------------------------------------------
+# Tables
+# ------------------------------------------------------------------
+
+def _controls(rng, text, scale):
+    bases = _counts(rng, max(int(round(BASE_CONTROLS * scale)), len(CONTROL_FAMILIES)),
+                    rng.uniform(0.5, 2.0, len(CONTROL_FAMILIES)))
+    base_ids, families = [], []
+    for family, n in zip(CONTROL_FAMILIES, bases):
+        base_ids += [f"{family}-{i}" for i in range(1, n + 1)]
+        families += [family] * n
+    # Enhancements per base control are heavily skewed (SI-4 has 25, many have none)
+    enhancements = _counts(rng, max(int(round(CONTROL_NODES * scale)) - len(base_ids), 0),
+                           np.minimum(rng.pareto(1.5, len(base_ids)), 10), minimum=0)
+    node_ids, node_families, parents = [], [], []
+    for base, family, n in zip(base_ids, families, enhancements):
+        node_ids.append(base)
+        node_families.append(family)
+        parents.append(None)
+        for k in range(1, n + 1):
+            node_ids.append(f"{base}({k})")
+            node_families.append(family)
+            parents.append(base)
+    df = pd.DataFrame({
+        'node_id': node_ids,
+        'label': "NISTControl",
+        'family': node_families,
+        'title': [text.title() for _ in node_ids],
+        'description': [text.text(int(rng.integers(2, 4))) for _ in node_ids],
+    })
+    df['fkgl_score'] = readability.fkgl(df['description']).to_numpy()
+    return df, pd.Series(parents, index=df['node_id'])
+
+
+def _techniques(rng, text, scale):
+    n = max(int(round(TECHNIQUES * scale)), 1)
+    node_ids = []
+    base = 1000
+    while len(node_ids) < n:
+        node_ids.append(f"T{base}")
+        # About 60% of ATT&CK entries are sub-techniques
+        for k in range(1, int(rng.poisson(1.5)) + 1):
+            if len(node_ids) < n and k <= 999:
+                node_ids.append(f"T{base}.{k:03d}")
+        base += 1
+    weights = np.asarray(TACTIC_WEIGHTS, dtype=np.float64)
+    tactics = rng.choice(list(TACTICS.values()), size=n, p=weights / weights.sum())
+    return pd.DataFrame({
+        'node_id': node_ids,
+        'label': "MITRETechnique",
+        'name': [text.title() for _ in node_ids],
+        'tactic': tactics,
+        'description': [text.text(int(rng.integers(2, 4))) for _ in node_ids],
+    })
+
+
+def _requirements(rng, text, scale):
+    n = max(int(round(REQUIREMENTS * scale)), len(RMF_FUNCTIONS))
+    ids, categories = [], []
+    for function, count in zip(RMF_FUNCTIONS, _counts(rng, n, [19, 18, 22, 13])):
+        for i in range(count):
+            ids.append(f"{function}-{i // 6 + 1}.{i % 6 + 1}")
+            categories.append(RMF_FUNCTIONS[function])
+    return pd.DataFrame({
+        'requirement_id': ids,
+        'category': categories,
+        'title': [text.title(3, 7) for _ in ids],
+        'description': [text.text(1) for _ in ids],
+    })
+
+
+def _unique_pairs(rng, n, source_weights, target_count, exclude_self=False):
+    """``n`` distinct (source, target) position pairs, sources drawn by weight"""
+    p = source_weights / source_weights.sum()
+    pairs = np.empty((0, 2), dtype=np.int64)
+    limit = len(source_weights) * target_count - (len(source_weights) if exclude_self else 0)
+    n = min(n, limit)
+    while len(pairs) < n:
+        draw = (n - len(pairs)) * 2
+        sources = rng.choice(len(p), size=draw, p=p)
+        targets = rng.integers(0, target_count, size=draw)
+        new = np.column_stack([sources, targets])
+        if exclude_self:
+            new = new[new[:, 0] != new[:, 1]]
+        pairs = np.unique(np.vstack([pairs, new]), axis=0)
+    return pairs[rng.permutation(len(pairs))[:n]]
+
+
+def _mapping(rng, controls, techniques, stats, scale):
+    n = int(round(MITIGATES * scale))
+    # Skewed control degree: a few broad controls map to hundreds of techniques
+    pairs = _unique_pairs(rng, n, rng.pareto(1.2, len(controls)) + 0.1, len(techniques))
+    c = controls.iloc[pairs[:, 0]]
+    t = techniques.iloc[pairs[:, 1]]
+    tags = rng.choice(INFERENCE_TAGS, size=len(pairs))
+    return pd.DataFrame({
+        'nist_control_id': c['node_id'].to_numpy(),
+        'mitre_technique_id': t['node_id'].to_numpy(),
+        'mapping_confidence': _beta(rng, *stats['mapping'], len(pairs)),
+        'inference_path': (
+            c['node_id'].to_numpy() + ": " + c['title'].to_numpy() + " → "
+            + t['node_id'].to_numpy() + ": " + t['name'].to_numpy() + " [" + tags + "]"
+        ),
+    })
+
+
+def _relationships(rng, controls, parents, techniques, requirements, stats, scale):
+    total = int(round(OTHER_RELATIONSHIPS * scale))
+    frames = []
+
+    # Enhancement -> base control
+    enhancement = parents.dropna()
+    frames.append(pd.DataFrame({'source_id': enhancement.index, 'target_id': enhancement.to_numpy(),
+                                'relationship': "BELONGS_TO"}))
+    # Sub-technique uses a technique
+    uses = _unique_pairs(rng, int(round(USES * scale)), np.ones(len(techniques)), len(techniques), True)
+    frames.append(pd.DataFrame({'source_id': techniques['node_id'].to_numpy()[uses[:, 0]],
+                                'target_id': techniques['node_id'].to_numpy()[uses[:, 1]],
+                                'relationship': "USES"}))
+
+    remaining = max(total - len(enhancement) - len(uses), 0)
+    addresses = _unique_pairs(rng, remaining // 4, np.ones(len(requirements)), len(controls))
+    frames.append(pd.DataFrame({'source_id': requirements['requirement_id'].to_numpy()[addresses[:, 0]],
+                                'target_id': controls['node_id'].to_numpy()[addresses[:, 1]],
+                                'relationship': "ADDRESSES"}))
+    related = _unique_pairs(rng, remaining - len(addresses),
+                            rng.pareto(1.5, len(controls)) + 0.1, len(controls), True)
+    frames.append(pd.DataFrame({'source_id': controls['node_id'].to_numpy()[related[:, 0]],
+                                'target_id': controls['node_id'].to_numpy()[related[:, 1]],
+                                'relationship': "RELATED_TO"}))
+
+    df = pd.concat(frames, ignore_index=True)
+    df['confidence'] = _beta(rng, *stats['relationships'], len(df))
+    return df
+
+
+def _paths(rng, mapping, techniques, text, stats, scale):
+    names = techniques.set_index('node_id')['name']
+    by_technique = mapping.groupby('mitre_technique_id')['nist_control_id'].agg(list)
+    n = max(int(round(PATHS * scale)), 1)
+    confidence = _beta(rng, *stats['paths'], n)
+    records = []
+    for i, technique in enumerate(rng.choice(by_technique.index, size=n)):
+        controls = list(dict.fromkeys(by_technique[technique]))
+        controls = list(rng.choice(controls, size=min(3, len(controls)), replace=False))
+        siblings = [t for t in names.index if t.split(".")[0] == technique.split(".")[0]]
+        chosen = [technique] + [t for t in siblings if t != technique][:int(rng.integers(0, 3))]
+        template = QUERY_TEMPLATES[int(rng.integers(len(QUERY_TEMPLATES)))]
+        records.append({
+            'query': template.format(control=controls[0], technique=names[technique]),
+            'nist_controls': controls,
+            'mitre_techniques': chosen,
+            'reasoning': text.text(3),
+            'confidence': float(confidence[i]),
+            'path_length': int(rng.choice([3, 3, 3, 4])),
+        })
+    return records
+
+
+def _inventory(rng, controls, scale):
+    n = max(int(round(SYSTEMS * scale)), 1)
+    sizes = rng.integers(*SYSTEM_CONTROLS, size=n)
+    system_ids = np.array([f"SYS-{i + 1:05d}" for i in range(n)], dtype=object)
+    kinds = np.where(rng.random(n) < 0.7, "System", "Asset")
+    rows = np.repeat(np.arange(n), sizes)
+    # Repeated draws of a control for one system are dropped by the scorer
+    picks = rng.integers(0, len(controls), size=len(rows))
+    return pd.DataFrame({
+        'system_id': system_ids[rows],
+        'system_name': [f"{kind} {i + 1}" for kind, i in zip(kinds[rows], rows)],
+        'asset_type': kinds[rows],
+        'control_id': controls['node_id'].to_numpy()[picks],
+    })
+
+
+def generate(output, scale=1.0, seed=0, sample_path=None):
+    """Write a synthetic dataset to ``output``; returns row counts per file"""
+    rng = np.random.default_rng(seed)
+    stats = _sample_stats(sample_path or config.DATA_PATH)
+    text = TextModel(stats['texts'], rng)
+
+    controls, parents = _controls(rng, text, scale)
+    techniques = _techniques(rng, text, scale)
+    requirements = _requirements(rng, text, scale)
+    tables = {
+        'nist_controls': controls,
+        'mitre_techniques': techniques,
+        'ai_rmf_mapping': requirements,
+        'nist_mitre_mapping': _mapping(rng, controls, techniques, stats, scale),
+        'relationships': _relationships(rng, controls, parents, techniques, requirements, stats, scale),
+    }
+    output = Path(output)
+    output.mkdir(parents=True, exist_ok=True)
+    for name, df in tables.items():
+        df.to_csv(output / snapshot.SOURCE_FILES[name], index=False)
+    paths = _paths(rng, tables['nist_mitre_mapping'], techniques, text, stats, scale)
+    with open(output / snapshot.PATHS_FILE, 'w') as f:
+        json.dump(paths, f, indent=2, ensure_ascii=False)
+    inventory = _inventory(rng, controls, scale)
+    inventory.to_csv(output / risk.INVENTORY_FILE, index=False)
+
+    counts = {name: len(df) for name, df in tables.items()}
+    counts['graphrag_paths'] = len(paths)
+    counts['system_inventory'] = len(inventory)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset in the data/sample layout")
+    parser.add_argument("--output", required=True, help="output data directory")
+    parser.add_argument("--scale", type=float, default=1.0, help="1.0 = full research dataset size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sample-path", default=str(config.DATA_PATH), help="sample data to take distributions from")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    counts = generate(args.output, scale=args.scale, seed=args.seed, sample_path=args.sample_path)
+    for name, rows in counts.items():
+        print(f"{name}: {rows:,} rows")
+    nodes = counts['nist_controls'] + counts['mitre_techniques'] + counts['ai_rmf_mapping']
+    edges = counts['nist_mitre_mapping'] + counts['relationships']
+    print(f"{nodes:,} nodes, {edges:,} relationships written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,16 @@
 // For demonstration purposes, the CSV file reference is commented out.
 // Full research data available through collaboration with ISGO project.
 //
+// The local pipeline `python -m imgo.consensus` is NOT a drop-in for this
+// script: it sets r.is_consensus, r.mapping_source, r.validation_date and
+// r.consensus_confidence (0-100, the share of agreeing validators; CSV via
+// --output, or UNWIND batches via --neo4j) and never changes r.confidence,
+// while this script sets r.confidence = 100. The verification queries at
+// the end read r.confidence and only hold for this script; for pipeline
+// output use the commented query there, or the matching offline check
+// `python -m imgo.bfo_verify --consensus <output.csv>`, which reads
+// consensus_confidence.
+//
 // Expected data format:
 // nist_control_id,mitre_technique_id
 // SR-3,T1195
@@ -50,6 +60,13 @@ RETURN count(r) as consensus_count,
        avg(r.confidence) as avg_confidence;
 // Expected: 1,567, 100.0
 
+// Verification for `python -m imgo.consensus --neo4j` output:
+/*
+MATCH ()-[r:MITIGATES {is_consensus: true}]->()
+RETURN count(r) as consensus_count,
+       avg(r.consensus_confidence) as avg_consensus_confidence;
+*/
+
 // Statistics by source
 MATCH ()-[r:MITIGATES]->()
 RETURN r.mapping_source, count(r) as count, avg(r.confidence) as avg_conf
@@ -2,6 +2,8 @@
 // ISGO v3.0 - Add BFO Relationship Properties
 // ISO/IEC 21838-2 Compliance - Step 2
 // ==========================================
+// Not needed for graphs loaded with `python -m imgo.neo4j_loader`,
+// which writes BFO labels and bfo_type at load time.
 
 // Step 1: MITIGATES → realized_in
 MATCH ()-[r:MITIGATES]->()
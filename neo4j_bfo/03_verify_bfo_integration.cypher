@@ -2,6 +2,8 @@
 // ISGO v3.0 - Verify BFO Integration
 // ISO/IEC 21838-2 Compliance - Step 3
 // ==========================================
+// The same checks run in-process over the local snapshot, without
+// full-graph scans: PYTHONPATH=apps python -m imgo.bfo_verify
 
 // Test 1: Count BFO-labeled nodes
 MATCH (n:Continuant) RETURN "Continuant" as type, count(n) as count
@@ -2,6 +2,8 @@
 // ISGO v3.0 - Integration Tests
 // ISO/IEC 21838-2 Compliance Verification
 // ==========================================
+// The same checks run in-process over the local snapshot, without
+// full-graph scans: PYTHONPATH=apps python -m imgo.bfo_verify
 
 // Test 1: SR-3 to MITRE path via BFO
 MATCH (c:NISTControl:InformationContentEntity {control_id: "SR-3"})
@@ -0,0 +1,56 @@
+"""Path exports round-trip through the tabular formats"""
+
+import io
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from imgo import export, snapshot
+
+DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "sample"
+
+
+def sample_paths():
+    with open(DATA_PATH / snapshot.PATHS_FILE) as f:
+        return json.load(f)
+
+
+def flat(value):
+    return "; ".join(value) if isinstance(value, list) else value
+
+
+@pytest.mark.parametrize("chunk_rows", [2, export.CHUNK_ROWS])
+def test_parquet_paths_round_trip(chunk_rows):
+    pq = pytest.importorskip("pyarrow.parquet")
+    paths = sample_paths()
+    assert any('ai_rmf_requirements' in p for p in paths)
+
+    data = export.to_bytes(export.paths_export(paths, 'parquet', chunk_rows=chunk_rows))
+    table = pq.read_table(io.BytesIO(data)).to_pandas()
+
+    assert len(table) == len(paths)
+    assert list(table.columns[:len(export.PATH_COLUMNS)]) == export.PATH_COLUMNS
+    for row, path in zip(table.to_dict('records'), paths):
+        for column, value in row.items():
+            if column in path:
+                assert value == flat(path[column])
+            else:
+                assert pd.isna(value)
+
+
+def test_csv_paths_are_flat():
+    paths = sample_paths()
+    df = pd.read_csv(io.BytesIO(export.to_bytes(export.paths_export(paths, 'csv', chunk_rows=2))))
+
+    assert len(df) == len(paths)
+    assert not df.astype(str).apply(lambda c: c.str.startswith("[")).any().any()
+
+
+def test_empty_paths_export_keeps_the_schema():
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = pq.read_table(io.BytesIO(export.to_bytes(export.paths_export([], 'parquet'))))
+
+    assert table.num_rows == 0
+    assert table.schema.names == export.PATH_COLUMNS
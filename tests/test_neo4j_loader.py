@@ -0,0 +1,85 @@
+"""Bulk loader round trip against the in-process fake driver"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from imgo import neo4j_loader
+from imgo.fake_neo4j import FakeDriver
+from imgo.graph_index import BFO_TYPES
+from imgo.snapshot import SOURCE_FILES
+
+DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "sample"
+
+
+class GraphStore:
+    """Responder that applies the loader's UNWIND rows to in-memory nodes and edges"""
+
+    def __init__(self):
+        self.nodes = {}
+        self.edges = {}
+
+    def __call__(self, query, params):
+        for _, label, key, _, _ in neo4j_loader.NODE_SOURCES:
+            if query == neo4j_loader.node_statement(label, key):
+                for row in params['rows']:
+                    self.nodes[(label, row['id'])] = row['props']
+                return []
+        for rel_type in BFO_TYPES:
+            if query == neo4j_loader.relationship_statement(rel_type):
+                for row in params['rows']:
+                    self.edges[(row['source'], rel_type, row['target'])] = row['props']
+                return []
+        raise AssertionError(f"Unexpected statement: {query}")
+
+
+def load(batch_size, checkpoint=None, workers=2):
+    store = GraphStore()
+    driver = FakeDriver(store)
+    loader = neo4j_loader.BulkLoader(driver, batch_size=batch_size, workers=workers, checkpoint=checkpoint)
+    return store, driver, loader.load(DATA_PATH)
+
+
+@pytest.mark.parametrize("batch_size", [1, 4, 5000])
+def test_round_trip(batch_size):
+    store, driver, report = load(batch_size)
+
+    for table, label, _, id_column, properties in neo4j_loader.NODE_SOURCES:
+        df = pd.read_csv(DATA_PATH / SOURCE_FILES[table])
+        assert report['sources'][table]['rows'] == len(df)
+        for record in df.to_dict("records"):
+            props = store.nodes[(label, record[id_column])]
+            assert props == {prop: neo4j_loader._clean(record[col]) for prop, col in properties.items()}
+
+    mapping = pd.read_csv(DATA_PATH / SOURCE_FILES['nist_mitre_mapping'])
+    relationships = pd.read_csv(DATA_PATH / SOURCE_FILES['relationships'])
+    expected = {(r['nist_control_id'], "MITIGATES", r['mitre_technique_id']): r['mapping_confidence']
+                for r in mapping.to_dict("records")}
+    expected.update({(r['source_id'], r['relationship'], r['target_id']): r['confidence']
+                     for r in relationships.to_dict("records")})
+    assert {key: props['confidence'] for key, props in store.edges.items()} == expected
+    assert driver.rows_written() == len(store.nodes) + len(store.edges)
+
+
+def test_resume_skips_completed_batches(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    _, first, _ = load(4, neo4j_loader.Checkpoint(path))
+    _, second, report = load(4, neo4j_loader.Checkpoint(path))
+
+    assert first.rows_written() > 0
+    assert second.rows_written() == 0
+    assert all(s['batches'] == 0 and s['skipped_batches'] > 0 for s in report['sources'].values())
+
+
+def test_resume_with_other_batch_size_is_refused(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    load(4, neo4j_loader.Checkpoint(path))
+
+    with pytest.raises(neo4j_loader.CheckpointError):
+        load(3, neo4j_loader.Checkpoint(path))
+
+    checkpoint = neo4j_loader.Checkpoint(path)
+    checkpoint.clear()
+    store, _, _ = load(3, checkpoint)
+    assert len(store.nodes) == sum(len(pd.read_csv(DATA_PATH / SOURCE_FILES[t])) for t, *_ in neo4j_loader.NODE_SOURCES)
@@ -0,0 +1,52 @@
+"""FKGL scoring against the published sample scores, and store seeding"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from imgo import readability, snapshot
+
+DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "sample"
+CONTROLS = DATA_PATH / snapshot.SOURCE_FILES['nist_controls']
+
+# The sample descriptions are excerpts of the texts the published scores were
+# computed from, so the heuristic only tracks them loosely (SR-3, one long
+# sentence in the excerpt, is furthest off at 8.6 grades)
+MEAN_TOLERANCE = 3.0  # grades, mean absolute difference
+MAX_TOLERANCE = 9.0   # grades, any single control
+
+
+def test_scorer_tracks_published_scores():
+    controls = pd.read_csv(CONTROLS)
+    computed = readability.fkgl(controls['description'], workers=1).to_numpy()
+    error = np.abs(computed - controls['fkgl_score'].to_numpy())
+
+    assert error.mean() <= MEAN_TOLERANCE
+    assert error.max() <= MAX_TOLERANCE
+
+
+def test_published_scores_are_kept():
+    controls = pd.read_csv(CONTROLS)
+    tables = snapshot.read_sources(DATA_PATH)
+
+    assert tables['nist_controls']['fkgl_score'].tolist() == controls['fkgl_score'].tolist()
+
+
+def test_only_changed_or_unpublished_rows_are_scored(tmp_path):
+    controls = pd.read_csv(CONTROLS)
+    store = tmp_path / readability.STORE_FILE
+    readability.save_store(store, controls['node_id'], controls['description'], controls['fkgl_score'])
+
+    texts = controls['description'].copy()
+    texts[0] = "A short control. It is easy to read."
+    published = controls['fkgl_score'].copy()
+    published[1] = np.nan
+    published[2] = 12.0  # new reference value for an unchanged description
+    scores, rescored = readability.score_incremental(controls['node_id'], texts, store, published=published)
+
+    expected = controls['fkgl_score'].to_numpy().copy()
+    expected[0] = readability.fkgl(texts[:1]).iloc[0]
+    expected[2] = 12.0
+    assert rescored == 1
+    np.testing.assert_allclose(scores.to_numpy(), expected)